@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+benchmark of the start up time of the command line scripts
+
+runs `python -X importtime` for the import of each script module and for listing its
+plot types (-l) and prints the cumulative import time and the slowest imported modules.
+The budget for the import of the script modules is enforced by tests/test_import_time.py.
+
+usage:
+    python benchmarks/bench_import_time.py --top 10
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+SCRIPTS = (
+    "pyaerocom_plotting.cli.pyaerocom_plot",
+    "pyaerocom_plotting.cli.pyaerocom_plot_json",
+)
+
+
+def import_times(args: list[str]) -> dict:
+    """run python -X importtime with args; returns {module: (self us, cumulative us)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for _line in result.stderr.splitlines():
+        if not _line.startswith("import time:") or "self [us]" in _line:
+            continue
+        self_us, cumulative_us, module = _line[len("import time:") :].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--top", help="number of slowest modules to print", type=int, default=10
+    )
+    args = parser.parse_args()
+
+    for _script in SCRIPTS:
+        times = import_times(["-c", f"import {_script}"])
+        print(f"import {_script}: {times[_script][1] / 1000:.1f} ms")
+        start = time.perf_counter()
+        times = import_times(["-m", _script, "-l"])
+        print(
+            f"python -m {_script} -l: {(time.perf_counter() - start) * 1000:.1f} ms wall time, {len(times)} modules imported"
+        )
+        for _module, (_self, _cumulative) in sorted(
+            times.items(), key=lambda x: x[1][0], reverse=True
+        )[: args.top]:
+            print(f"\t{_self / 1000:8.1f} ms  {_module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+benchmark of the area weighted means of several variables: per variable vs. stacked
+
+creates synthetic daily data of the speciated AOD variables on one grid (in memory) and
+computes the monthly area weighted means once variable by variable
+(PyaModelData.weighted_mean) and once for all variables together
+(PyaModelData.weighted_means).
+
+usage:
+    python benchmarks/bench_multi_var_means.py --days 365 --nlat 180 --nlon 360
+"""
+
+import argparse
+import time
+
+from synthetic_inputs import MODEL, SPECIATED_VARS as VARS, make_model_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--nlat", type=int, default=180)
+    parser.add_argument("--nlon", type=int, default=360)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="number of runs; the best is reported"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for _mode in ("per variable", "stacked"):
+        times = []
+        for _ in range(args.repeat):
+            model_data = make_model_data(VARS, args.days, args.nlat, args.nlon)
+            start = time.perf_counter()
+            if _mode == "stacked":
+                means = model_data.weighted_means(MODEL, VARS)
+            else:
+                means = {_var: model_data.weighted_mean(MODEL, _var) for _var in VARS}
+            times.append(time.perf_counter() - start)
+        results[_mode] = (
+            min(times),
+            float(sum(_mean.sum() for _time, _mean in means.values())),
+        )
+
+    print(f"{'mode':<15}{'wall time [s]':>15}{'checksum':>15}")
+    for _mode, (_time, _checksum) in results.items():
+        print(f"{_mode:<15}{_time:>15.2f}{_checksum:>15.6f}")
+    print(
+        f"speed up: {results['per variable'][0] / results['stacked'][0]:.1f}x for {len(VARS)} variables"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+benchmark of the area weighted mean reduction: eager vs. time chunked
+
+writes a synthetic daily model data set (one file per year) and runs
+PyaModelData.weighted_mean once without and once with a memory ceiling for each
+period length. Each run happens in a separate process so that the peak RSS can be
+compared. The peak RSS includes the imports (pyaerocom, iris, dask), which are
+reported separately; with the memory ceiling the RSS above the imports should not
+grow with the period length.
+
+usage:
+    python benchmarks/bench_weighted_means.py --years 1 2 4 --nlat 180 --nlon 360 --max-memory 64
+"""
+
+import argparse
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+MODEL = "BENCHMARK"
+VAR = "od550aer"
+
+
+def write_data(data_dir: str, years: int, nlat: int, nlon: int):
+    """write one daily file per year in aerocom3 file naming convention"""
+    import cf_units
+    import iris
+    import iris.coords
+    import iris.cube
+
+    rng = np.random.default_rng(0)
+    for _year in range(2019, 2019 + years):
+        ndays = 366 if _year % 4 == 0 else 365
+        time_coord = iris.coords.DimCoord(
+            np.arange(ndays, dtype=float),
+            standard_name="time",
+            units=cf_units.Unit(f"days since {_year}-01-01", calendar="standard"),
+        )
+        lat = iris.coords.DimCoord(
+            np.linspace(-89.5, 89.5, nlat), standard_name="latitude", units="degrees"
+        )
+        lon = iris.coords.DimCoord(
+            np.linspace(-179.5, 179.5, nlon), standard_name="longitude", units="degrees"
+        )
+        lat.guess_bounds()
+        lon.guess_bounds()
+        cube = iris.cube.Cube(
+            rng.random((ndays, nlat, nlon), dtype="float32"),
+            var_name=VAR,
+            units="1",
+            dim_coords_and_dims=[(time_coord, 0), (lat, 1), (lon, 2)],
+        )
+        iris.save(
+            cube,
+            os.path.join(data_dir, f"aerocom3_{MODEL}_{VAR}_Column_{_year}_daily.nc"),
+        )
+
+
+def run(data_dir: str, years: int, max_memory: int = None) -> dict:
+    """reduce the data and return wall time and peak RSS of this process"""
+    from pyaerocom_plotting.readers import PyaModelData
+
+    # ru_maxrss is in kB on linux
+    import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    model_data = PyaModelData()
+    model_data.read_weighted_means(
+        MODEL, [VAR], 2019, 2019 + years, data_dir=data_dir, max_memory=max_memory
+    )
+    _time, mean = model_data.weighted_mean(MODEL, VAR)
+    return {
+        "mode": "eager" if max_memory is None else "chunked",
+        "years": years,
+        "wall_time_s": time.perf_counter() - start,
+        "import_rss_mb": import_rss,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "mean_checksum": float(mean.sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--years", type=int, nargs="+", default=[1, 2, 4], help="period lengths"
+    )
+    parser.add_argument("--nlat", type=int, default=180)
+    parser.add_argument("--nlon", type=int, default=360)
+    parser.add_argument(
+        "--max-memory", type=int, default=64, help="memory ceiling in MB"
+    )
+    parser.add_argument("--datadir", help="use existing data instead of writing it")
+    parser.add_argument("--child", choices=["eager", "chunked"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        max_memory = None if args.child == "eager" else args.max_memory * 1024**2
+        print(json.dumps(run(args.datadir, args.years[0], max_memory=max_memory)))
+        return
+
+    with TemporaryDirectory() as tmp_dir:
+        data_dir = args.datadir
+        if data_dir is None:
+            data_dir = tmp_dir
+            write_data(data_dir, max(args.years), args.nlat, args.nlon)
+        results = []
+        for _years, _mode in itertools.product(args.years, ("eager", "chunked")):
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    _mode,
+                    "--datadir",
+                    data_dir,
+                    "--years",
+                    str(_years),
+                    "--max-memory",
+                    str(args.max_memory),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(
+        f"{'years':<7}{'mode':<10}{'wall time [s]':>15}{'peak RSS [MB]':>15}"
+        f"{'above imports':>15}{'checksum':>15}"
+    )
+    for _result in results:
+        print(
+            f"{_result['years']:<7}{_result['mode']:<10}{_result['wall_time_s']:>15.2f}"
+            f"{_result['peak_rss_mb']:>15.1f}"
+            f"{_result['peak_rss_mb'] - _result['import_rss_mb']:>15.1f}"
+            f"{_result['mean_checksum']:>15.6f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
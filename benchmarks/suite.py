@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+benchmark suite of the reader and plotting hot paths
+
+runs every benchmark case on synthetic inputs (see synthetic_inputs.py) in a separate
+process and stores wall time and peak memory of all cases in a json result file, so
+that the results of two versions can be compared:
+
+    python benchmarks/suite.py run -o before.json
+    (change the code)
+    python benchmarks/suite.py run -o after.json
+    python benchmarks/suite.py compare before.json after.json
+
+Without -o the results are written to benchmarks/results/<date>_<version>_<commit>.json.
+Each case is timed --repeat times (the best time is reported) and run once more with
+tracemalloc to get the peak of the memory allocated by the case (numpy included).
+The peak RSS of the process is recorded as well. compare exits with status 1 if a case
+got slower or needs more memory than --threshold times the old value.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from tempfile import TemporaryDirectory
+
+from synthetic_inputs import (
+    MODEL,
+    SPECIATED_VARS,
+    make_model_data,
+    write_aeroval_json,
+    write_colocated_file,
+)
+
+BENCHMARK_DIR = os.path.dirname(os.path.realpath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_PARAMS = {
+    # aeroval json file
+    "json_models": 4,
+    "json_months": 240,
+    "json_regions": 20,
+    # number of json files of the multi file cases
+    "json_files": 3,
+    # gridded model data
+    "days": 365,
+    "nlat": 90,
+    "nlon": 180,
+    # colocated data file
+    "colocated_stations": 1000,
+    "colocated_days": 3650,
+}
+
+# name: function(params, workdir) -> (setup, run, unit); setup() returns the input of run,
+# run(input) does the timed work and returns the number of units (e.g. frames) processed
+CASES = {}
+
+
+def case(name: str):
+    """register a benchmark case"""
+
+    def register(func):
+        CASES[name] = func
+        return func
+
+    return register
+
+
+def _read_json(params: dict, workdir: str):
+    from pyaerocom_plotting.readers import AerovalJsonData
+
+    filename = os.path.join(workdir, "ALL-Aeronet-od550aer-Column.json")
+    if not os.path.exists(filename):
+        write_aeroval_json(
+            filename,
+            nmodels=params["json_models"],
+            nmonths=params["json_months"],
+            nregions=params["json_regions"],
+        )
+    json_data = AerovalJsonData()
+    json_data.read(filename)
+    return json_data, filename
+
+
+@case("json_read")
+def _json_read(params: dict, workdir: str):
+    from pyaerocom_plotting.readers import AerovalJsonData
+
+    filename = _read_json(params, workdir)[1]
+
+    def run(_input):
+        AerovalJsonData().read(filename)
+        return 1
+
+    return (lambda: None), run, "file"
+
+
+@case("overall_ts")
+def _overall_ts(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+
+    json_data = _read_json(params, workdir)[0]
+    plotting = Plotting(plotdir=workdir)
+    return (
+        (lambda: json_data),
+        lambda _data: len(plotting.plot_aeroval_overall_time_series(_data)),
+        "plot",
+    )
+
+
+@case("overall_ts_SU")
+def _overall_ts_su(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+
+    json_data = _read_json(params, workdir)[0]
+    plotting = Plotting(plotdir=workdir)
+    return (
+        (lambda: json_data),
+        lambda _data: len(plotting.plot_aeroval_overall_time_series_SU_Paper(_data)),
+        "plot",
+    )
+
+
+@case("overall_ts_grid")
+def _overall_ts_grid(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+    from pyaerocom_plotting.readers import AerovalJsonData
+
+    files = [
+        write_aeroval_json(
+            os.path.join(workdir, f"ALL-Aeronet-od550aer-Column{_idx}.json"),
+            nmodels=params["json_models"],
+            nmonths=params["json_months"],
+            nregions=params["json_regions"],
+            seed=_idx,
+        )
+        for _idx in range(params["json_files"])
+    ]
+    plotting = Plotting(plotdir=workdir)
+
+    def run(_input):
+        # the files are parsed concurrently and plotted as files x 4 regions
+        json_data = AerovalJsonData()
+        json_data.read_many(files)
+        return len(
+            plotting.plot_aeroval_overall_time_series_grid(
+                json_data, regions=json_data.regions[:4]
+            )
+        )
+
+    return (lambda: None), run, "plot"
+
+
+@case("overall_ts_regions")
+def _overall_ts_regions(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+
+    json_data = _read_json(params, workdir)[0]
+    plotting = Plotting(plotdir=workdir)
+    # all regions of the file in one figure, cut into one file per region
+    return (
+        (lambda: json_data),
+        lambda _data: len(
+            plotting.plot_aeroval_overall_time_series_regions(_data, split=True)
+        ),
+        "file",
+    )
+
+
+@case("overall_ts_stats")
+def _overall_ts_stats(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+
+    json_data = _read_json(params, workdir)[0]
+    plotting = Plotting(plotdir=workdir)
+    # the default statistics of the first region, one file per statistic
+    return (
+        (lambda: json_data),
+        lambda _data: len(
+            plotting.plot_aeroval_overall_time_series_stats(
+                _data, regions=_data.regions[:1], split=True
+            )
+        ),
+        "file",
+    )
+
+
+def _model_data_copy(model_data):
+    """new PyaModelData object sharing the data of model_data, without memoized results"""
+    from pyaerocom_plotting.readers import PyaModelData
+
+    copy = PyaModelData()
+    for _model, _vars in model_data.data.items():
+        for _var, _data in _vars.items():
+            copy.add_model_data(_model, _var, _data)
+    return copy
+
+
+@case("weighted_means")
+def _weighted_means(params: dict, workdir: str):
+    model_data = make_model_data(
+        SPECIATED_VARS, params["days"], params["nlat"], params["nlon"]
+    )
+
+    def run(_model_data):
+        return len(_model_data.weighted_means(MODEL))
+
+    return (lambda: _model_data_copy(model_data)), run, "variable"
+
+
+@case("plot_weighted_means")
+def _plot_weighted_means(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+
+    model_data = make_model_data(
+        SPECIATED_VARS, params["days"], params["nlat"], params["nlon"]
+    )
+    # only the plot is timed
+    model_data.weighted_means(MODEL)
+    plotting = Plotting(plotdir=workdir)
+    return (
+        (lambda: model_data),
+        lambda _data: len(plotting.plot_weighted_means(_data)),
+        "plot",
+    )
+
+
+def _pixelmap_case(params: dict, workdir: str, output=None, **kwargs):
+    from pyaerocom_plotting.plotting import Plotting
+
+    model_data = make_model_data(
+        ("od550aer",), params["days"], params["nlat"], params["nlon"]
+    )
+    # only the frames are timed
+    nframes = model_data.resampled(MODEL, "od550aer", "monthly")["time"].points.size
+    plotting = Plotting(plotdir=workdir, output=output)
+
+    def run(_data):
+        plotting.plot_pixel_map(_data, **kwargs)
+        return nframes
+
+    return (lambda: model_data), run, "frame"
+
+
+@case("pixelmap")
+def _pixelmap(params: dict, workdir: str):
+    return _pixelmap_case(params, workdir)
+
+
+@case("pixelmap_fast_encode")
+def _pixelmap_fast_encode(params: dict, workdir: str):
+    from pyaerocom_plotting.output import OutputSettings
+
+    # lowest png compression, encoded on a background thread
+    return _pixelmap_case(
+        params, workdir, OutputSettings(compression=1, background=True)
+    )
+
+
+@case("pixelmap_animation")
+def _pixelmap_animation(params: dict, workdir: str):
+    # a gif animation and map tiles of the frames instead of the plot files
+    return _pixelmap_case(params, workdir, animation=["gif"], tiles=2, frames=False)
+
+
+@case("colocated_select")
+def _colocated_select(params: dict, workdir: str):
+    from pyaerocom_plotting.readers import PyaColocatedData
+
+    write_colocated_file(
+        workdir, nstations=params["colocated_stations"], ndays=params["colocated_days"]
+    )
+    stations = [f"STATION{_idx}" for _idx in range(0, 100, 10)]
+
+    def run(_input):
+        # one year of 10 stations of a newly opened directory
+        colocated_data = PyaColocatedData()
+        colocated_data.open_dir(workdir, var="od550aer")
+        colocated_data.select(stations=stations, start="2015-01-01", stop="2015-12-31")
+        return 1
+
+    return (lambda: None), run, "selection"
+
+
+@case("colocated_scatter")
+def _colocated_scatter(params: dict, workdir: str):
+    from pyaerocom_plotting.plotting import Plotting
+    from pyaerocom_plotting.readers import PyaColocatedData
+
+    datadir = os.path.join(workdir, "coldata")
+    os.makedirs(datadir)
+    write_colocated_file(
+        datadir, nstations=params["colocated_stations"], ndays=params["colocated_days"]
+    )
+    plotting = Plotting(plotdir=workdir)
+
+    def run(_input):
+        # all pairs of a newly opened directory: read, binned and plotted
+        colocated_data = PyaColocatedData()
+        colocated_data.open_dir(datadir)
+        return len(plotting.plot_colocated_scatter(colocated_data))
+
+    return (lambda: None), run, "plot"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(name: str, params: dict, repeat: int) -> dict:
+    """run the benchmark case name in this process; returns its result"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    with TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        setup, run, unit = CASES[name](params, workdir)
+        setup_rss = _peak_rss_mb()
+        times = []
+        for _ in range(repeat):
+            _input = setup()
+            start = time.perf_counter()
+            units = run(_input)
+            times.append(time.perf_counter() - start)
+
+        _input = setup()
+        tracemalloc.start()
+        run(_input)
+        peak_alloc = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "time_s": min(times),
+        "median_s": statistics.median(times),
+        "units": units,
+        "unit": unit,
+        "time_per_unit_s": min(times) / max(1, units),
+        "peak_alloc_mb": peak_alloc / 1024**2,
+        "setup_rss_mb": setup_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARK_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_suite(cases: list[str], params: dict, repeat: int) -> dict:
+    """run cases, each in its own process; returns the results with their metadata"""
+    from pyaerocom_plotting.manifest import package_version
+
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "version": package_version(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "repeat": repeat,
+        "cases": {},
+    }
+    for _case in cases:
+        print(f"running {_case}...", flush=True)
+        process = subprocess.run(
+            [
+                sys.executable,
+                os.path.realpath(__file__),
+                "_case",
+                _case,
+                "--params",
+                json.dumps(params),
+                "--repeat",
+                str(repeat),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            print(f"case {_case} failed:\n{process.stderr}")
+            continue
+        results["cases"][_case] = json.loads(process.stdout.splitlines()[-1])
+    return results
+
+
+def print_results(results: dict):
+    print(
+        f"{'case':<22}{'time [s]':>10}{'per unit [s]':>14} {'unit':<10}"
+        f"{'peak alloc [MB]':>16}{'peak rss [MB]':>15}"
+    )
+    for _case, _result in results["cases"].items():
+        print(
+            f"{_case:<22}{_result['time_s']:>10.3f}"
+            f"{_result['time_per_unit_s']:>14.4f} {_result['unit']:<10}"
+            f"{_result['peak_alloc_mb']:>16.1f}{_result['peak_rss_mb']:>15.1f}"
+        )
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """print the ratios new / old of time per unit and peak allocation of all cases
+
+    returns the cases that got worse by more than threshold
+    """
+    print(
+        f"{old.get('version')} ({old.get('commit')}, {old.get('date')}) -> "
+        f"{new.get('version')} ({new.get('commit')}, {new.get('date')})"
+    )
+    if old.get("params") != new.get("params"):
+        print("WARNING: the results were created with different parameters")
+    print(f"{'case':<22}{'time old':>10}{'time new':>10}{'ratio':>8}{'mem ratio':>11}")
+    regressions = []
+    for _case in new["cases"]:
+        if _case not in old["cases"]:
+            continue
+        _old, _new = old["cases"][_case], new["cases"][_case]
+        time_ratio = _new["time_per_unit_s"] / _old["time_per_unit_s"]
+        mem_ratio = _new["peak_alloc_mb"] / max(_old["peak_alloc_mb"], 1e-6)
+        flag = ""
+        if time_ratio > threshold or mem_ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(_case)
+        elif time_ratio < 1 / threshold:
+            flag = "  faster"
+        print(
+            f"{_case:<22}{_old['time_per_unit_s']:>10.4f}{_new['time_per_unit_s']:>10.4f}"
+            f"{time_ratio:>8.2f}{mem_ratio:>11.2f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark cases")
+    run_parser.add_argument(
+        "-c",
+        "--cases",
+        nargs="+",
+        choices=list(CASES),
+        default=list(CASES),
+        help="cases to run; defaults to all",
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=3, help="number of timed runs; the best is kept"
+    )
+    run_parser.add_argument("-o", "--output", help="result file")
+    for _param, _default in DEFAULT_PARAMS.items():
+        run_parser.add_argument(
+            f"--{_param.replace('_', '-')}", type=int, default=_default
+        )
+
+    case_parser = subparsers.add_parser("_case", help=argparse.SUPPRESS)
+    case_parser.add_argument("case", choices=list(CASES))
+    case_parser.add_argument("--params", type=json.loads, default=DEFAULT_PARAMS)
+    case_parser.add_argument("--repeat", type=int, default=3)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare two result files (old new)"
+    )
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="ratio new / old above which a case counts as regression; defaults to 1.1",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "_case":
+        print(json.dumps(run_case(args.case, args.params, args.repeat)))
+    elif args.command == "run":
+        params = {_param: getattr(args, _param) for _param in DEFAULT_PARAMS}
+        results = run_suite(args.cases, params, args.repeat)
+        print_results(results)
+        output = args.output
+        if output is None:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            date = datetime.now().strftime("%Y%m%dT%H%M%S")
+            output = os.path.join(
+                RESULTS_DIR, f"{date}_{results['version']}_{results['commit']}.json"
+            )
+        with open(output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"results written to {output}")
+    else:
+        with open(args.old) as fh:
+            old = json.load(fh)
+        with open(args.new) as fh:
+            new = json.load(fh)
+        if len(compare(old, new, args.threshold)) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+generators of synthetic input data for the benchmarks
+
+- aeroval json files of configurable size (models, months, regions)
+- PyaModelData objects with daily random data of configurable size held in memory
+- colocated data files (netcdf) of configurable number of stations and days
+"""
+
+import numpy as np
+
+# model names of the SU paper plot; further models are named MODEL<n>
+JSON_MODELS = ("ATSR2", "AATSR", "SLSTR.SU.A", "SLSTR.SU.B")
+JSON_STATS = (
+    "totnum",
+    "num_valid",
+    "refdata_mean",
+    "refdata_std",
+    "data_mean",
+    "data_std",
+    "weighted",
+    "rms",
+    "nmb",
+    "mnmb",
+    "fge",
+    "R",
+    "R_spearman",
+    "num_coords_tot",
+    "num_coords_with_data",
+)
+MODEL = "BENCHMARK"
+SPECIATED_VARS = (
+    "od550so4",
+    "od550oa",
+    "od550bc",
+    "od550ss",
+    "od550dust",
+    "od550no3",
+    "od550nh4",
+    "od550soa",
+)
+
+
+def make_aeroval_json(
+    nmodels: int = 4, nmonths: int = 120, nregions: int = 1, seed: int = 0
+) -> dict:
+    """return the content of an aeroval overall time series json file
+
+    [var][obsnetwork][code][model][modelvar][region][time stamp] = {stat: value};
+    the first region is ALL, the time stamps are the middle of the months since 2000
+    in ms since 1970. About 10% of the months have no valid data (stats are None).
+    """
+    rng = np.random.default_rng(seed)
+    models = list(JSON_MODELS[:nmodels]) + [
+        f"MODEL{_idx}" for _idx in range(len(JSON_MODELS), nmodels)
+    ]
+    regions = ["ALL"] + [f"REGION{_idx}" for _idx in range(1, nregions)]
+    months = np.arange("2000-01", nmonths, dtype="datetime64[M]")
+    stamps = [
+        str(_stamp)
+        for _stamp in (months.astype("datetime64[D]") + 14)
+        .astype("datetime64[ms]")
+        .astype("int64")
+    ]
+
+    model_data = {}
+    for _model in models:
+        region_data = {}
+        for _region in regions:
+            series = {}
+            values = rng.random((len(stamps), len(JSON_STATS)))
+            valid = rng.random(len(stamps)) > 0.1
+            for _stamp, _values, _valid in zip(stamps, values, valid):
+                if _valid:
+                    series[_stamp] = dict(zip(JSON_STATS, _values.tolist()))
+                else:
+                    series[_stamp] = {_stat: None for _stat in JSON_STATS}
+                    series[_stamp]["totnum"] = 100.0
+            region_data[_region] = series
+        model_data[_model] = {"od550aer": region_data}
+    return {"od550aer": {"Aeronet": {"Column": model_data}}}
+
+
+def write_aeroval_json(filename: str, **kwargs) -> str:
+    """write an aeroval json file made by make_aeroval_json(**kwargs); returns filename"""
+    import json
+
+    with open(filename, "w") as fh:
+        json.dump(make_aeroval_json(**kwargs), fh)
+    return filename
+
+
+def make_model_data(
+    vars: tuple = ("od550aer",),
+    days: int = 365,
+    nlat: int = 180,
+    nlon: int = 360,
+    model: str = MODEL,
+    seed: int = 0,
+):
+    """return a PyaModelData object with daily random data of vars starting 2019-01-01"""
+    import cf_units
+    import iris.coords
+    import iris.cube
+    from pyaerocom.griddeddata import GriddedData
+
+    from pyaerocom_plotting.readers import PyaModelData
+
+    rng = np.random.default_rng(seed)
+    model_data = PyaModelData()
+    for _var in vars:
+        time_coord = iris.coords.DimCoord(
+            np.arange(days, dtype=float),
+            standard_name="time",
+            units=cf_units.Unit("days since 2019-01-01", calendar="standard"),
+        )
+        lat = iris.coords.DimCoord(
+            np.linspace(-89.5, 89.5, nlat), standard_name="latitude", units="degrees"
+        )
+        lon = iris.coords.DimCoord(
+            np.linspace(-179.5, 179.5, nlon), standard_name="longitude", units="degrees"
+        )
+        lat.guess_bounds()
+        lon.guess_bounds()
+        cube = iris.cube.Cube(
+            rng.random((days, nlat, nlon), dtype="float32"),
+            var_name=_var,
+            units="1",
+            dim_coords_and_dims=[(time_coord, 0), (lat, 1), (lon, 2)],
+        )
+        model_data.add_model_data(
+            model,
+            _var,
+            GriddedData(
+                cube,
+                var_name=_var,
+                data_id=model,
+                ts_type="daily",
+                check_unit=False,
+                convert_unit_on_init=False,
+            ),
+        )
+    return model_data
+
+
+def write_colocated_file(
+    data_dir: str, nstations: int = 1000, ndays: int = 3650, seed: int = 0
+) -> str:
+    """write a daily colocated data file of od550aer in pyaerocom's format and file
+    naming convention to data_dir; returns the file name"""
+    import pandas as pd
+    import xarray as xr
+    from pyaerocom import ColocatedData
+
+    rng = np.random.default_rng(seed)
+    ref = rng.random((ndays, nstations))
+    model, obs = MODEL, "AeronetSunV3Lev2.daily"
+    array = xr.DataArray(
+        np.stack([ref, ref * 0.8 + 0.1 * rng.random(ref.shape)]),
+        dims=("data_source", "time", "station_name"),
+        coords={
+            "data_source": [obs, model],
+            "time": pd.date_range("2010-01-01", periods=ndays, freq="D"),
+            "station_name": [f"STATION{_idx}" for _idx in range(nstations)],
+            "latitude": ("station_name", rng.uniform(-60.0, 60.0, nstations)),
+            "longitude": ("station_name", rng.uniform(-180.0, 180.0, nstations)),
+            "altitude": ("station_name", np.zeros(nstations)),
+        },
+        name="od550aer",
+        attrs={
+            "data_source": [obs, model],
+            "var_name": ["od550aer", "od550aer"],
+            "var_units": ["1", "1"],
+            "ts_type": "daily",
+            "filter_name": "ALL-wMOUNTAINS",
+            "ts_type_src": ["daily", "daily"],
+            "model_name": model,
+            "obs_name": obs,
+        },
+    )
+    return ColocatedData(data=array).to_netcdf(data_dir)
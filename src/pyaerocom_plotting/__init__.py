@@ -1 +1,27 @@
-from . import const, plotting
+from . import const
+
+# the other modules import heavy dependencies (pyaerocom, iris, matplotlib) or are
+# not needed by every script; they are only imported when used. All modules of the
+# package are listed here (see tests/test_import_time.py).
+_LAZY_MODULES = (
+    "aeroval_json",
+    "animation",
+    "cache",
+    "manifest",
+    "output",
+    "plotting",
+    "profiling",
+    "readers",
+    "registry",
+    "scatter",
+    "server",
+    "tiles",
+)
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        import importlib
+
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
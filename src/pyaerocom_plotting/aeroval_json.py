@@ -0,0 +1,142 @@
+"""
+parsing of aeroval's json files (e.g. the hm/ts files)
+
+The files are nested dicts with the levels JSON_LEVELS; the leaves are the time series
+dicts. read_json_file parses a whole file or only a selection of it.
+
+OBS: this module is run in the reader worker processes and must not import heavy
+dependencies (pyaerocom, iris, matplotlib); see AerovalJsonData.read_many.
+"""
+from pathlib import Path
+
+import simplejson as json
+
+from pyaerocom_plotting.profiling import stage
+
+# levels of the nested dicts in aeroval's json files (e.g. hm/ts files)
+JSON_LEVELS = ("var", "obsnetwork", "code", "model", "modelvar", "region")
+
+
+def _is_selected(select: dict, level: int, key: str) -> bool:
+    """check if key at level (index into JSON_LEVELS) is part of the selection"""
+    try:
+        wanted = select[JSON_LEVELS[level]]
+    except KeyError:
+        return True
+    if isinstance(wanted, str):
+        return key == wanted
+    return key in wanted
+
+
+def _select_json(data: dict, select: dict, level: int = 0) -> dict:
+    """return the part of the already parsed data that is selected by select"""
+    result = {}
+    for _key, _value in data.items():
+        if not _is_selected(select, level, _key):
+            continue
+        if level == len(JSON_LEVELS) - 1:
+            result[_key] = _value
+        elif isinstance(_value, dict):
+            _value = _select_json(_value, select, level=level + 1)
+            if _value:
+                result[_key] = _value
+    return result
+
+
+def iter_json_leaves(data: dict, path: tuple = ()):
+    """yield (path, leaf) for all leaves of the nested aeroval dict data"""
+    if len(path) == len(JSON_LEVELS):
+        yield path, data
+        return
+    if not isinstance(data, dict):
+        return
+    for _key, _value in data.items():
+        yield from iter_json_leaves(_value, path + (_key,))
+
+
+def _skip_json_value(events, event: str):
+    """consume the events of a value that starts with event"""
+    if event not in ("start_map", "start_array"):
+        return
+    depth = 1
+    for _event, _ in events:
+        if _event in ("start_map", "start_array"):
+            depth += 1
+        elif _event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _build_json_value(events, event: str, value):
+    """build the value that starts with event from the following events"""
+    import ijson
+
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    if event not in ("start_map", "start_array"):
+        return builder.value
+    depth = 1
+    for _event, _value in events:
+        builder.event(_event, _value)
+        if _event in ("start_map", "start_array"):
+            depth += 1
+        elif _event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                break
+    return builder.value
+
+
+def _read_json_map_selection(events, select: dict, level: int) -> dict:
+    """incrementally read the selected part of a map whose start_map was consumed"""
+    result = {}
+    for _event, _key in events:
+        if _event == "end_map":
+            break
+        # _event is "map_key"
+        event, value = next(events)
+        if not _is_selected(select, level, _key):
+            _skip_json_value(events, event)
+        elif level == len(JSON_LEVELS) - 1:
+            result[_key] = _build_json_value(events, event, value)
+        elif event == "start_map":
+            selection = _read_json_map_selection(events, select, level + 1)
+            # only keep branches that contain selected leaves
+            if selection:
+                result[_key] = selection
+        else:
+            _skip_json_value(events, event)
+    return result
+
+
+def _read_json_selection(fh, select: dict) -> dict:
+    """read the part of the aeroval json file in fh that is selected by select
+
+    parses the file incrementally using ijson if available; falls back to parsing
+    the whole file otherwise
+    """
+    try:
+        import ijson
+    except ImportError:
+        return _select_json(json.load(fh), select)
+
+    try:
+        events = ijson.basic_parse(fh, use_float=True)
+        event, _ = next(events)
+        if event != "start_map":
+            return {}
+        return _read_json_map_selection(events, select, 0)
+    except ijson.JSONError:
+        # e.g. NaN values, which are not valid JSON, but accepted by simplejson
+        fh.seek(0)
+        return _select_json(json.load(fh), select)
+
+
+def read_json_file(file: [str, Path], select: dict = None) -> dict:
+    """parse the aeroval json file; only the part selected by select (see
+    AerovalJsonData.read) if given"""
+    with open(file, "rb") as fh, stage("read_json", file=str(file)):
+        if select is None:
+            return json.load(fh)
+        return _read_json_selection(fh, select)
@@ -0,0 +1,167 @@
+"""
+animations of the pixelmap frames
+
+AnimationWriter takes the frames as they are rendered for the plot files (rgba arrays, see
+ImageWriter.draw) and streams them into an animation file. An animation of N months costs
+one render pass plus the encoding; the plot files are neither needed nor read again.
+- mp4: the frames are piped to ffmpeg (must be installed) and not kept in memory
+- gif: the frames are kept quantized to the 256 colours of the first frame and encoded
+  with Pillow at the end
+- apng: the frames are kept as rgba and encoded with Pillow at the end
+
+OBS: this module is imported by the command line scripts for argument parsing and must
+not import heavy dependencies at module level.
+"""
+import shutil
+import subprocess
+
+from pyaerocom_plotting.const import ANIMATION_FORMATS, DEFAULT_ANIMATION_FPS
+from pyaerocom_plotting.profiling import stage
+
+ANIMATION_EXTENSIONS = {"mp4": "mp4", "gif": "gif", "apng": "apng"}
+
+
+def check_animation(formats: list[str], fps: float = DEFAULT_ANIMATION_FPS):
+    """raise ValueError if animations in formats can not be written"""
+    for _format in formats:
+        if _format not in ANIMATION_FORMATS:
+            raise ValueError(
+                f"animation format {_format} not supported; use {ANIMATION_FORMATS}"
+            )
+    if fps <= 0:
+        raise ValueError("the frame rate of the animations must be positive")
+    if "mp4" in formats and shutil.which("ffmpeg") is None:
+        raise ValueError("mp4 animations need ffmpeg; install it or use gif or apng")
+
+
+class AnimationWriter:
+    """writes the frames (rgba arrays of the same size) given to add to an animation file
+
+    call close (or use the writer as context manager) to finish the file
+    """
+
+    def __init__(
+        self, filename: str, format: str = "gif", fps: float = DEFAULT_ANIMATION_FPS
+    ):
+        check_animation([format], fps)
+        self._filename = filename
+        self._format = format
+        self._fps = fps
+        # (width, height) of the first frame
+        self._size = None
+        # frames kept for gif and apng
+        self._frames = []
+        # ffmpeg process for mp4
+        self._process = None
+
+    @property
+    def filename(self) -> str:
+        return self._filename
+
+    @property
+    def format(self) -> str:
+        return self._format
+
+    @property
+    def fps(self) -> float:
+        return self._fps
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, rgba):
+        """add a frame (rgba array of shape (height, width, 4))"""
+        height, width = rgba.shape[:2]
+        if self._size is None:
+            self._size = (width, height)
+        elif self._size != (width, height):
+            raise ValueError(
+                f"all frames of {self._filename} must have the size {self._size}"
+            )
+        with stage("animation_frame", file=self._filename):
+            if self._format == "mp4":
+                if self._process is None:
+                    self._process = self._start_ffmpeg()
+                self._process.stdin.write(rgba.tobytes())
+                return
+            from PIL import Image
+
+            image = Image.fromarray(rgba, "RGBA")
+            if self._format == "gif":
+                # gif has a palette of 256 colours and no alpha channel. The palette of
+                # the first frame is used for all frames: mapping to a given palette
+                # without dithering is much faster than quantizing every frame, and the
+                # colours do not flicker between the frames
+                image = image.convert("RGB")
+                if len(self._frames) == 0:
+                    image = image.quantize(
+                        256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE
+                    )
+                else:
+                    image = image.quantize(
+                        palette=self._frames[0], dither=Image.Dither.NONE
+                    )
+            self._frames.append(image)
+
+    def _start_ffmpeg(self) -> subprocess.Popen:
+        width, height = self._size
+        return subprocess.Popen(
+            [
+                shutil.which("ffmpeg"),
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "rgba",
+                "-s",
+                f"{width}x{height}",
+                "-r",
+                str(self._fps),
+                "-i",
+                "-",
+                # h264 with yuv420p needs an even width and height
+                "-vf",
+                "pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white",
+                "-c:v",
+                "libx264",
+                "-pix_fmt",
+                "yuv420p",
+                self._filename,
+            ],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def close(self):
+        """finish the animation file; nothing is written if no frame was added"""
+        with stage("animation_encode", file=self._filename):
+            if self._process is not None:
+                process, self._process = self._process, None
+                process.stdin.close()
+                stderr = process.stderr.read().decode("utf-8", errors="replace")
+                if process.wait() != 0:
+                    raise RuntimeError(
+                        f"ffmpeg failed to write {self._filename}: {stderr}"
+                    )
+                return
+            if len(self._frames) == 0:
+                return
+            frames, self._frames = self._frames, []
+            options = {}
+            if self._format == "gif":
+                # the frames share a palette; Pillow's palette optimization only costs time
+                options["optimize"] = False
+            frames[0].save(
+                self._filename,
+                "GIF" if self._format == "gif" else "PNG",
+                save_all=True,
+                append_images=frames[1:],
+                duration=round(1000 / self._fps),
+                loop=0,
+                **options,
+            )
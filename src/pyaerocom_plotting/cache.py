@@ -0,0 +1,132 @@
+"""
+on-disk cache for reduced data of pyaerocom plotting
+
+The cache is content addressed: the key is a hash of everything the reduced data
+depends on (model, variable, ts_types, years and name, mtime and size of the source files).
+A changed source file therefore results in a new key; outdated entries are removed
+by the size based eviction.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from pyaerocom_plotting.const import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_SIZE
+from pyaerocom_plotting.manifest import file_info
+
+
+class WeightedMeanCache:
+    """cache for area weighted mean time series stored as small npz files"""
+
+    __version__ = "0.0.1"
+    FILE_SUFFIX = ".npz"
+
+    def __init__(
+        self,
+        cache_dir: [str, Path] = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ):
+        self._cache_dir = Path(cache_dir)
+        self._max_size = max_size
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def key(
+        self,
+        model: str,
+        var: str,
+        ts_type: str,
+        mean_ts_type: str,
+        startyear: int,
+        endyear: int,
+        files: list[str],
+    ) -> str:
+        """return the cache key for the given inputs"""
+        key_data = {
+            "version": self.__version__,
+            "model": model,
+            "var": var,
+            "ts_type": ts_type,
+            "mean_ts_type": mean_ts_type,
+            "startyear": startyear,
+            "endyear": endyear,
+            "files": file_info(files),
+        }
+        return hashlib.sha256(
+            json.dumps(key_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._cache_dir / f"{key}{self.FILE_SUFFIX}"
+
+    def get(self, key: str):
+        """return the cached (time, mean) tuple for key or None if not cached"""
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                time = npz["time"]
+                mean = np.ma.masked_invalid(npz["mean"])
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        # mark the entry as recently used for the eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return time, mean
+
+    def put(self, key: str, time: np.ndarray, mean: np.ndarray):
+        """store the (time, mean) tuple under key"""
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as fh:
+            np.savez(
+                fh,
+                time=np.asarray(time),
+                mean=np.ma.filled(np.ma.asarray(mean, dtype=float), np.nan),
+            )
+        # atomic replace so that concurrent runs never see a half written file
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """remove the least recently used entries until the cache fits into max_size"""
+        entries = []
+        total_size = 0
+        try:
+            dir_entries = list(os.scandir(self._cache_dir))
+        except FileNotFoundError:
+            return
+        for _entry in dir_entries:
+            if not _entry.name.endswith(self.FILE_SUFFIX) or not _entry.is_file():
+                continue
+            stat = _entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, _entry.path))
+            total_size += stat.st_size
+
+        for _mtime, _size, _path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            try:
+                os.remove(_path)
+            except FileNotFoundError:
+                pass
+            total_size -= _size
+
+    def clear(self):
+        """remove all cache entries"""
+        max_size = self._max_size
+        self._max_size = -1
+        try:
+            self.evict()
+        finally:
+            self._max_size = max_size
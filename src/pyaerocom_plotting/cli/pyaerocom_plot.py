@@ -8,13 +8,44 @@ import subprocess
 import sys
 from pathlib import Path
 from tempfile import mkdtemp
+from typing import TYPE_CHECKING
 
-from pyaerocom_plotting.const import DEFAULT_OUTPUT_DIR, DEFAULT_TS_TYPE, PLOT_NAMES
-from pyaerocom_plotting.plotting import Plotting
-from pyaerocom_plotting.readers import PyaModelData
+# OBS: only light weight imports here; argument parsing and listing of the plot types
+# must not import pyaerocom, iris or matplotlib. Readers and plotting are imported when used.
+from pyaerocom_plotting.animation import check_animation
+from pyaerocom_plotting.const import (
+    ANIMATION_FORMATS,
+    DEFAULT_ANIMATION_FPS,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MAX_SIZE,
+    DEFAULT_DPI,
+    DEFAULT_MAX_OPEN_FILES,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_READ_WORKERS,
+    DEFAULT_REGIONS,
+    DEFAULT_SCATTER_BINS,
+    DEFAULT_SCATTER_KIND,
+    DEFAULT_TS_TYPE,
+    OUTPUT_FORMATS,
+    SCATTER_KINDS,
+)
+from pyaerocom_plotting.output import OutputSettings
+from pyaerocom_plotting.profiling import profiled, stage
+from pyaerocom_plotting.registry import Planner, plot_names
+
+if TYPE_CHECKING:
+    from pyaerocom_plotting.manifest import BuildManifest
+    from pyaerocom_plotting.readers import PyaColocatedData, PyaModelData
 
 
 def main():
+    # sub commands for the plot server
+    if len(sys.argv) > 1 and sys.argv[1] in ("serve", "client"):
+        from pyaerocom_plotting.cli import pyaerocom_plot_serve
+
+        sys.exit(getattr(pyaerocom_plot_serve, sys.argv[1])(sys.argv[2:]))
+
     # define some terminal colors to be used in the help
     colors = {
         "BOLD": "\033[1m",
@@ -36,6 +67,10 @@ def main():
 \t{colors['UNDERLINE']}- basic usage:{colors['END']}
 \t  The following line plots the pixelmap for the model {colors['BOLD']}ECMWF_CAMS_REAN{colors['END']} for the year {colors['BOLD']}2019{colors['END']} for the variable {colors['BOLD']}od550aer{colors['END']}
 \t  pyaerocom_plot -p pixelmap -m ECMWF_CAMS_REAN -s 2019 -v od550aer
+\t{colors['UNDERLINE']}- plot server:{colors['END']}
+\t  The following lines start a plot server and request a plot from it (see pyaerocom_plot serve -h and pyaerocom_plot client -h)
+\t  pyaerocom_plot serve -o /tmp &
+\t  pyaerocom_plot client -p pixelmap -m ECMWF_CAMS_REAN -s 2019 -v od550aer
 
 """,
     )
@@ -53,6 +88,11 @@ def main():
         "-e", "--endyear", help="endyear to read; defaults to startyear.", nargs="?"
     )
     parser.add_argument("-v", "--variables", help="variable(s) to read", nargs="+")
+    parser.add_argument(
+        "--colocated",
+        help="pyaerocom colocated data files or directories containing them; used by the plot types of colocated data (e.g. scatter_density)",
+        nargs="+",
+    )
     parser.add_argument(
         "--tstype",
         help=f"tstype to read; defaults to {colors['BOLD']}{DEFAULT_TS_TYPE}{colors['END']}",
@@ -64,6 +104,151 @@ def main():
         help=f"output directory for the plot files; defaults to {DEFAULT_OUTPUT_DIR}",
         default=".",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="number of worker processes used to render the plots; defaults to 1",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--read-workers",
+        help=f"number of threads used to read the model data; defaults to {DEFAULT_READ_WORKERS}",
+        type=int,
+        default=DEFAULT_READ_WORKERS,
+    )
+    parser.add_argument(
+        "--max-open-files",
+        help=f"maximum number of model files read at the same time; defaults to {DEFAULT_MAX_OPEN_FILES}",
+        type=int,
+        default=DEFAULT_MAX_OPEN_FILES,
+    )
+    parser.add_argument(
+        "--template",
+        help="pixelmap: build the figure once per model and variable and reuse it for all time steps; uses a fixed colour scale",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--animation",
+        help="pixelmap: also write an animation of all frames of each model and variable in these formats; mp4 needs ffmpeg",
+        choices=ANIMATION_FORMATS,
+        nargs="+",
+    )
+    parser.add_argument(
+        "--fps",
+        help=f"pixelmap: frames per second of the animations; defaults to {DEFAULT_ANIMATION_FPS}",
+        type=float,
+        default=DEFAULT_ANIMATION_FPS,
+    )
+    parser.add_argument(
+        "--tiles",
+        help="pixelmap: also write XYZ map tiles of every frame up to this zoom level to <outdir>/tiles",
+        type=int,
+    )
+    parser.add_argument(
+        "--no-frames",
+        help="pixelmap: do not write the plot files of the frames; use with --animation or --tiles",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--scatter-kind",
+        help=f"scatter_density: 2D histogram or hexagonal bins; defaults to {DEFAULT_SCATTER_KIND}",
+        choices=SCATTER_KINDS,
+        default=DEFAULT_SCATTER_KIND,
+    )
+    parser.add_argument(
+        "--scatter-bins",
+        help=f"scatter_density: number of bins per axis; defaults to {DEFAULT_SCATTER_BINS}",
+        type=int,
+        default=DEFAULT_SCATTER_BINS,
+    )
+    parser.add_argument(
+        "--scatter-log",
+        help="scatter_density: logarithmic axes and bins",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--scatter-range",
+        help="scatter_density: range of the axes; defaults to the range of the data",
+        type=float,
+        nargs=2,
+        metavar=("MIN", "MAX"),
+    )
+    parser.add_argument(
+        "--cachedir",
+        help=f"directory for cached weighted means; defaults to {DEFAULT_CACHE_DIR}",
+        default=DEFAULT_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--cachesize",
+        help=f"maximum size of the cache in MB; defaults to {DEFAULT_CACHE_MAX_SIZE // 1024**2}",
+        type=int,
+        default=DEFAULT_CACHE_MAX_SIZE // 1024**2,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="do not use the cache for weighted means",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--max-memory",
+        help="weighted means: reduce the data in time chunks of at most this size in MB instead of all at once",
+        type=int,
+    )
+    parser.add_argument(
+        "--regions",
+        help=f"regional weighted means: regions to plot; defaults to {' '.join(DEFAULT_REGIONS)}",
+        nargs="+",
+        default=DEFAULT_REGIONS,
+    )
+    parser.add_argument(
+        "--force",
+        help="render all plots, including those whose inputs did not change since the last run",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--dpi",
+        help=f"resolution of the plot files; defaults to {DEFAULT_DPI}",
+        type=int,
+        default=DEFAULT_DPI,
+    )
+    parser.add_argument(
+        "--format",
+        help=f"format of the plot files; defaults to {DEFAULT_OUTPUT_FORMAT}",
+        choices=OUTPUT_FORMATS,
+        default=DEFAULT_OUTPUT_FORMAT,
+    )
+    parser.add_argument(
+        "--compression",
+        help="png: zlib compression level from 0 (fastest) to 9 (smallest file); webp and jpeg: quality from 1 to 100; defaults to 6 for png, 80 for webp and 90 for jpeg",
+        type=int,
+    )
+    parser.add_argument(
+        "--thumbnails",
+        help="also write thumbnails of these widths in pixels, scaled down from the same render; named <plot file>_thumb<width>",
+        type=int,
+        nargs="+",
+    )
+    parser.add_argument(
+        "--background-encode",
+        help="encode the images on a background thread while the next frame is rendered",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="print the time and memory used by the stages of the run (reading, resampling, plotting, saving, ...)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="write the profile to this file; implies --profile",
+    )
+    parser.add_argument(
+        "--profile-format",
+        help="format of the profile file: json (summary and all stages) or chrome (trace event format for chrome://tracing or ui.perfetto.dev); defaults to json",
+        choices=["json", "chrome"],
+        default="json",
+    )
 
     args = parser.parse_args()
     options = {}
@@ -76,9 +261,38 @@ def main():
     if args.plottype:
         options["plottype"] = args.plottype
 
+    options["workers"] = args.workers
+    options["readworkers"] = args.read_workers
+    options["maxopenfiles"] = args.max_open_files
+    options["template"] = args.template
+    options["animation"] = args.animation or []
+    options["fps"] = args.fps
+    options["tiles"] = args.tiles
+    options["frames"] = not args.no_frames
+    options["scatterkind"] = args.scatter_kind
+    options["scatterbins"] = args.scatter_bins
+    options["scatterlog"] = args.scatter_log
+    options["scatterrange"] = args.scatter_range
+    options["cachedir"] = args.cachedir
+    options["cachesize"] = args.cachesize * 1024**2
+    options["nocache"] = args.no_cache
+    options["force"] = args.force
+    options["regions"] = args.regions
+    options["dpi"] = args.dpi
+    options["format"] = args.format
+    options["compression"] = args.compression
+    options["thumbnails"] = args.thumbnails or []
+    options["backgroundencode"] = args.background_encode
+    options["profile"] = args.profile or args.profile_output is not None
+    options["profileoutput"] = args.profile_output
+    options["profileformat"] = args.profile_format
+    options["maxmemory"] = None
+    if args.max_memory:
+        options["maxmemory"] = args.max_memory * 1024**2
+
     if args.list:
         print(f"supported plottypes are:")
-        for t in PLOT_NAMES:
+        for t in plot_names("model") + plot_names("colocated"):
             print(f"\t- {t}")
         sys.exit(0)
 
@@ -87,49 +301,257 @@ def main():
 
     if args.endyear:
         options["endyear"] = int(args.endyear)
-    else:
+    elif "startyear" in options:
         # use startyear
         options["endyear"] = options["startyear"] + 1
 
     if args.variables:
         options["vars"] = args.variables
 
+    if args.colocated:
+        options["colocated"] = args.colocated
+
     # error handling:
-    if "models" not in options:
-        print("model error")
-        sys.exit(1)
-    if "startyear" not in options:
-        print("start year error")
-        sys.exit(2)
-    if "vars" not in options:
-        print("var error")
-        sys.exit(3)
     if "plottype" not in options:
         print("plottype error")
         sys.exit(4)
+    sources = {
+        _plot_type.source for _plot_type in Planner(options["plottype"]).plot_types
+    }
+    # model data is needed unless only plot types of colocated data are requested
+    if "model" in sources or "colocated" not in sources:
+        if "models" not in options:
+            print("model error")
+            sys.exit(1)
+        if "startyear" not in options:
+            print("start year error")
+            sys.exit(2)
+        if "vars" not in options:
+            print("var error")
+            sys.exit(3)
+    if "colocated" in sources and "colocated" not in options:
+        print("colocated data error")
+        sys.exit(6)
+    try:
+        OutputSettings.from_options(options)
+        check_animation(options["animation"], options["fps"])
+        if options["tiles"] is not None and options["tiles"] < 0:
+            raise ValueError("the zoom level of the tiles must not be negative")
+        if options["scatterbins"] < 1:
+            raise ValueError("the number of scatter bins must be positive")
+    except ValueError as e:
+        print(f"output error: {e}")
+        sys.exit(5)
+
+    with profiled(options):
+        if "model" in sources:
+            plot_models(options)
+        if "colocated" in sources:
+            colocated_data = read_colocated(options)
+            plot_colocated(colocated_data, options)
+
+
+def read_models(options: dict, model_data: "PyaModelData" = None) -> "PyaModelData":
+    """read the data once for all plot types in options"""
+    from pyaerocom_plotting.readers import PyaModelData
+
+    # OBS: the reading method depends on the aggregations the plot types need
+    # e.g. pya_read for the full model data via pyaerocom
+    aggregations = Planner(options["plottype"]).aggregations("model")
+    if model_data is None:
+        model_data = PyaModelData()
+    with stage("read_models"):
+        if len(aggregations - {"weighted_mean"}) > 0:
+            pya_read(options=options, model_data=model_data)
+        if "weighted_mean" in aggregations:
+            # uses the data read above if present; the means are computed only once
+            pya_read_weighted_means(options=options, model_data=model_data)
+    return model_data
+
+
+def render_models(
+    model_data: "PyaModelData", options: dict, manifest: "BuildManifest" = None
+) -> dict:
+    """render all plot types of model data in options from model_data
+
+    returns {plot type: files}
+    """
+    from pyaerocom_plotting.manifest import BuildManifest
+    from pyaerocom_plotting.plotting import Plotting
+
+    # the plot types are looked up in the registry; all plot types share the same data
+    # object and every intermediate (e.g. the resampled data) is computed once
+    # plot files whose data did not change since the last run are skipped unless forced
+    if manifest is None:
+        manifest = BuildManifest(options["outdir"], force=options["force"])
+    plan = Planner(options["plottype"])
+    plan.prepare(model_data, "model", options)
+    plt_obj = Plotting(
+        plotdir=options["outdir"],
+        workers=options["workers"],
+        manifest=manifest,
+        output=OutputSettings.from_options(options),
+    )
+    return plan.render(plt_obj, model_data, options, source="model")
+
 
-    # start plotting by loop through the supplied plot types
-    # OBS: depending on the plottype the corresponding reading class has to be called
-    # e.g. pya_read for reading model data via pyaerocom
-    for _pidx, _ptype in enumerate(options["plottype"]):
-        if _ptype == "pixelmap":
-            model_data = pya_read(options=options)
-            plt_obj = Plotting(plotdir=options["outdir"])
-            plt_obj.plot_pixel_map(model_data)
-        elif _ptype == "monthly_weighted_mean":
-            model_data = pya_read(options=options)
-            plt_obj = Plotting(plotdir=options["outdir"])
-            plt_obj.plot_weighted_means(model_data)
+def plot_models(
+    options: dict, read=None, model_data: "PyaModelData" = None
+) -> list[str]:
+    """plot all plot types of model data in options; returns the plot files
+
+    plot types whose source files, options and package version did not change since the
+    last run are skipped using the build manifest in the output directory. This only
+    scans the data directories for the source files (of the models that have no reader
+    in model_data yet); the data is only read if at least one plot type needs to be
+    rendered, using read(options, model_data) if given and read_models otherwise. The
+    plot files of these plot types are then only rendered if their data changed (e.g.
+    single pixelmap months).
+    """
+    from pyaerocom_plotting.manifest import BuildManifest, file_info
+    from pyaerocom_plotting.readers import PyaModelData
+
+    manifest = BuildManifest(options["outdir"], force=options["force"])
+    # the readers created for the scan are used to read the data
+    if model_data is None:
+        model_data = PyaModelData()
+    sources = model_data.find_source_files(
+        options["models"], options["vars"], options["startyear"], options["endyear"]
+    )
+    info = file_info(set(_file for _files in sources.values() for _file in _files))
+    files = []
+    outdated = {}
+    plan = Planner(options["plottype"])
+    for _plot_type in plan.plot_types:
+        if _plot_type.source != "model":
+            continue
+        key = f"{_plot_type.name}:{':'.join(options['models'])}:{':'.join(options['vars'])}"
+        fingerprint = manifest.fingerprint(
+            plot=_plot_type.name,
+            models=options["models"],
+            vars=options["vars"],
+            startyear=options["startyear"],
+            endyear=options["endyear"],
+            options={
+                _keyword: options.get(_key)
+                for _keyword, _key in _plot_type.options.items()
+            },
+            files=info,
+            output=OutputSettings.from_options(options).fingerprint(),
+        )
+        if manifest.is_fresh(key, fingerprint):
+            print(
+                f"skipping unchanged plot type {_plot_type.name} for models {' '.join(options['models'])}"
+            )
+            files.extend(manifest.outputs(key))
         else:
-            print(f"plottype {_ptype} unknown. Skipping...")
+            outdated[_plot_type.name] = (key, fingerprint)
+
+    if len(outdated) == 0:
+        return files
+
+    if read is None:
+        read = read_models
+    # the unknown plot types are reported when rendering
+    options = dict(options, plottype=list(outdated) + plan.unknown)
+    model_data = read(options, model_data)
+    rendered = render_models(model_data, options, manifest=manifest)
+    for _name, _files in rendered.items():
+        manifest.record(*outdated[_name], _files)
+        files.extend(_files)
+    manifest.save()
+    return files
 
 
-def pya_read(options: dict) -> PyaModelData:
+def read_colocated(
+    options: dict, colocated_data: "PyaColocatedData" = None
+) -> "PyaColocatedData":
+    """open the colocated data files and directories in options["colocated"]
+
+    only the file names are read here, the data when the plots need it
+    """
+    from pyaerocom_plotting.readers import PyaColocatedData
+
+    if colocated_data is None:
+        colocated_data = PyaColocatedData()
+    with stage("read_colocated_files"):
+        for _path in options["colocated"]:
+            if Path(_path).is_dir():
+                colocated_data.open_dir(_path)
+            else:
+                colocated_data.open(_path)
+    return colocated_data
+
+
+def plot_colocated(colocated_data: "PyaColocatedData", options: dict) -> list[str]:
+    """plot all plot types of colocated data in options; returns the plot files"""
+    from pyaerocom_plotting.manifest import BuildManifest
+    from pyaerocom_plotting.plotting import Plotting
+
+    plan = Planner(options["plottype"])
+    plan.prepare(colocated_data, "colocated", options)
+    plt_obj = Plotting(
+        plotdir=options["outdir"],
+        workers=options["workers"],
+        manifest=BuildManifest(options["outdir"], force=options["force"]),
+        output=OutputSettings.from_options(options),
+    )
+    return [
+        _file
+        for _files in plan.render(
+            plt_obj, colocated_data, options, source="colocated"
+        ).values()
+        for _file in _files
+    ]
+
+
+def pya_read(options: dict, model_data: "PyaModelData" = None) -> "PyaModelData":
     """read model data using pyaerocom"""
-    model_data = PyaModelData()
+    from pyaerocom_plotting.readers import PyaModelData
+
+    if model_data is None:
+        model_data = PyaModelData()
+    model_data.read_many(
+        options["models"],
+        options["vars"],
+        options["startyear"],
+        options["endyear"],
+        workers=options["readworkers"],
+        max_open_files=options["maxopenfiles"],
+    )
+    for (_model, _var), _error in model_data.errors.items():
+        if _var is None:
+            print(f"No model match found for model {_model}.")
+        else:
+            print(f"Error: variable {_var} of model {_model} not read: {_error}")
+    return model_data
+
+
+def pya_read_weighted_means(
+    options: dict, model_data: "PyaModelData" = None
+) -> "PyaModelData":
+    """read the area weighted means of model data using pyaerocom
+
+    uses the weighted mean cache unless disabled with --no-cache
+    """
+    from pyaerocom_plotting.cache import WeightedMeanCache
+    from pyaerocom_plotting.readers import PyaModelData
+
+    cache = None
+    if not options["nocache"]:
+        cache = WeightedMeanCache(
+            cache_dir=options["cachedir"], max_size=options["cachesize"]
+        )
+    if model_data is None:
+        model_data = PyaModelData()
     for _model in options["models"]:
-        model_data.read(
-            _model, options["vars"], options["startyear"], options["endyear"]
+        model_data.read_weighted_means(
+            _model,
+            options["vars"],
+            options["startyear"],
+            options["endyear"],
+            cache=cache,
+            max_memory=options["maxmemory"],
         )
     return model_data
 
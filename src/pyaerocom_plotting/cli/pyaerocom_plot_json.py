@@ -4,11 +4,28 @@ pyaerocom_plot_json: create plots using the aeroval json files
 """
 
 import argparse
+import glob
+import os
 import sys
+import traceback
+from typing import TYPE_CHECKING
 
-from pyaerocom_plotting.const import DEFAULT_OUTPUT_DIR, PLOT_NAMES_JSON
-from pyaerocom_plotting.plotting import Plotting
-from pyaerocom_plotting.readers import AerovalJsonData
+# OBS: only light weight imports here; argument parsing and listing of the plot types
+# must not import pyaerocom or matplotlib. Readers and plotting are imported when used.
+from pyaerocom_plotting.const import (
+    DEFAULT_DPI,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_READ_WORKERS,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_STAT_PROPS,
+    OUTPUT_FORMATS,
+)
+from pyaerocom_plotting.output import OutputSettings
+from pyaerocom_plotting.profiling import PROFILER, profiled, stage
+from pyaerocom_plotting.registry import Planner, plot_names
+
+if TYPE_CHECKING:
+    from pyaerocom_plotting.readers import AerovalJsonData
 
 
 def main():
@@ -33,10 +50,60 @@ def main():
 \t{colors['UNDERLINE']}- basic usage:{colors['END']}
 \t  The following line plots the time series plot (model mean) for the file {colors['BOLD']}./hm/ts/ALL-Aeronet-od550aer-Column.json{colors['END']}
 \t  pyaerocom_plot_json -o /tmp -p overall_ts_SU -f /lustre/storeB/users/jang/aeroval-local-web/data/c3s/SU_Paper/hm/ts/ALL-Aeronet-od550aer-Column.json
+\t{colors['UNDERLINE']}- batch mode:{colors['END']}
+\t  The following line plots the time series plots for all files of an experiment using 8 worker processes
+\t  pyaerocom_plot_json -o /tmp -p overall_ts -w 8 -b '/lustre/storeB/users/jang/aeroval-local-web/data/c3s/SU_Paper/hm/ts/*.json'
 
 """,
     )
-    parser.add_argument("-f", "--file", help="file to read")
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="file(s) to read; several files are parsed concurrently and plotted together by overall_ts_grid",
+        nargs="+",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        help="batch mode: directories or glob patterns of files to read; the plots of each file are written to a sub directory of the output directory named like the file (including its path below the common directory of all files)",
+        nargs="+",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="number of worker processes; one file per process in batch mode, one plot type per process otherwise; defaults to 1",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--read-workers",
+        help=f"number of processes parsing the files given with -f; defaults to {DEFAULT_READ_WORKERS}",
+        type=int,
+        default=DEFAULT_READ_WORKERS,
+    )
+    parser.add_argument(
+        "-r",
+        "--regions",
+        help="overall_ts_grid, overall_ts_regions and overall_ts_stats: regions to plot; defaults to all regions of the files",
+        nargs="+",
+    )
+    parser.add_argument(
+        "--split-regions",
+        help="overall_ts_regions: write one file per region (and one of the legend), cut from the same figure, instead of one file with all regions",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-s",
+        "--stats",
+        help=f"overall_ts_stats: statistics to plot as stacked panels; defaults to {' '.join(DEFAULT_STAT_PROPS)}",
+        nargs="+",
+        default=DEFAULT_STAT_PROPS,
+    )
+    parser.add_argument(
+        "--split-stats",
+        help="overall_ts_stats: write one file per statistic (and one of the legend), cut from the same figure, instead of one file with all statistics",
+        action="store_true",
+    )
     parser.add_argument("-t", "--title", help="plot title", nargs="+")
     parser.add_argument("-p", "--plottype", help="plot type(s) to plot", nargs="+")
     parser.add_argument(
@@ -48,12 +115,78 @@ def main():
         help=f"output directory for the plot files; defaults to {DEFAULT_OUTPUT_DIR}",
         default=".",
     )
+    parser.add_argument(
+        "--force",
+        help="render all plots, including those whose input file did not change since the last run",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--dpi",
+        help=f"resolution of the plot files; defaults to {DEFAULT_DPI}",
+        type=int,
+        default=DEFAULT_DPI,
+    )
+    parser.add_argument(
+        "--format",
+        help=f"format of the plot files; defaults to {DEFAULT_OUTPUT_FORMAT}",
+        choices=OUTPUT_FORMATS,
+        default=DEFAULT_OUTPUT_FORMAT,
+    )
+    parser.add_argument(
+        "--compression",
+        help="png: zlib compression level from 0 (fastest) to 9 (smallest file); webp and jpeg: quality from 1 to 100; defaults to 6 for png, 80 for webp and 90 for jpeg",
+        type=int,
+    )
+    parser.add_argument(
+        "--thumbnails",
+        help="also write thumbnails of these widths in pixels, scaled down from the same render; named <plot file>_thumb<width>",
+        type=int,
+        nargs="+",
+    )
+    parser.add_argument(
+        "--background-encode",
+        help="encode the images on a background thread while the next frame is rendered",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="print the time and memory used by the stages of the run (reading, resampling, plotting, saving, ...)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="write the profile to this file; implies --profile",
+    )
+    parser.add_argument(
+        "--profile-format",
+        help="format of the profile file: json (summary and all stages) or chrome (trace event format for chrome://tracing or ui.perfetto.dev); defaults to json",
+        choices=["json", "chrome"],
+        default="json",
+    )
 
     args = parser.parse_args()
     options = {}
     if args.file:
         options["file"] = args.file
 
+    if args.batch:
+        options["batch"] = args.batch
+    options["workers"] = args.workers
+    options["readworkers"] = args.read_workers
+    options["regions"] = args.regions
+    options["splitregions"] = args.split_regions
+    options["statprops"] = args.stats
+    options["splitstats"] = args.split_stats
+    options["force"] = args.force
+    options["dpi"] = args.dpi
+    options["format"] = args.format
+    options["compression"] = args.compression
+    options["thumbnails"] = args.thumbnails or []
+    options["backgroundencode"] = args.background_encode
+    options["profile"] = args.profile or args.profile_output is not None
+    options["profileoutput"] = args.profile_output
+    options["profileformat"] = args.profile_format
+
     if args.outdir:
         options["outdir"] = args.outdir
 
@@ -67,42 +200,229 @@ def main():
 
     if args.list:
         print(f"supported plottypes are:")
-        for t in PLOT_NAMES_JSON:
+        for t in plot_names("json"):
             print(f"\t- {t}")
         sys.exit(0)
 
     # error handling:
-    if "file" not in options:
+    if "file" not in options and "batch" not in options:
         print("file error")
         sys.exit(1)
     if "plottype" not in options:
         print("plottype error")
         sys.exit(4)
+    try:
+        OutputSettings.from_options(options)
+    except ValueError as e:
+        print(f"output error: {e}")
+        sys.exit(5)
+
+    if "batch" in options:
+        with profiled(options):
+            failed = batch_plot(options)
+        # the exit status is taken modulo 256; the number of failed files is printed
+        sys.exit(1 if failed else 0)
+
+    with profiled(options):
+        plot_json_file(options)
 
-    # start plotting by loop through the supplied plot types
-    # OBS: depending on the plottype the corresponding reading class has to be called
-    # e.g. json_read for reading aeroval json files
-    for _pidx, _ptype in enumerate(options["plottype"]):
-        if _ptype == "overall_ts":
-            # overall_ts
-            json_data = json_read(options)
-            plt_obj = Plotting(plotdir=options["outdir"])
-            plt_obj.plot_aeroval_overall_time_series(json_data)
-        elif _ptype == "overall_ts_SU":
-            # overall_ts
-            json_data = json_read(options)
-            plt_obj = Plotting(plotdir=options["outdir"])
-            plt_obj.plot_aeroval_overall_time_series_SU_Paper(
-                json_data, title=options["plottitle"]
+
+def plot_json(json_data: "AerovalJsonData", options: dict) -> list[str]:
+    """plot all plot types in options for json_data; returns the written files"""
+    return [
+        _file for _files in render_json(json_data, options).values() for _file in _files
+    ]
+
+
+def render_json(json_data: "AerovalJsonData", options: dict) -> dict:
+    """plot all plot types in options for json_data; returns {plot type: files}"""
+    from pyaerocom_plotting.plotting import Plotting
+
+    # the plot types are looked up in the registry; with more than one worker they are
+    # rendered in parallel
+    plan = Planner(options["plottype"])
+    plan.prepare(json_data, "json", options)
+    plt_obj = Plotting(
+        plotdir=options["outdir"],
+        workers=options.get("workers", 1),
+        output=OutputSettings.from_options(options),
+    )
+    return plan.render(plt_obj, json_data, options, source="json")
+
+
+def plot_json_file(options: dict, read=None) -> list[str]:
+    """plot all plot types in options for options["file"] (a file or a list of files);
+    returns the plot files
+
+    plot types whose input file, options and package version did not change since the
+    last run are skipped using the build manifest in the output directory. The file is
+    only read if at least one plot type needs to be rendered, using read(options) if given
+    and json_read otherwise.
+    """
+    from pyaerocom_plotting.manifest import BuildManifest, file_info
+
+    manifest = BuildManifest(options["outdir"], force=options.get("force", False))
+    files = []
+    outdated = {}
+    json_files = _json_files(options)
+    for _ptype in options["plottype"]:
+        key = f"{_ptype}:{':'.join(os.path.abspath(_file) for _file in json_files)}"
+        fingerprint = manifest.fingerprint(
+            plot=_ptype,
+            title=options["plottitle"],
+            regions=options.get("regions"),
+            splitregions=options.get("splitregions", False),
+            statprops=options.get("statprops", DEFAULT_STAT_PROPS),
+            splitstats=options.get("splitstats", False),
+            files=file_info(json_files),
+            output=OutputSettings.from_options(options).fingerprint(),
+        )
+        if manifest.is_fresh(key, fingerprint):
+            print(
+                f"skipping unchanged plot type {_ptype} for file {' '.join(json_files)}"
             )
+            files.extend(manifest.outputs(key))
         else:
-            print(f"plottype {_ptype} unknown. Skipping...")
+            outdated[_ptype] = (key, fingerprint)
+
+    if len(outdated) == 0:
+        return files
+
+    if read is None:
+        read = json_read
+    json_data = read(options)
+    rendered = render_json(json_data, dict(options, plottype=list(outdated)))
+    for _ptype, _files in rendered.items():
+        manifest.record(*outdated[_ptype], _files)
+        files.extend(_files)
+    manifest.save()
+    return files
+
+
+def batch_files(patterns: list[str]) -> list[str]:
+    """expand directories and glob patterns to a sorted list of json files"""
+    files = set()
+    for _pattern in patterns:
+        if os.path.isdir(_pattern):
+            _pattern = os.path.join(_pattern, "*.json")
+        files.update(_file for _file in glob.glob(_pattern) if os.path.isfile(_file))
+    return sorted(files)
+
+
+def batch_outdirs(files: list[str]) -> list[str]:
+    """sub directories of the output directory for the files of a batch
+
+    the path of each file relative to the common directory of all files, without the
+    extension; files of a single directory are written to sub directories named like
+    the files
+    """
+    files = [os.path.abspath(_file) for _file in files]
+    root = os.path.commonpath([os.path.dirname(_file) for _file in files])
+    return [os.path.relpath(os.path.splitext(_file)[0], root) for _file in files]
+
+
+def _batch_worker_init():
+    import matplotlib
+
+    matplotlib.use("Agg")
 
 
-def json_read(options: dict) -> AerovalJsonData:
-    """read model data using pyaerocom"""
+def _batch_plot_file(file: str, subdir: str, options: dict) -> tuple:
+    """read and plot a single file of a batch to subdir of the output directory
+
+    returns a tuple of the written files and the error message (None on success)
+    """
+    options = dict(options)
+    options["file"] = file
+    # the files are distributed over the worker processes, not the plot types
+    options["workers"] = 1
+    options["outdir"] = os.path.join(options["outdir"], subdir)
+    try:
+        os.makedirs(options["outdir"], exist_ok=True)
+        with stage("file", file=file):
+            return plot_json_file(options), None
+    except Exception:
+        return [], traceback.format_exc(limit=1).strip()
+
+
+def batch_plot(options: dict) -> int:
+    """plot all files of the batch in one process or a pool of worker processes
+
+    prints a summary and returns the number of failed files
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    files = batch_files(options["batch"])
+    if len(files) == 0:
+        print("batch error: no files found")
+        return 1
+
+    # each file needs its own output directory (and build manifest)
+    subdirs = batch_outdirs(files)
+    duplicates = {
+        _subdir: [_file for _file, _dir in zip(files, subdirs) if _dir == _subdir]
+        for _subdir in subdirs
+        if subdirs.count(_subdir) > 1
+    }
+    if duplicates:
+        for _subdir, _files in duplicates.items():
+            print(
+                f"batch error: files {' '.join(_files)} would be plotted to the same "
+                f"directory {_subdir}"
+            )
+        return 1
+
+    workers = max(1, min(options["workers"], len(files)))
+    if workers == 1:
+        results = [
+            _batch_plot_file(_file, _subdir, options)
+            for _file, _subdir in zip(files, subdirs)
+        ]
+    else:
+        # the stages of the workers are collected if profiling is on
+        with PROFILER.workers(), ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_batch_worker_init,
+        ) as executor:
+            results = list(
+                executor.map(_batch_plot_file, files, subdirs, [options] * len(files))
+            )
+
+    produced = [_plot for _plots, _error in results for _plot in _plots]
+    failed = [
+        (_file, _error) for _file, (_plots, _error) in zip(files, results) if _error
+    ]
+    print(f"batch summary: {len(files)} files read, {len(produced)} plots written")
+    for _plot in produced:
+        print(f"\t- {_plot}")
+    if failed:
+        print(f"{len(failed)} files failed:")
+        for _file, _error in failed:
+            print(f"\t- {_file}: {_error}")
+    return len(failed)
+
+
+def _json_files(options: dict) -> list[str]:
+    """the file(s) in options["file"] as list"""
+    if isinstance(options["file"], (str, os.PathLike)):
+        return [options["file"]]
+    return list(options["file"])
+
+
+def json_read(options: dict) -> "AerovalJsonData":
+    """read the aeroval json file(s) in options["file"]; several files concurrently"""
+    from pyaerocom_plotting.readers import AerovalJsonData
+
     json_data = AerovalJsonData()
-    json_data.read(options["file"])
+    files = _json_files(options)
+    if len(files) == 1:
+        json_data.read(files[0])
+    else:
+        json_data.read_many(
+            files, workers=options.get("readworkers", DEFAULT_READ_WORKERS)
+        )
 
     return json_data
 
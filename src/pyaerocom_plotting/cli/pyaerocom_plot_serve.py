@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+pyaerocom_plot serve / client: run the plot server and send requests to it
+"""
+
+import argparse
+import json
+import sys
+
+from pyaerocom_plotting.const import (
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_SERVER_CACHE_ITEMS,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+)
+
+
+def serve(argv: list[str] = None) -> int:
+    """run the plot server until interrupted"""
+    parser = argparse.ArgumentParser(
+        prog="pyaerocom_plot serve",
+        description="keep the plotting libraries imported and recent data in memory and serve plot requests over http",
+    )
+    parser.add_argument(
+        "--host",
+        help=f"address to listen on; defaults to {DEFAULT_SERVER_HOST}",
+        default=DEFAULT_SERVER_HOST,
+    )
+    parser.add_argument(
+        "--port",
+        help=f"port to listen on; defaults to {DEFAULT_SERVER_PORT}",
+        type=int,
+        default=DEFAULT_SERVER_PORT,
+    )
+    parser.add_argument(
+        "-o",
+        "--outdir",
+        help=f"default output directory for the plot files; defaults to {DEFAULT_OUTPUT_DIR}",
+        default=".",
+    )
+    parser.add_argument(
+        "--cache-items",
+        help=f"number of data objects kept in memory; defaults to {DEFAULT_SERVER_CACHE_ITEMS}",
+        type=int,
+        default=DEFAULT_SERVER_CACHE_ITEMS,
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="number of worker processes used to render the plots; defaults to 1",
+        type=int,
+        default=1,
+    )
+    parser.add_argument("--verbose", help="log every request", action="store_true")
+    args = parser.parse_args(argv)
+
+    from pyaerocom_plotting.server import PlotServer
+
+    server = PlotServer(
+        host=args.host,
+        port=args.port,
+        outdir=args.outdir,
+        cache_items=args.cache_items,
+        options={"workers": args.workers},
+        verbose=args.verbose,
+    )
+    server.warm_up()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+def client(argv: list[str] = None) -> int:
+    """send a plot request to a running plot server and print the plot files"""
+    parser = argparse.ArgumentParser(
+        prog="pyaerocom_plot client",
+        description="send a plot request to a running plot server",
+    )
+    parser.add_argument(
+        "--url",
+        help=f"url of the plot server; defaults to http://{DEFAULT_SERVER_HOST}:{DEFAULT_SERVER_PORT}",
+        default=f"http://{DEFAULT_SERVER_HOST}:{DEFAULT_SERVER_PORT}",
+    )
+    parser.add_argument("-p", "--plottype", help="plot type(s) to plot", nargs="+")
+    parser.add_argument("-f", "--file", help="aeroval json file(s) to plot", nargs="+")
+    parser.add_argument("-m", "--models", help="models(s) to plot", nargs="+")
+    parser.add_argument("-v", "--variables", help="variable(s) to plot", nargs="+")
+    parser.add_argument("-s", "--startyear", help="startyear to read", type=int)
+    parser.add_argument("-e", "--endyear", help="endyear to read", type=int)
+    parser.add_argument(
+        "--colocated",
+        help="pyaerocom colocated data files or directories to plot",
+        nargs="+",
+    )
+    parser.add_argument("-t", "--title", help="plot title", nargs="+")
+    parser.add_argument("-o", "--outdir", help="output directory for the plot files")
+    parser.add_argument(
+        "--status", help="print the status of the server", action="store_true"
+    )
+    args = parser.parse_args(argv)
+
+    from pyaerocom_plotting.server import PlotClient
+
+    plot_client = PlotClient(args.url)
+    if args.status:
+        print(json.dumps(plot_client.status(), indent=1))
+        return 0
+
+    if not args.plottype:
+        print("plottype error")
+        return 4
+    request = {"plottype": args.plottype}
+    if args.file:
+        request["file"] = args.file[0] if len(args.file) == 1 else args.file
+    elif args.models:
+        if args.startyear is None:
+            print("start year error")
+            return 2
+        if not args.variables:
+            print("var error")
+            return 3
+        request["models"] = args.models
+        request["vars"] = args.variables
+        request["startyear"] = args.startyear
+        if args.endyear is not None:
+            request["endyear"] = args.endyear
+    elif args.colocated:
+        request["colocated"] = args.colocated
+    else:
+        print("file or model error")
+        return 1
+    if args.title:
+        request["title"] = " ".join(args.title)
+    if args.outdir:
+        request["outdir"] = args.outdir
+
+    for _file in plot_client.plot(**request):
+        print(_file)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
@@ -6,25 +6,59 @@ some common constant definitions
 
 
 """
-from getpass import getuser
-from random import randint
-from socket import gethostname
-from uuid import uuid4
+import os
 
-HOSTNAME = gethostname()
-USER = getuser()
 TMP_DIR = "/tmp"
-RUN_UUID = uuid4()
-RND = randint(0, 1e9)
 DEFAULT_OUTPUT_DIR = "."
 
-PLOT_NAMES = ["pixelmap", "monthly_weighted_mean"]
-PLOT_NAMES_JSON = [
-    "overall_ts",
-    "overall_ts_SU",
+DEFAULT_TS_TYPE = "daily"
+# concurrent reading of model data
+DEFAULT_READ_WORKERS = 4
+DEFAULT_MAX_OPEN_FILES = 64
+WEIGHTED_MEAN_TS_TYPE = "monthly"
+# statistics of the aeroval time series plotted by overall_ts_stats: model mean,
+# mean bias, root mean square error, correlation and normalised mean bias
+DEFAULT_STAT_PROPS = ["data_mean", "mb", "rms", "R", "nmb"]
+# aeroval's standard regions for the regional means
+DEFAULT_REGIONS = [
+    "ALL",
+    "ASIA",
+    "AUSTRALIA",
+    "CHINA",
+    "EUROPE",
+    "INDIA",
+    "NAFRICA",
+    "SAFRICA",
+    "SAMERICA",
+    "NAMERICA",
 ]
 
-DEFAULT_TS_TYPE = "daily"
+# cache for reduced data (e.g. the area weighted means)
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "pyaerocom_plotting",
+)
+# maximum size of the cache in bytes
+DEFAULT_CACHE_MAX_SIZE = 100 * 1024**2
+
+# output of the plots
+DEFAULT_DPI = 300
+DEFAULT_OUTPUT_FORMAT = "png"
+OUTPUT_FORMATS = ["png", "webp", "jpeg", "svg", "pdf"]
+# animations of the pixelmap frames
+ANIMATION_FORMATS = ["mp4", "gif", "apng"]
+DEFAULT_ANIMATION_FPS = 2
+# density scatter plots of colocated data: 2D histogram or hexagonal bins
+SCATTER_KINDS = ["hist", "hexbin"]
+DEFAULT_SCATTER_KIND = "hist"
+# number of bins per axis
+DEFAULT_SCATTER_BINS = 100
+
+# plot server (pyaerocom_plot serve)
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8765
+# number of data objects kept in memory by the plot server
+DEFAULT_SERVER_CACHE_ITEMS = 16
 
 TS_ANNOTATIONS = {
     "2023/06/27": "48r1",
@@ -43,3 +77,62 @@ TS_ANNOTATIONS = {
     #      "2012/07/05": "37r3",
     #      "2009/09/01": "36r1"
 }
+
+
+def _hostname():
+    from socket import gethostname
+
+    return gethostname()
+
+
+def _user():
+    from getpass import getuser
+
+    return getuser()
+
+
+def _run_uuid():
+    from uuid import uuid4
+
+    return uuid4()
+
+
+def _rnd():
+    from random import randint
+
+    return randint(0, 1e9)
+
+
+def _plot_names():
+    from pyaerocom_plotting.registry import plot_names
+
+    # pyaerocom_plot renders the plot types of model and colocated data
+    return plot_names("model") + plot_names("colocated")
+
+
+def _plot_names_json():
+    from pyaerocom_plotting.registry import plot_names
+
+    return plot_names("json")
+
+
+# constants that need a system lookup are only determined when they are used
+_LAZY_CONSTANTS = {
+    "HOSTNAME": _hostname,
+    "USER": _user,
+    "RUN_UUID": _run_uuid,
+    "RND": _rnd,
+    # the supported plot types are defined in the registry
+    "PLOT_NAMES": _plot_names,
+    "PLOT_NAMES_JSON": _plot_names_json,
+}
+
+
+def __getattr__(name):
+    try:
+        value = _LAZY_CONSTANTS[name]()
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    # determined once per run
+    globals()[name] = value
+    return value
@@ -0,0 +1,129 @@
+"""
+build manifest for incremental re-rendering
+
+The manifest is a small json file in the output directory. For every plot it stores a
+fingerprint of the plot's inputs (source data, plot type, options and package version)
+together with the files written for it. A plot whose fingerprint did not change and whose
+files still exist is fresh and does not need to be rendered again.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def package_version() -> str:
+    """return the installed version of pyaerocom_plotting"""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("pyaerocom_plotting")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def file_info(files: list[str]) -> list[list]:
+    """return name, mtime and size of files; used to detect changed source files"""
+    info = []
+    for _file in sorted(files):
+        stat = os.stat(_file)
+        info.append([str(_file), stat.st_mtime_ns, stat.st_size])
+    return info
+
+
+def data_digest(*arrays) -> str:
+    """return a hash of the content of (masked) arrays"""
+    digest = hashlib.sha256()
+    for _array in arrays:
+        _array = np.ma.asarray(_array)
+        digest.update(f"{_array.dtype.str}{_array.shape}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(np.ma.getdata(_array)).tobytes())
+        digest.update(np.ma.getmaskarray(_array).tobytes())
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """fingerprints of the inputs of all plots written to an output directory"""
+
+    __version__ = "0.0.1"
+    FILE_NAME = ".pyaerocom_plotting_manifest.json"
+
+    def __init__(self, outdir: [str, Path], force: bool = False):
+        self._path = Path(outdir) / self.FILE_NAME
+        # with force all plots are considered outdated, but are still recorded
+        self._force = force
+        self._package_version = package_version()
+        self._entries = self._load()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def force(self) -> bool:
+        return self._force
+
+    def _load(self) -> dict:
+        try:
+            with open(self._path, "r") as fh:
+                manifest = json.load(fh)
+        except (FileNotFoundError, OSError, ValueError):
+            return {}
+        if manifest.get("version") != self.__version__:
+            return {}
+        return manifest.get("entries", {})
+
+    def fingerprint(self, **inputs) -> str:
+        """return the fingerprint of a plot's inputs
+
+        the package version is always part of the fingerprint, so an update of
+        pyaerocom_plotting re-renders all plots
+        """
+        inputs["package_version"] = self._package_version
+        return hashlib.sha256(
+            json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def is_fresh(self, key: str, fingerprint: str) -> bool:
+        """return True if the plot key was written with the same fingerprint and all
+        its files still exist"""
+        if self._force:
+            return False
+        entry = self._entries.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+        return len(entry["outputs"]) > 0 and all(
+            os.path.exists(_file) for _file in entry["outputs"]
+        )
+
+    def outputs(self, key: str) -> list[str]:
+        """return the files recorded for the plot key"""
+        try:
+            return list(self._entries[key]["outputs"])
+        except KeyError:
+            return []
+
+    def record(self, key: str, fingerprint: str, outputs: list[str]):
+        """record the files written for the plot key"""
+        if len(outputs) == 0:
+            return
+        self._entries[key] = {
+            "fingerprint": fingerprint,
+            "outputs": [str(_file) for _file in outputs],
+        }
+
+    def save(self):
+        """write the manifest"""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as fh:
+            json.dump(
+                {"version": self.__version__, "entries": self._entries},
+                fh,
+                indent=1,
+                sort_keys=True,
+            )
+        # atomic replace so that an interrupted run never leaves a broken manifest
+        os.replace(tmp_path, self._path)
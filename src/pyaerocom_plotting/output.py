@@ -0,0 +1,314 @@
+"""
+output settings of the plots and the image writer
+
+OutputSettings holds the per run settings of the plot files: resolution, format,
+compression, thumbnail widths and whether the images are encoded on a background thread.
+ImageWriter writes matplotlib figures according to these settings. Raster formats are
+drawn once with the Agg canvas and encoded with PIL, so that
+- the compression level can be chosen (the encoding dominates the time of a frame)
+- thumbnails are scaled down from the same render instead of rendering the figure again
+- the encoding can run on a background thread while the next frame is rendered
+
+OBS: this module is imported by the command line scripts for argument parsing and must
+not import heavy dependencies at module level.
+"""
+from pathlib import Path
+
+from pyaerocom_plotting.const import DEFAULT_DPI, DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS
+from pyaerocom_plotting.profiling import stage
+
+# file extensions of the output formats
+EXTENSIONS = {"png": "png", "webp": "webp", "jpeg": "jpg", "svg": "svg", "pdf": "pdf"}
+# formats encoded with PIL; the others are written by matplotlib
+RASTER_FORMATS = ("png", "webp", "jpeg")
+# default compression: zlib level (0-9) for png, quality (1-100) for webp and jpeg;
+# png's default is the level matplotlib uses
+DEFAULT_COMPRESSION = {"png": 6, "webp": 80, "jpeg": 90}
+COMPRESSION_RANGES = {"png": (0, 9), "webp": (1, 100), "jpeg": (1, 100)}
+# maximum number of images waiting for the background thread
+MAX_PENDING_IMAGES = 2
+
+
+class OutputSettings:
+    """settings of the plot files of a run"""
+
+    def __init__(
+        self,
+        dpi: int = DEFAULT_DPI,
+        format: str = DEFAULT_OUTPUT_FORMAT,
+        compression: int = None,
+        thumbnails: list[int] = (),
+        background: bool = False,
+    ):
+        if format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"output format {format} not supported; use {OUTPUT_FORMATS}"
+            )
+        if compression is not None and format in COMPRESSION_RANGES:
+            low, high = COMPRESSION_RANGES[format]
+            if not low <= compression <= high:
+                raise ValueError(
+                    f"compression of {format} must be between {low} and {high}"
+                )
+        if any(_width < 1 for _width in thumbnails):
+            raise ValueError("thumbnail widths must be positive")
+        self._dpi = int(dpi)
+        self._format = format
+        self._compression = compression
+        # widths in pixels of the thumbnails written for each plot
+        self._thumbnails = tuple(sorted(set(int(_width) for _width in thumbnails)))
+        self._background = bool(background)
+
+    @classmethod
+    def from_options(cls, options: dict) -> "OutputSettings":
+        """settings from the options of the command line scripts"""
+        return cls(
+            dpi=options.get("dpi", DEFAULT_DPI),
+            format=options.get("format", DEFAULT_OUTPUT_FORMAT),
+            compression=options.get("compression"),
+            thumbnails=options.get("thumbnails") or (),
+            background=options.get("backgroundencode", False),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"OutputSettings(dpi={self._dpi}, format={self._format!r}, "
+            f"compression={self._compression}, thumbnails={list(self._thumbnails)}, "
+            f"background={self._background})"
+        )
+
+    @property
+    def dpi(self) -> int:
+        return self._dpi
+
+    @property
+    def format(self) -> str:
+        return self._format
+
+    @property
+    def compression(self) -> int:
+        """compression of the format; None for vector formats"""
+        if self._compression is None:
+            return DEFAULT_COMPRESSION.get(self._format)
+        return self._compression
+
+    @property
+    def thumbnails(self) -> tuple:
+        return self._thumbnails
+
+    @property
+    def background(self) -> bool:
+        return self._background
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self._format]
+
+    @property
+    def thumbnail_format(self) -> str:
+        """format of the thumbnails; png for vector formats"""
+        return self._format if self._format in RASTER_FORMATS else "png"
+
+    def thumbnail_filename(self, filename: str, width: int) -> str:
+        """name of the thumbnail of filename with the given width"""
+        path = Path(filename)
+        return str(
+            path.with_name(
+                f"{path.stem}_thumb{width}.{EXTENSIONS[self.thumbnail_format]}"
+            )
+        )
+
+    def fingerprint(self) -> dict:
+        """the settings changing the plot files; part of the build manifest fingerprints"""
+        return {
+            "dpi": self._dpi,
+            "format": self._format,
+            "compression": self.compression,
+            "thumbnails": list(self._thumbnails),
+        }
+
+
+def _write_image(image, filename: str, format: str, compression: int):
+    """write the PIL image to filename"""
+    if format == "png":
+        image.save(filename, "PNG", compress_level=compression)
+    elif format == "jpeg":
+        # jpeg has no alpha channel
+        image.convert("RGB").save(filename, "JPEG", quality=compression)
+    else:
+        image.save(filename, "WEBP", quality=compression)
+
+
+def _encode(rgba, filename: str, settings: OutputSettings):
+    """encode the rendered image rgba (numpy array) and its thumbnails"""
+    from PIL import Image
+
+    with stage("encode", file=filename):
+        image = Image.fromarray(rgba, "RGBA")
+        if settings.format in RASTER_FORMATS:
+            _write_image(image, filename, settings.format, settings.compression)
+        # Image.LANCZOS in older PIL versions
+        lanczos = getattr(Image, "Resampling", Image).LANCZOS
+        compression = DEFAULT_COMPRESSION[settings.thumbnail_format]
+        if settings.format in RASTER_FORMATS:
+            compression = settings.compression
+        for _width in settings.thumbnails:
+            height = max(1, round(image.height * _width / image.width))
+            _write_image(
+                image.resize((_width, height), lanczos),
+                settings.thumbnail_filename(filename, _width),
+                settings.thumbnail_format,
+                compression,
+            )
+
+
+class ImageWriter:
+    """writes matplotlib figures according to OutputSettings
+
+    with settings.background the images are encoded on a background thread; call flush
+    (or use the writer as context manager) to make sure all files are written
+    """
+
+    def __init__(self, settings: OutputSettings = None):
+        self._settings = OutputSettings() if settings is None else settings
+        self._executor = None
+        self._pending = []
+
+    @property
+    def settings(self) -> OutputSettings:
+        return self._settings
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def save(self, fig, filename: str) -> list[str]:
+        """write fig to filename (and its thumbnails); returns the files"""
+        settings = self._settings
+        if settings.format not in RASTER_FORMATS:
+            fig.savefig(filename, format=settings.format, dpi=settings.dpi)
+            if len(settings.thumbnails) == 0:
+                return [filename]
+        return self.write(self.draw(fig, filename), filename)
+
+    def draw(self, fig, filename: str = None):
+        """render fig with the Agg canvas; returns a copy of the rgba buffer
+
+        filename only tags the profiling stage
+        """
+        return self._draw(fig, filename)[0]
+
+    def _draw(self, fig, filename: str = None, artists: list = ()) -> tuple:
+        """render fig; returns the rgba buffer and the extents (matplotlib Bbox in
+        pixels of the image, including tick labels and titles) of artists"""
+        import numpy as np
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        with stage("draw", file=filename):
+            canvas = original = fig.canvas
+            if not isinstance(canvas, FigureCanvasAgg):
+                # e.g. an interactive backend; draw with a temporary Agg canvas
+                canvas = FigureCanvasAgg(fig)
+            dpi = fig.dpi
+            fig.dpi = self._settings.dpi
+            try:
+                canvas.draw()
+                # a copy, the figure may change while the image is encoded
+                rgba = np.array(canvas.buffer_rgba())
+                renderer = canvas.get_renderer()
+                extents = [_artist.get_tightbbox(renderer) for _artist in artists]
+            finally:
+                fig.dpi = dpi
+                if canvas is not original:
+                    fig.set_canvas(original)
+        return rgba, extents
+
+    def save_parts(self, fig, parts: dict, pad: float = 0.05) -> list[str]:
+        """write parts of fig to separate files; returns the files
+
+        parts maps file names to artists (axes, legends, ...); each file shows the
+        extent of its artist plus pad inches. Raster formats are cut from a single
+        render of fig; vector formats are written by matplotlib, clipped to the extent.
+        """
+        import numpy as np
+
+        settings = self._settings
+        files = []
+        if settings.format not in RASTER_FORMATS:
+            from matplotlib.transforms import Affine2D
+
+            # pixels of the render to inches
+            inches = Affine2D().scale(1 / settings.dpi)
+            extents = [
+                _extent.transformed(inches)
+                for _extent in self._draw(fig, artists=list(parts.values()))[1]
+            ]
+            for _filename, _extent in zip(parts, extents):
+                fig.savefig(
+                    _filename,
+                    format=settings.format,
+                    dpi=settings.dpi,
+                    bbox_inches=_extent,
+                    pad_inches=pad,
+                )
+                files.append(_filename)
+            if len(settings.thumbnails) == 0:
+                return files
+
+        rgba, extents = self._draw(fig, ", ".join(parts), list(parts.values()))
+        height, width = rgba.shape[:2]
+        pad = pad * settings.dpi
+        for (_filename, _artist), _extent in zip(parts.items(), extents):
+            # the image rows start at the top, the display coordinates at the bottom
+            x0, x1 = (
+                max(0, int(_extent.x0 - pad)),
+                min(width, int(np.ceil(_extent.x1 + pad))),
+            )
+            y0, y1 = (
+                max(0, int(height - _extent.y1 - pad)),
+                min(height, int(np.ceil(height - _extent.y0 + pad))),
+            )
+            written = self.write(np.ascontiguousarray(rgba[y0:y1, x0:x1]), _filename)
+            files.extend(written if settings.format in RASTER_FORMATS else written[1:])
+        return files
+
+    def write(self, rgba, filename: str) -> list[str]:
+        """encode the rendered image rgba (see draw) to filename and its thumbnails
+
+        for vector formats only the thumbnails are written; returns the files
+        """
+        settings = self._settings
+        files = [filename] + [
+            settings.thumbnail_filename(filename, _width)
+            for _width in settings.thumbnails
+        ]
+        if not settings.background:
+            _encode(rgba, filename, settings)
+            return files
+
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        # bound the memory of the images waiting to be encoded
+        while len(self._pending) >= MAX_PENDING_IMAGES:
+            self._pending.pop(0).result()
+        self._pending.append(self._executor.submit(_encode, rgba, filename, settings))
+        return files
+
+    def flush(self):
+        """wait until all images are written; raises the first error of the encoding"""
+        pending, self._pending = self._pending, []
+        for _future in pending:
+            _future.result()
+
+    def close(self):
+        """flush and stop the background thread"""
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -1,243 +1,897 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from multiprocessing import get_context
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from pyaerocom_plotting.readers import AerovalJsonData, PyaModelData
+from pyaerocom_plotting.animation import ANIMATION_EXTENSIONS, AnimationWriter
+from pyaerocom_plotting.const import (
+    DEFAULT_ANIMATION_FPS,
+    DEFAULT_DPI,
+    DEFAULT_REGIONS,
+    DEFAULT_SCATTER_BINS,
+    DEFAULT_SCATTER_KIND,
+    DEFAULT_STAT_PROPS,
+)
+from pyaerocom_plotting.manifest import BuildManifest, data_digest, file_info
+from pyaerocom_plotting.output import RASTER_FORMATS, ImageWriter, OutputSettings
+from pyaerocom_plotting.tiles import TileWriter
+from pyaerocom_plotting.profiling import PROFILER, stage
+
+if TYPE_CHECKING:
+    # only needed for the annotations; importing the readers pulls in pyaerocom
+    from pyaerocom_plotting.readers import (
+        AerovalJsonData,
+        PyaColocatedData,
+        PyaModelData,
+    )
+    from pyaerocom_plotting.scatter import ScatterStats
+
+
+# data shared by all tasks of a render worker process; see Plotting._render
+_SHARED = None
+
+
+def _init_render_worker(shared: bytes = None):
+    """initialise a render worker process
+
+    workers are started with the spawn method; make sure they render without a display.
+    shared is the pickled data shared by all tasks of the worker.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    if shared is not None:
+        global _SHARED
+        _SHARED = pickle.loads(shared)
+
+
+def _call_with_shared(func, *args):
+    """call func with args and the data shared by the tasks of this worker process"""
+    return func(*args, _SHARED)
+
+
+def _frame_label(cube) -> str:
+    """year and month of a pixelmap frame, e.g. 201901"""
+    _time = cube.coord("time").cell(0).point
+    return f"{_time.year}{_time.month:02}"
+
+
+def _write_pixel_map_frame(
+    fig, filename: str, writer: ImageWriter, animations: list, label: str
+):
+    """write the rendered frame fig to filename (None: no plot file) and the animations
+
+    the frame is drawn once for the plot file and all animations
+    """
+    rgba = None
+    if filename is not None:
+        print(f"saving file: {filename}")
+        with stage("savefig", file=filename):
+            if len(animations) > 0 and writer.settings.format in RASTER_FORMATS:
+                rgba = writer.draw(fig, filename)
+                writer.write(rgba, filename)
+            else:
+                writer.save(fig, filename)
+    if len(animations) > 0:
+        if rgba is None:
+            rgba = writer.draw(fig, label)
+        for _animation in animations:
+            _animation.add(rgba)
+
+
+def _render_pixel_map_frame(
+    cube, filename: str, writer: ImageWriter, tiles: tuple = None, animations=()
+) -> str:
+    """render a single pixelmap frame (2D iris cube) to filename
+
+    tiles is a (TileWriter, directory) tuple for the map tiles of the frame; the frame is
+    not rendered if only the tiles are needed (filename None and no animations)
+    """
+    import iris.quickplot as qplt
+    import matplotlib.pyplot as plt
+
+    if tiles is not None:
+        tiles[0].write(cube, tiles[1])
+    if filename is None and len(animations) == 0:
+        return filename
+    label = filename or _frame_label(cube)
+    with stage("pcolormesh", file=label):
+        qplt.pcolormesh(cube)
+    with stage("coastlines", file=label):
+        plt.gca().coastlines()
+    _write_pixel_map_frame(plt.gcf(), filename, writer, animations, label)
+    plt.close()
+    return filename
+
+
+def _render_pixel_map_frames(
+    cubes: list,
+    filenames: list[str],
+    output: OutputSettings,
+    tiles: list[tuple] = None,
+    animations: list[AnimationWriter] = (),
+) -> list[str]:
+    """render pixelmap frames (2D iris cubes), each in its own figure
+
+    module level function so that it can be sent to a process pool. With
+    output.background a frame is encoded while the next one is rendered. A filename of
+    None writes no plot file for the frame. tiles gives the (TileWriter, directory) or None
+    of each frame; all frames are added to the animations, which are closed at the end.
+    """
+    if tiles is None:
+        tiles = [None] * len(cubes)
+    with ImageWriter(output) as writer, ExitStack() as stack:
+        for _animation in animations:
+            stack.enter_context(_animation)
+        for _cube, _filename, _tiles in zip(cubes, filenames, tiles):
+            _render_pixel_map_frame(_cube, _filename, writer, _tiles, animations)
+    return filenames
+
+
+def _split(items: list, parts: int) -> list[list]:
+    """split items into at most parts contiguous lists of about the same length"""
+    parts = max(1, min(parts, len(items)))
+    size, rest = divmod(len(items), parts)
+    result = []
+    start = 0
+    for _part in range(parts):
+        stop = start + size + (1 if _part < rest else 0)
+        result.append(items[start:stop])
+        start = stop
+    return result
+
+
+def _series_range(cubes: list) -> tuple:
+    """return the (min, max) tuple of the data of all cubes"""
+    import numpy as np
+
+    vmin = min(np.ma.masked_invalid(_cube.data).min() for _cube in cubes)
+    vmax = max(np.ma.masked_invalid(_cube.data).max() for _cube in cubes)
+    return vmin, vmax
+
+
+def _render_pixel_map_series(
+    cubes: list,
+    filenames: list[str],
+    output: OutputSettings,
+    vmin=None,
+    vmax=None,
+    tiles: list[tuple] = None,
+    animations: list[AnimationWriter] = (),
+) -> list[str]:
+    """render all frames (2D iris cubes) of one model and variable from a single figure
+
+    The figure, projection, coastlines and colorbar are created once for the first frame.
+    All following frames only swap the data of the mesh and update the title. The colour
+    scale is fixed to vmin and vmax, by default the range of the given frames, so that the
+    frames are comparable. With output.background a frame is encoded while the next one is
+    rendered. filenames, tiles and animations as for _render_pixel_map_frames.
+    """
+    import iris.quickplot as qplt
+    import matplotlib.pyplot as plt
+
+    if tiles is None:
+        tiles = [None] * len(cubes)
+    if len(animations) == 0 and all(_filename is None for _filename in filenames):
+        # only the map tiles are needed; they do not need the figure
+        for _cube, _tiles in zip(cubes, tiles):
+            _tiles[0].write(_cube, _tiles[1])
+        return filenames
+    if vmin is None or vmax is None:
+        vmin, vmax = _series_range(cubes)
+    label = filenames[0] or _frame_label(cubes[0])
+    with stage("pcolormesh", file=label):
+        mesh = qplt.pcolormesh(cubes[0], vmin=vmin, vmax=vmax)
+    ax = plt.gca()
+    with stage("coastlines", file=label):
+        ax.coastlines()
+    title = ax.get_title()
+    with ImageWriter(output) as writer, ExitStack() as stack:
+        for _animation in animations:
+            stack.enter_context(_animation)
+        for _cube, _filename, _tiles in zip(cubes, filenames, tiles):
+            if _tiles is not None:
+                _tiles[0].write(_cube, _tiles[1])
+            if _filename is None and len(animations) == 0:
+                continue
+            mesh.set_array(_cube.data)
+            _time = _cube.coord("time").cell(0).point
+            ax.set_title(f"{title} {_time.year}-{_time.month:02}")
+            _write_pixel_map_frame(
+                plt.gcf(),
+                _filename,
+                writer,
+                animations,
+                _filename or _frame_label(_cube),
+            )
+    plt.close()
+    return filenames
 
 
 class Plotting:
     """plotting class with methods for each supported plot"""
 
     __version__ = "0.0.2"
-    DEFAULT_DPI = 300
+    DEFAULT_DPI = DEFAULT_DPI
 
-    def __init__(self, plotdir: [str, Path]):
+    def __init__(
+        self,
+        plotdir: [str, Path],
+        workers: int = 1,
+        manifest: BuildManifest = None,
+        output: OutputSettings = None,
+    ):
         self._plotdir = plotdir
+        # number of worker processes used for rendering; 1 renders serially
+        self._workers = max(1, int(workers))
+        # build manifest used to skip plots whose inputs did not change; None renders all
+        self._manifest = manifest
+        # resolution, format, compression and thumbnails of the plot files
+        self._output = OutputSettings() if output is None else output
+
+    @property
+    def plotdir(self) -> [str, Path]:
+        return self._plotdir
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def output(self) -> OutputSettings:
+        return self._output
+
+    def _filename(self, name: str) -> str:
+        """path of the plot file name (without extension) in the plot directory"""
+        return f"{self._plotdir}/{name}.{self._output.extension}"
+
+    def _save(self, fig, filename: str):
+        """write fig to filename according to the output settings"""
+        print(f"saving file: {filename}")
+        with stage("savefig", file=filename), ImageWriter(self._output) as writer:
+            writer.save(fig, filename)
+
+    def _is_fresh(self, key: str, fingerprint: str) -> bool:
+        if self._manifest is None or not self._manifest.is_fresh(key, fingerprint):
+            return False
+        print(f"skipping unchanged file: {key}")
+        return True
+
+    def _record(self, outputs: dict):
+        """record the fingerprints of the written plots given as {key: (fingerprint, files)}"""
+        if self._manifest is None or len(outputs) == 0:
+            return
+        for _key, (_fingerprint, _files) in outputs.items():
+            self._manifest.record(_key, _fingerprint, _files)
+        self._manifest.save()
+
+    def _render(self, func, tasks: list[tuple], shared=None) -> list:
+        """apply func to all argument tuples in tasks
+
+        uses a process pool if more than one worker was requested. The results are returned
+        in the order of tasks, independent of the number of workers.
+
+        If shared is given, it is passed to func as last argument. It is pickled once and
+        sent to each worker process when it starts instead of with every task.
+        """
+        if self._workers == 1 or len(tasks) <= 1:
+            if shared is not None:
+                return [func(*_task, shared) for _task in tasks]
+            return [func(*_task) for _task in tasks]
+
+        initargs = ()
+        if shared is not None:
+            initargs = (pickle.dumps(shared, protocol=pickle.HIGHEST_PROTOCOL),)
+            func = partial(_call_with_shared, func)
+        # the stages of the workers are collected if profiling is on
+        with PROFILER.workers(), ProcessPoolExecutor(
+            max_workers=min(self._workers, len(tasks)),
+            mp_context=get_context("spawn"),
+            initializer=_init_render_worker,
+            initargs=initargs,
+        ) as executor:
+            return list(executor.map(func, *zip(*tasks)))
 
     def plot_pixel_map(
         self,
-        model_obj: PyaModelData,
+        model_obj: "PyaModelData",
+        template: bool = False,
+        animation: list[str] = None,
+        fps: float = DEFAULT_ANIMATION_FPS,
+        tiles: int = None,
+        frames: bool = True,
     ):
         """method to plot pixelmaps
 
         due to lack of pyaerocom API documentation this uses the iris infrastructure which is also
         retained in pyaerocom's GriddedData object
-        """
 
-        import iris
-        import iris.analysis.cartography
-        import iris.plot as iplt
-        import iris.quickplot as qplt
-        import matplotlib.pyplot as plt
+        The frames (one per model, variable and time step) are rendered by a process pool if
+        the Plotting object was created with workers > 1. Each worker renders a run of
+        consecutive frames and only receives their 2D slices. With background encoding
+        (see OutputSettings) a frame is encoded while the next one is rendered.
+
+        If template is True, the figure is built once per model and variable and reused for
+        all time steps with a colour scale fixed to the range of the whole series.
+
+        The frames can be streamed into other outputs in the same render pass:
+        - animation: formats (mp4, gif, apng) of an animation of all frames of a model and
+          variable with fps frames per second, pixelmap_<model>_<var>_<ts_type>.<format>;
+          the frames of a series are then rendered by the same worker
+        - tiles: maximum zoom level of XYZ map tiles of every frame, written to
+          tiles/pixelmap_<model>_<var>_<ts_type>/<yyyymm>/{z}/{x}/{y}.png with the colour
+          scale of the whole series and described by tiles.json in the same directory
+        With frames False the plot files of the frames are not written.
+
+        With a build manifest only the frames whose data changed are rendered; the other
+        files are kept. An animation is rendered again if any of its frames changed. All
+        file names are returned: plot files, animations and tiles.json files.
+        """
 
         # this will be a monthly plot for now
         # create monthly plot data
         mdata = {}
         ts_type = "monthly"
+        series = []
         for _model in model_obj.models:
             mdata[_model] = {}
             for _var in model_obj.variables:
-                mdata[_model][_var] = model_obj.data[_model][_var].resample_time(
-                    ts_type
-                )
+                # memoized in model_obj, so other plots can reuse the resampled data
+                mdata[_model][_var] = model_obj.resampled(_model, _var, ts_type)
+                cubes = []
+                filenames = []
                 # loop through the resulting time steps
                 for _idx in range(mdata[_model][_var]["time"].points.size):
                     ts_data = mdata[_model][_var][_idx]
-                    filename = f"{self._plotdir}/pixelmap_{_model}_{_var}_m{ts_data['time'].cell(0).point.month:02}{ts_data['time'].cell(0).point.year}_{ts_type}.png"
-                    qplt.pcolormesh(ts_data.cube)
-                    plt.gca().coastlines()
-                    print(f"saving file: {filename}")
-                    plt.savefig(filename, dpi=self.DEFAULT_DPI)
-                    plt.close()
+                    filename = self._filename(
+                        f"pixelmap_{_model}_{_var}_m{ts_data['time'].cell(0).point.month:02}{ts_data['time'].cell(0).point.year}_{ts_type}"
+                    )
+                    cube = ts_data.cube
+                    if cube.has_lazy_data():
+                        # realise the 2D slice here so that a worker does not get
+                        # a dask graph pointing to the whole time series
+                        with stage("load", model=_model, var=_var, frame=_idx):
+                            cube.data = cube.core_data().compute()
+                    cubes.append(cube)
+                    filenames.append(filename)
+                series.append((_model, _var, cubes, filenames))
+
+        all_filenames = []
+        outputs = {}
+        # argument tuples of the render function; one per series with the template or
+        # with animations, the frames of the other series are split over the workers
+        tasks = []
+        # (cube, filename or None, tiles or None) of the other series
+        frames_left = []
+        for _model, _var, _cubes, _filenames in series:
+            if len(_cubes) == 0:
+                continue
+            name = f"pixelmap_{_model}_{_var}_{ts_type}"
+            scale = ()
+            if template or tiles is not None:
+                # the colour scale of a frame depends on the whole series
+                scale = _series_range(_cubes)
+            fingerprints = [
+                self._pixel_map_fingerprint(
+                    _model, _var, ts_type, _cube, template, *(scale if template else ())
+                )
+                for _cube in _cubes
+            ]
+
+            # the plot files to write; None if fresh or not wanted
+            save = [None] * len(_cubes)
+            if frames:
+                all_filenames.extend(_filenames)
+                for _idx, _filename in enumerate(_filenames):
+                    if not self._is_fresh(_filename, fingerprints[_idx]):
+                        save[_idx] = _filename
+                        outputs[_filename] = (fingerprints[_idx], [_filename])
+
+            frame_tiles = [None] * len(_cubes)
+            if tiles is not None:
+                tile_writer = TileWriter(
+                    tiles, *scale, format=self._output.thumbnail_format
+                )
+                tiledir = f"{self._plotdir}/tiles/{name}"
+                labels = [_frame_label(_cube) for _cube in _cubes]
+                for _idx, _label in enumerate(labels):
+                    directory = f"{tiledir}/{_label}"
+                    fingerprint = self._tiles_fingerprint(
+                        fingerprints[_idx], tile_writer, scale
+                    )
+                    if not self._is_fresh(directory, fingerprint):
+                        frame_tiles[_idx] = (tile_writer, directory)
+                        outputs[directory] = (fingerprint, [directory])
+                metadata = f"{tiledir}/tiles.json"
+                tile_writer.write_metadata(
+                    metadata, labels, model=_model, var=_var, units=str(_cubes[0].units)
+                )
+                all_filenames.append(metadata)
+
+            animations = []
+            for _format in animation or []:
+                filename = f"{self._plotdir}/{name}.{ANIMATION_EXTENSIONS[_format]}"
+                all_filenames.append(filename)
+                fingerprint = self._animation_fingerprint(fingerprints, _format, fps)
+                if not self._is_fresh(filename, fingerprint):
+                    animations.append(AnimationWriter(filename, _format, fps))
+                    outputs[filename] = (fingerprint, [filename])
+
+            # an animation needs all frames of the series
+            needed = [
+                _idx
+                for _idx in range(len(_cubes))
+                if len(animations) > 0
+                or save[_idx] is not None
+                or frame_tiles[_idx] is not None
+            ]
+            if len(needed) == 0:
+                continue
+            cubes = [_cubes[_idx] for _idx in needed]
+            filenames = [save[_idx] for _idx in needed]
+            frame_tiles = [frame_tiles[_idx] for _idx in needed]
+            if template:
+                tasks.append(
+                    (cubes, filenames, self._output, *scale, frame_tiles, animations)
+                )
+            elif len(animations) > 0:
+                tasks.append((cubes, filenames, self._output, frame_tiles, animations))
+            else:
+                frames_left.extend(zip(cubes, filenames, frame_tiles))
+
+        if template:
+            self._render(_render_pixel_map_series, tasks)
+        else:
+            # one task of consecutive frames per worker
+            tasks.extend(
+                (
+                    [_cube for _cube, _, _ in _frames],
+                    [_file for _, _file, _ in _frames],
+                    self._output,
+                    [_tiles for _, _, _tiles in _frames],
+                )
+                for _frames in _split(frames_left, self._workers)
+                if len(_frames) > 0
+            )
+            self._render(_render_pixel_map_frames, tasks)
+        self._record(outputs)
+        return all_filenames
+
+    def _pixel_map_fingerprint(
+        self, model: str, var: str, ts_type: str, cube, template: bool, *scale
+    ) -> str:
+        """fingerprint of a single pixelmap frame; based on the frame's data and grid"""
+        if self._manifest is None:
+            return None
+        return self._manifest.fingerprint(
+            plot="pixelmap",
+            model=model,
+            var=var,
+            ts_type=ts_type,
+            template=template,
+            scale=[float(_value) for _value in scale],
+            output=self._output.fingerprint(),
+            data=data_digest(
+                cube.data,
+                cube.coord("latitude").points,
+                cube.coord("longitude").points,
+            ),
+        )
+
+    def _tiles_fingerprint(
+        self, frame_fingerprint: str, tile_writer: TileWriter, scale: tuple
+    ) -> str:
+        """fingerprint of the map tiles of a pixelmap frame"""
+        if self._manifest is None:
+            return None
+        return self._manifest.fingerprint(
+            plot="pixelmap_tiles",
+            frame=frame_fingerprint,
+            maxzoom=tile_writer.maxzoom,
+            format=tile_writer.format,
+            scale=[float(_value) for _value in scale],
+        )
 
-    def plot_weighted_means(self, model_obj: PyaModelData):
-        """method to plot weighted means"""
+    def _animation_fingerprint(
+        self, frame_fingerprints: list[str], format: str, fps: float
+    ) -> str:
+        """fingerprint of the animation of a series of pixelmap frames"""
+        if self._manifest is None:
+            return None
+        return self._manifest.fingerprint(
+            plot="pixelmap_animation",
+            frames=frame_fingerprints,
+            format=format,
+            fps=fps,
+        )
+
+    def plot_weighted_means(self, model_obj: "PyaModelData"):
+        """method to plot weighted means
+
+        the means are taken from model_obj.weighted_mean, so means already read from the
+        cache (see PyaModelData.read_weighted_means) are not computed again
+
+        With a build manifest the plot of a model is only rendered if its means changed.
+        """
 
         # this will be a monthly plot for now
-        # create monthly plot data
-        import iris.analysis.cartography
-        from pyaerocom.helpers import cftime_to_datetime64
+        filenames = []
+        for _model in model_obj.models:
+            filename = self._filename(f"monthlyweightedmean_{_model}")
+            filenames.append(filename)
+            # area weighted means; either computed here or taken from the cache
+            series = {
+                _var: model_obj.weighted_mean(_model, _var)
+                for _var in model_obj.variables
+            }
+            fingerprint = self._series_fingerprint(
+                "monthly_weighted_mean", _model, series
+            )
+            if self._is_fresh(filename, fingerprint):
+                continue
+            self._plot_weighted_mean_series(
+                series,
+                "Global monthly mean speciated AOD at 550nm for the CAMS o-suite",
+                filename,
+            )
+            self._record({filename: (fingerprint, [filename])})
+
+        return filenames
+
+    def plot_regional_weighted_means(
+        self, model_obj: "PyaModelData", regions: list[str] = DEFAULT_REGIONS
+    ):
+        """method to plot the weighted means of regions; one plot per model and region
+
+        the means of all regions are computed together, see PyaModelData.regional_means
+        """
+        filenames = []
+        for _model in model_obj.models:
+            means = model_obj.regional_means(
+                _model, model_obj.variables, regions=regions
+            )
+            for _region, _series in means.items():
+                filename = self._filename(f"monthlyweightedmean_{_model}_{_region}")
+                filenames.append(filename)
+                fingerprint = self._series_fingerprint(
+                    "monthly_weighted_mean_regional", _model, _series, region=_region
+                )
+                if self._is_fresh(filename, fingerprint):
+                    continue
+                self._plot_weighted_mean_series(
+                    _series,
+                    f"{_region} monthly mean speciated AOD at 550nm for the CAMS o-suite",
+                    filename,
+                )
+                self._record({filename: (fingerprint, [filename])})
+
+        return filenames
+
+    def _series_fingerprint(self, plot: str, model: str, series: dict, **inputs):
+        """fingerprint of a plot of the time series {var: (time, mean)}"""
+        if self._manifest is None:
+            return None
+        return self._manifest.fingerprint(
+            plot=plot,
+            model=model,
+            vars=list(series),
+            output=self._output.fingerprint(),
+            data=data_digest(*(_array for _ts in series.values() for _array in _ts)),
+            **inputs,
+        )
+
+    def _plot_weighted_mean_series(self, series: dict, title: str, filename: str):
+        """plot the weighted mean time series {var: (time, mean)} to filename"""
         import matplotlib.pyplot as plt
+        import numpy as np
         from matplotlib.ticker import FuncFormatter
         from matplotlib.dates import MonthLocator, DateFormatter, YearLocator
         from datetime import datetime
 
-        mdata = {}
-        ts_type = "monthly"
-        for _model in model_obj.models:
-            mdata[_model] = {}
-            fig = plt.figure(
-                figsize=(21, 6),
-            )
-            ax = fig.add_subplot(1, 1, 1)
+        fig = plt.figure(
+            figsize=(21, 6),
+        )
+        ax = fig.add_subplot(1, 1, 1)
 
-            plots = []
-            for _var in model_obj.variables:
-                mdata[_model][_var] = model_obj.data[_model][_var].resample_time(
-                    ts_type
-                )
-                weights = mdata[_model][_var].area_weights
-                mean = mdata[_model][_var].cube.collapsed(
-                    ["latitude", "longitude"], iris.analysis.MEAN, weights=weights
-                )
-                # the actual data is in mean.data as masked numpy array
-                time = cftime_to_datetime64(
-                    mean.coord("time").points,
-                    cfunit=str(mean.coord("time").units),
-                    calendar=mean.coord("time").units.calendar,
-                )
-                print(time)
-                if _var == "od550so4":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="sulphate",
-                            color="blue",
-                        )
+        plots = []
+        for _var, (time, mean) in series.items():
+            if _var == "od550so4":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="sulphate",
+                        color="blue",
                     )
-                    maxmean = max(mean.data)
-                elif _var == "od550oa":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="organics",
-                            color="red",
-                        )
+                )
+            elif _var == "od550oa":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="organics",
+                        color="red",
                     )
-                elif _var == "od550bc":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="black carbon",
-                            color="green",
-                        )
+                )
+            elif _var == "od550bc":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="black carbon",
+                        color="green",
                     )
-                elif _var == "od550ss":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="sea salt",
-                            color="purple",
-                        )
+                )
+            elif _var == "od550ss":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="sea salt",
+                        color="purple",
                     )
-                elif _var == "od550dust":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="dust",
-                            color="orange",
-                        )
+                )
+            elif _var == "od550dust":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="dust",
+                        color="orange",
                     )
-                elif _var == "od550no3":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="nitrate",
-                            color="brown",
-                        )
+                )
+            elif _var == "od550no3":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="nitrate",
+                        color="brown",
                     )
-                elif _var == "od550nh4":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="ammonium",
-                            color="cyan",
-                        )
+                )
+            elif _var == "od550nh4":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="ammonium",
+                        color="cyan",
                     )
-                elif _var == "od550soa":
-                    plots.append(
-                        ax.plot(
-                            time,
-                            mean.data,
-                            linewidth=2.0,
-                            marker="o",
-                            label="sec organics",
-                            color="magenta",
-                        )
+                )
+            elif _var == "od550soa":
+                plots.append(
+                    ax.plot(
+                        time,
+                        mean,
+                        linewidth=2.0,
+                        marker="o",
+                        label="sec organics",
+                        color="magenta",
                     )
+                )
+
+        plt.title(title)
+        plt.ylabel("weighted mean")
+        ax.legend(loc="upper left", fontsize=10)
+        # plt.xlabel("time")
+        ax = plt.gca()
+        ax.grid(color="#DDDDDD", linestyle="dashed")
+        ax.set_ylim(ymin=0)
+        month_fmt = DateFormatter("%b")
+
+        def m_fmt(x, pos=None):
+            return month_fmt(x)[0]
+
+        ax.xaxis.set_major_locator(MonthLocator(bymonth=[2, 4, 6, 8, 10, 12]))
+        ax.xaxis.set_major_formatter(FuncFormatter(m_fmt))
+        # add second x-axis with Years
+        sec_xaxis = ax.secondary_xaxis(-0.1)
+        sec_xaxis.xaxis.set_major_locator(YearLocator(month=7))
+        sec_xaxis.xaxis.set_major_formatter(DateFormatter("%Y"))
+        # Hide the second x-axis spines and ticks
+        sec_xaxis.spines["bottom"].set_visible(False)
+        sec_xaxis.tick_params(length=0, labelsize=14, pad=-3)
+
+        # the model cycle labels are placed at the maximum of all plotted series
+        values = np.concatenate(
+            [
+                np.ma.filled(np.ma.asarray(_line.get_ydata(), dtype=float), np.nan)
+                for _line in ax.get_lines()
+            ]
+            + [[np.nan]]
+        )
+        maxmean = np.nanmax(values) if np.isfinite(values).any() else 0.0
+        ax.axvline(datetime(2023, 6, 27), color="black", linestyle="--")
+        ax.text(datetime(2023, 6, 27), maxmean, "48r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2021, 10, 13), color="black", linestyle="--")
+        ax.text(datetime(2021, 10, 13), maxmean, "47r3", ha="center", fontsize=10)
+        ax.axvline(datetime(2021, 5, 19), color="black", linestyle="--")
+        ax.text(datetime(2021, 5, 19), maxmean, "47r2", ha="center", fontsize=10)
+        ax.axvline(datetime(2020, 10, 6), color="black", linestyle="--")
+        ax.text(datetime(2020, 10, 6), maxmean, "47r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2019, 7, 9), color="black", linestyle="--")
+        ax.text(datetime(2019, 7, 9), maxmean, "46r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2018, 6, 26), color="black", linestyle="--")
+        ax.text(datetime(2018, 6, 26), maxmean, "45r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2017, 9, 26), color="black", linestyle="--")
+        ax.text(datetime(2017, 9, 26), maxmean, "43r3", ha="center", fontsize=10)
+        ax.axvline(datetime(2017, 1, 24), color="black", linestyle="--")
+        ax.text(datetime(2017, 1, 24), maxmean, "43r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2016, 6, 21), color="black", linestyle="--")
+        ax.text(datetime(2016, 6, 21), maxmean, "41r2", ha="center", fontsize=10)
+        ax.axvline(datetime(2015, 9, 3), color="black", linestyle="--")
+        ax.text(datetime(2015, 9, 3), maxmean, "41r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2014, 9, 18), color="black", linestyle="--")
+        ax.text(datetime(2014, 9, 18), maxmean, "40r2", ha="center", fontsize=10)
+        ax.axvline(datetime(2014, 2, 19), color="black", linestyle="--")
+        ax.text(datetime(2014, 2, 19), maxmean, "40r1", ha="center", fontsize=10)
+        ax.axvline(datetime(2013, 10, 7), label="38r2", color="black", linestyle="--")
+        ax.text(datetime(2013, 10, 7), maxmean, "38r2", ha="center", fontsize=10)
+        # ax.axvline(datetime(2012,7,5),color='black',linestyle='--')
+        # ax.text(datetime(2012,7,5), max(mean.data),'37r3', ha='center')
+        # ax.axvline(datetime(2009,9,1),color='black',linestyle='--')
+        # ax.text(datetime(2009,9,1), max(mean.data),'36r1', ha='center')
+        self._save(fig, filename)
+        plt.close()
+
+    def plot_colocated_scatter(
+        self,
+        colocated_obj: "PyaColocatedData",
+        bins: int = DEFAULT_SCATTER_BINS,
+        kind: str = DEFAULT_SCATTER_KIND,
+        log: bool = False,
+        range: tuple = None,
+    ):
+        """method to plot the density of model vs. observation values of colocated data
+
+        one plot per variable, model, obs network and ts_type. The pairs are binned
+        (see PyaColocatedData.scatter) and only the bins are drawn, so the time to
+        render does not depend on the number of pairs. Groups without valid pairs are
+        skipped.
+
+        With a build manifest a plot is only rendered if the files of its group or the
+        options changed; this is checked before the files are read.
+        """
+        filenames = []
+        for _var, _model, _obs, _ts_type in colocated_obj.groups:
+            filename = self._filename(f"scatter_{_var}_{_model}_{_obs}_{_ts_type}")
+            fingerprint = None
+            if self._manifest is not None:
+                fingerprint = self._manifest.fingerprint(
+                    plot="scatter_density",
+                    range=range,
+                    bins=bins,
+                    kind=kind,
+                    log=log,
+                    output=self._output.fingerprint(),
+                    files=file_info(
+                        colocated_obj.group_files(_var, _model, _obs, _ts_type)
+                    ),
+                )
+            if self._is_fresh(filename, fingerprint):
+                filenames.append(filename)
+                continue
+            try:
+                scatter = colocated_obj.scatter(
+                    _var,
+                    _model,
+                    _obs,
+                    _ts_type,
+                    bins=bins,
+                    kind=kind,
+                    log=log,
+                    range=range,
+                )
+            except ValueError as e:
+                print(
+                    f"skipping scatter of {_var} {_model} vs. {_obs} ({_ts_type}): {e}"
+                )
+                continue
+            filenames.append(filename)
+            self._plot_scatter(
+                scatter,
+                f"{_var} {_model} vs. {_obs} ({_ts_type})",
+                f"{_obs} {_var}",
+                f"{_model} {_var}",
+                filename,
+            )
+            self._record({filename: (fingerprint, [filename])})
+
+        return filenames
+
+    def _plot_scatter(
+        self,
+        scatter: "ScatterStats",
+        title: str,
+        xlabel: str,
+        ylabel: str,
+        filename: str,
+    ):
+        """plot the density and statistics of scatter to filename"""
+        import matplotlib.pyplot as plt
+        import numpy as np
+        from matplotlib.collections import PolyCollection
+        from matplotlib.colors import LogNorm
 
-            plt.title("Global monthly mean speciated AOD at 550nm for the CAMS o-suite")
-            plt.ylabel("weighted mean")
-            ax.legend(loc="upper left", fontsize=10)
-            # plt.xlabel("time")
-            ax = plt.gca()
-            ax.grid(color="#DDDDDD", linestyle="dashed")
-            ax.set_ylim(ymin=0)
-            month_fmt = DateFormatter("%b")
-
-            def m_fmt(x, pos=None):
-                return month_fmt(x)[0]
-
-            ax.xaxis.set_major_locator(MonthLocator(bymonth=[2, 4, 6, 8, 10, 12]))
-            ax.xaxis.set_major_formatter(FuncFormatter(m_fmt))
-            # add second x-axis with Years
-            sec_xaxis = ax.secondary_xaxis(-0.1)
-            sec_xaxis.xaxis.set_major_locator(YearLocator(month=7))
-            sec_xaxis.xaxis.set_major_formatter(DateFormatter("%Y"))
-            # Hide the second x-axis spines and ticks
-            sec_xaxis.spines["bottom"].set_visible(False)
-            sec_xaxis.tick_params(length=0, labelsize=14, pad=-3)
-
-            print(max(mean.data))
-            ax.axvline(datetime(2023, 6, 27), color="black", linestyle="--")
-            ax.text(datetime(2023, 6, 27), maxmean, "48r1", ha="center", fontsize=10)
-            ax.axvline(datetime(2021, 10, 13), color="black", linestyle="--")
-            ax.text(datetime(2021, 10, 13), maxmean, "47r3", ha="center", fontsize=10)
-            ax.axvline(datetime(2021, 5, 19), color="black", linestyle="--")
-            ax.text(datetime(2021, 5, 19), maxmean, "47r2", ha="center", fontsize=10)
-            ax.axvline(datetime(2020, 10, 6), color="black", linestyle="--")
-            ax.text(datetime(2020, 10, 6), maxmean, "47r1", ha="center", fontsize=10)
-            ax.axvline(datetime(2019, 7, 9), color="black", linestyle="--")
-            ax.text(datetime(2019, 7, 9), maxmean, "46r1", ha="center", fontsize=10)
-            ax.axvline(datetime(2018, 6, 26), color="black", linestyle="--")
-            ax.text(datetime(2018, 6, 26), maxmean, "45r1", ha="center", fontsize=10)
-            ax.axvline(datetime(2017, 9, 26), color="black", linestyle="--")
-            ax.text(datetime(2017, 9, 26), maxmean, "43r3", ha="center", fontsize=10)
-            ax.axvline(datetime(2017, 1, 24), color="black", linestyle="--")
-            ax.text(datetime(2017, 1, 24), maxmean, "43r1", ha="center", fontsize=10)
-            ax.axvline(datetime(2016, 6, 21), color="black", linestyle="--")
-            ax.text(datetime(2016, 6, 21), maxmean, "41r2", ha="center", fontsize=10)
-            ax.axvline(datetime(2015, 9, 3), color="black", linestyle="--")
-            ax.text(datetime(2015, 9, 3), maxmean, "41r1", ha="center", fontsize=10)
-            ax.axvline(datetime(2014, 9, 18), color="black", linestyle="--")
-            ax.text(datetime(2014, 9, 18), maxmean, "40r2", ha="center", fontsize=10)
-            ax.axvline(datetime(2014, 2, 19), color="black", linestyle="--")
-            ax.text(datetime(2014, 2, 19), maxmean, "40r1", ha="center", fontsize=10)
-            ax.axvline(
-                datetime(2013, 10, 7), label="38r2", color="black", linestyle="--"
+        fig = plt.figure(figsize=(8, 7))
+        ax = fig.add_subplot(1, 1, 1)
+        counts = scatter.counts
+        norm = LogNorm(vmin=1, vmax=max(1, counts.max()))
+        # the bins are drawn as one image, also in vector formats
+        if scatter.kind == "hist":
+            edges = scatter.edges
+            mesh = ax.pcolormesh(
+                edges,
+                edges,
+                np.ma.masked_equal(counts, 0).T,
+                norm=norm,
+                rasterized=True,
+            )
+        else:
+            vertices, cell_counts = scatter.hexagons()
+            mesh = PolyCollection(
+                vertices, array=cell_counts, norm=norm, edgecolors="face"
             )
-            ax.text(datetime(2013, 10, 7), maxmean, "38r2", ha="center", fontsize=10)
-            # ax.axvline(datetime(2012,7,5),color='black',linestyle='--')
-            # ax.text(datetime(2012,7,5), max(mean.data),'37r3', ha='center')
-            # ax.axvline(datetime(2009,9,1),color='black',linestyle='--')
-            # ax.text(datetime(2009,9,1), max(mean.data),'36r1', ha='center')
-            filename = f"{self._plotdir}/monthlyweightedmean_{_model}.png"
-            print(f"saving file: {filename}")
-            plt.savefig(filename, dpi=self.DEFAULT_DPI)
-            plt.close()
+            mesh.set_rasterized(True)
+            ax.add_collection(mesh)
+        fig.colorbar(mesh, ax=ax, label="number of pairs")
+
+        limits = (scatter.vmin, scatter.vmax)
+        ax.plot(limits, limits, color="black", linewidth=1.0, linestyle="--")
+        if scatter.log:
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+        ax.set_xlim(limits)
+        ax.set_ylim(limits)
+        ax.set_aspect("equal")
+        ax.set_axisbelow(True)
+        ax.grid(color="#DDDDDD", linestyle="dashed")
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+
+        stats = scatter.statistics
+        ax.text(
+            0.03,
+            0.97,
+            "\n".join(
+                [
+                    f"N = {stats['n']}",
+                    f"bias = {stats['bias']:.3g}",
+                    f"NMB = {100 * stats['nmb']:.1f}%",
+                    f"RMSE = {stats['rmse']:.3g}",
+                    f"R = {stats['r']:.3f}",
+                    f"FGE = {stats['fge']:.3f}",
+                ]
+            ),
+            transform=ax.transAxes,
+            va="top",
+            fontsize=10,
+            bbox={"facecolor": "white", "alpha": 0.8, "edgecolor": "#DDDDDD"},
+        )
+        self._save(fig, filename)
+        plt.close(fig)
 
     def plot_aeroval_overall_time_series_SU_Paper(
         self,
-        json_data: AerovalJsonData,
+        json_data: "AerovalJsonData",
         stat_prop: str = "data_mean",
         title: str = None,
         colours: list[str] = [],
@@ -269,26 +923,21 @@ class Plotting:
         # ax = fig.add_axes([0.15, 0.15, 0.8, 0.75])
 
         plots = []
-        # [file][_var][_obsnetwork][_code][_model][_modelvar]
-        mdata = json_data.data[json_data.files[0]][json_data.vars[0]][
-            json_data.obsnetworks[0]
-        ][json_data.code[0]]
         # to get the right model order
         models = ["ATSR2", "AATSR", "SLSTR.SU.A", "SLSTR.SU.B"]
         # for _midx, _model in enumerate(sorted(json_data.models)):
         for _midx, _model in enumerate(models):
-            # does not work without the conversion to integer in between
-            ts = np.array(
-                list(mdata[_model][json_data.modelvars[0]][json_data.regions[0]]),
-                dtype=int,
-            ).astype("datetime64[ms]")
-            ts_keys = list(mdata[_model][json_data.modelvars[0]][json_data.regions[0]])
-            ts_vals = [
-                mdata[_model][json_data.modelvars[0]][json_data.regions[0]][x][
-                    stat_prop
-                ]
-                for x in ts_keys
-            ]
+            # columnar view of [_var][_obsnetwork][_code][_model][_modelvar][_region]
+            ts_data = json_data.columns(
+                json_data.vars[0],
+                json_data.obsnetworks[0],
+                json_data.code[0],
+                _model,
+                json_data.modelvars[0],
+                json_data.regions[0],
+            )
+            ts = ts_data.time
+            ts_vals = ts_data[stat_prop]
             try:
                 label = LABEL_SUBSTITUTES[_model]
                 color = COLOURS[label]
@@ -300,12 +949,7 @@ class Plotting:
             if stat_prop == "data_mean":
                 # get color of last plot
                 last_color = plots[-1][0].get_color()
-                ts_vals = [
-                    mdata[_model][json_data.modelvars[0]][json_data.regions[0]][x][
-                        "refdata_mean"
-                    ]
-                    for x in ts_keys
-                ]
+                ts_vals = ts_data["refdata_mean"]
                 plots.append(
                     ax.plot(
                         ts,
@@ -317,7 +961,7 @@ class Plotting:
                     )
                 )
 
-        ts_vals = [np.nan for x in range(len(ts_vals))]
+        ts_vals = np.full(len(ts_vals), np.nan)
         ax.plot(
             ts,
             ts_vals,
@@ -338,79 +982,380 @@ class Plotting:
         else:
             plt.title(title)
 
-        filename = f"{self._plotdir}/overallts_{json_data.vars[0]}_{stat_prop}_{json_data.obsnetworks[0]}_{json_data.code[0]}.png"
-        print(f"saving file: {filename}")
-        plt.savefig(filename, dpi=self.DEFAULT_DPI)
+        filename = self._filename(
+            f"overallts_{json_data.vars[0]}_{stat_prop}_{json_data.obsnetworks[0]}_{json_data.code[0]}"
+        )
+        self._save(fig, filename)
         plt.close()
         # plt.show()
         # print(_midx)
+        return [filename]
 
+    def plot_aeroval_overall_time_series(
+        self,
+        json_data: "AerovalJsonData",
+        stat_prop: str = "data_mean",
+        title: str = None,
+    ):
+        """method to plot the time series plot from aeroval's overall evaluation"""
+        import matplotlib.pyplot as plt
 
-def plot_aeroval_overall_time_series(
-    self,
-    json_data: AerovalJsonData,
-    stat_prop: str = "data_mean",
-    title: str = None,
-):
-    """method to plot the time series plot from aeroval's overall evaluation"""
-    import matplotlib.pyplot as plt
-    import numpy as np
+        # fig, ax = plt.subplots()
+        fig = plt.figure(figsize=(16, 9), layout="constrained")
+        ax = fig.add_subplot(1, 1, 1)
+        # ax = fig.add_axes([0.15, 0.15, 0.8, 0.75])
 
-    # fig, ax = plt.subplots()
-    fig = plt.figure(figsize=(16, 9), layout="constrained")
-    ax = fig.add_subplot(1, 1, 1)
-    # ax = fig.add_axes([0.15, 0.15, 0.8, 0.75])
-
-    plots = []
-    # [file][_var][_obsnetwork][_code][_model][_modelvar]
-    mdata = json_data.data[json_data.files[0]][json_data.vars[0]][
-        json_data.obsnetworks[0]
-    ][json_data.code[0]]
-    for _midx, _model in enumerate(json_data.models):
-        # does not work without the conversion to integer in between
-        ts = np.array(
-            list(mdata[_model][json_data.modelvars[0]][json_data.regions[0]]),
-            dtype=int,
-        ).astype("datetime64[ms]")
-        ts_keys = list(mdata[_model][json_data.modelvars[0]][json_data.regions[0]])
-        ts_vals = [
-            mdata[_model][json_data.modelvars[0]][json_data.regions[0]][x][stat_prop]
-            for x in ts_keys
+        plots = []
+        # json_data.models holds every model once
+        for _midx, _model in enumerate(json_data.models):
+            path = (
+                json_data.vars[0],
+                json_data.obsnetworks[0],
+                json_data.code[0],
+                _model,
+                json_data.modelvars[0],
+                json_data.regions[0],
+            )
+            if not json_data.has_leaf(*path):
+                continue
+            # columnar view of [_var][_obsnetwork][_code][_model][_modelvar][_region]
+            ts_data = json_data.columns(*path)
+            ts = ts_data.time
+            ts_vals = ts_data[stat_prop]
+            plots.append(ax.plot(ts, ts_vals, linewidth=2.0, label=_model))
+            # add reference data if the plot property is "data_mean"
+            if stat_prop == "data_mean":
+                # get color of last plot
+                last_color = plots[-1][0].get_color()
+                ts_vals = ts_data["refdata_mean"]
+                plots.append(
+                    ax.plot(
+                        ts,
+                        ts_vals,
+                        linewidth=2.0,
+                        c=last_color,
+                        ls="dotted",
+                        label=f"ref {_model}",
+                    )
+                )
+
+        ax.legend()
+        plt.xlabel("time")
+        plt.ylabel(json_data.modelvars[0])
+        if title is None:
+            plt.title(json_data.regions[0])
+        else:
+            plt.title(title)
+
+        filename = self._filename(
+            f"overallts_{json_data.vars[0]}_{stat_prop}_{json_data.obsnetworks[0]}_{json_data.code[0]}"
+        )
+        self._save(fig, filename)
+        plt.close()
+        # plt.show()
+        # print(_midx)
+        return [filename]
+
+    def plot_aeroval_overall_time_series_grid(
+        self,
+        json_data: "AerovalJsonData",
+        stat_prop: str = "data_mean",
+        title: str = None,
+        regions: list[str] = None,
+    ):
+        """method to plot the overall time series of several files and regions in one
+        figure: one row per file, one column per region
+
+        regions defaults to all regions of the files; regions not in the files are left
+        out, without any of them nothing is plotted
+        """
+        import matplotlib.pyplot as plt
+
+        files = json_data.files
+        if regions is None:
+            regions = json_data.regions
+        else:
+            unknown = [
+                _region for _region in regions if _region not in json_data.regions
+            ]
+            if len(unknown) > 0:
+                print(f"regions {' '.join(unknown)} not found in the files")
+            regions = [_region for _region in regions if _region in json_data.regions]
+        if len(regions) == 0:
+            return []
+        panels = [
+            [(_file, _region, stat_prop) for _region in regions] for _file in files
+        ]
+        row_labels = [
+            " ".join(
+                json_data.keys(_level, _file)[0] for _level in ("var", "obsnetwork")
+            )
+            for _file in files
+        ]
+        fig = self._draw_overall_ts_grid(
+            json_data, panels, row_labels, column_labels=regions, title=title
+        )[0]
+
+        names = [
+            "_".join(dict.fromkeys(json_data.keys(_level, _file)[0] for _file in files))
+            for _level in ("var", "obsnetwork")
         ]
-        plots.append(ax.plot(ts, ts_vals, linewidth=2.0, label=_model))
-        # add reference data if the plot property is "data_mean"
-        if stat_prop == "data_mean":
-            # get color of last plot
-            last_color = plots[-1][0].get_color()
-            ts_vals = [
-                mdata[_model][json_data.modelvars[0]][json_data.regions[0]][x][
-                    "refdata_mean"
+        filename = self._filename(f"overallts_grid_{stat_prop}_{'_'.join(names)}")
+        self._save(fig, filename)
+        plt.close(fig)
+        return [filename]
+
+    def plot_aeroval_overall_time_series_regions(
+        self,
+        json_data: "AerovalJsonData",
+        stat_prop: str = "data_mean",
+        title: str = None,
+        regions: list[str] = None,
+        split: bool = False,
+    ):
+        """method to plot the overall time series of all regions of a file as small
+        multiples in one figure; one figure per file
+
+        regions defaults to all regions of the file. All panels share the axes and the
+        legend. With split the figure is drawn once and cut into one file per region
+        plus one file of the legend instead of writing the whole figure.
+        """
+        import matplotlib.pyplot as plt
+        import numpy as np
+
+        filenames = []
+        for _file in json_data.files:
+            file_regions = json_data.keys("region", _file)
+            if regions is not None:
+                file_regions = [
+                    _region for _region in regions if _region in file_regions
                 ]
-                for x in ts_keys
+            if len(file_regions) == 0:
+                continue
+            ncols = int(np.ceil(np.sqrt(len(file_regions))))
+            rows = [
+                file_regions[_idx : _idx + ncols]
+                for _idx in range(0, len(file_regions), ncols)
             ]
-            plots.append(
-                ax.plot(
-                    ts,
-                    ts_vals,
-                    linewidth=2.0,
-                    c=last_color,
-                    ls="dotted",
-                    label=f"ref {_model}",
-                )
+            fig, axes, legend = self._draw_overall_ts_grid(
+                json_data,
+                [[(_file, _region, stat_prop) for _region in _row] for _row in rows],
+                title=title,
+                panel_titles=rows,
+                sharey=True,
             )
+            var, obsnetwork, code = (
+                json_data.keys(_level, _file)[0]
+                for _level in ("var", "obsnetwork", "code")
+            )
+            name = f"overallts_{var}_{stat_prop}_{obsnetwork}_{code}"
+            if split:
+                # every file is a complete plot: show the labels hidden by shared axes
+                for _ax in axes.flat:
+                    _ax.xaxis.set_tick_params(labelbottom=True)
+                    _ax.yaxis.set_tick_params(labelleft=True)
+                parts = {
+                    self._filename(f"{name}_{_region}"): _ax
+                    for _row, _axes_row in zip(rows, axes)
+                    for _region, _ax in zip(_row, _axes_row)
+                }
+                parts[self._filename(f"{name}_legend")] = legend
+                for _filename in parts:
+                    print(f"saving file: {_filename}")
+                with stage("savefig", file=name), ImageWriter(self._output) as writer:
+                    writer.save_parts(fig, parts)
+                filenames.extend(parts)
+            else:
+                filename = self._filename(f"{name}_regions")
+                self._save(fig, filename)
+                filenames.append(filename)
+            plt.close(fig)
+        return filenames
 
-    ax.legend()
-    plt.xlabel("time")
-    plt.ylabel(json_data.modelvars[0])
-    if title is None:
-        plt.title(json_data.regions[0])
-    else:
-        plt.title(title)
+    def plot_aeroval_overall_time_series_stats(
+        self,
+        json_data: "AerovalJsonData",
+        stat_props: list[str] = None,
+        title: str = None,
+        regions: list[str] = None,
+        split: bool = False,
+    ):
+        """method to plot several statistics of the overall time series as stacked
+        panels with a shared time axis; one figure per file and region
 
-    filename = f"{self._plotdir}/overallts_{json_data.vars[0]}_{stat_prop}_{json_data.obsnetworks[0]}_{json_data.code[0]}.png"
-    print(f"saving file: {filename}")
-    plt.savefig(filename, dpi=self.DEFAULT_DPI)
-    plt.close()
-    # plt.show()
-    # print(_midx)
-    pass
+        stat_props defaults to DEFAULT_STAT_PROPS, regions to all regions of the file.
+        Statistics without any data in the file are left out. With split the figure is
+        drawn once and cut into one file per statistic plus one file of the legend.
+        """
+        import matplotlib.pyplot as plt
+        import numpy as np
+
+        if stat_props is None:
+            stat_props = DEFAULT_STAT_PROPS
+        filenames = []
+        for _file in json_data.files:
+            # all statistics of a leaf are taken from its table at once
+            has_data = np.zeros(len(stat_props), dtype=bool)
+            for _path in json_data.paths(_file):
+                block = json_data.columns(*_path, file=_file).select(stat_props)
+                has_data |= np.isfinite(block).any(axis=1)
+            for _stat_prop in np.array(stat_props)[~has_data]:
+                print(f"statistic {_stat_prop} not found in file {_file}")
+            file_stats = [_stat for _stat, _has in zip(stat_props, has_data) if _has]
+            if len(file_stats) == 0:
+                continue
+            file_regions = json_data.keys("region", _file)
+            if regions is not None:
+                file_regions = [
+                    _region for _region in regions if _region in file_regions
+                ]
+            var, obsnetwork, code = (
+                json_data.keys(_level, _file)[0]
+                for _level in ("var", "obsnetwork", "code")
+            )
+            for _region in file_regions:
+                fig, axes, legend = self._draw_overall_ts_grid(
+                    json_data,
+                    [[(_file, _region, _stat_prop)] for _stat_prop in file_stats],
+                    row_labels=file_stats,
+                    column_labels=[_region],
+                    title=title,
+                    panel_size=(8, 2),
+                )
+                if split:
+                    # every file is a complete plot
+                    for _ax in axes.flat:
+                        _ax.xaxis.set_tick_params(labelbottom=True)
+                        _ax.set_title(_region)
+                    parts = {
+                        self._filename(
+                            f"overallts_stats_{var}_{_stat_prop}_{obsnetwork}_{code}_{_region}"
+                        ): _ax
+                        for _stat_prop, _ax in zip(file_stats, axes[:, 0])
+                    }
+                    parts[
+                        self._filename(
+                            f"overallts_stats_{var}_{obsnetwork}_{code}_{_region}_legend"
+                        )
+                    ] = legend
+                    for _filename in parts:
+                        print(f"saving file: {_filename}")
+                    with stage("savefig", file=_region), ImageWriter(
+                        self._output
+                    ) as writer:
+                        writer.save_parts(fig, parts)
+                    filenames.extend(parts)
+                else:
+                    filename = self._filename(
+                        f"overallts_stats_{var}_{obsnetwork}_{code}_{_region}"
+                    )
+                    self._save(fig, filename)
+                    filenames.append(filename)
+                plt.close(fig)
+        return filenames
+
+    def _draw_overall_ts_grid(
+        self,
+        json_data: "AerovalJsonData",
+        panels: list[list[tuple]],
+        row_labels: list[str] = (),
+        column_labels: list[str] = (),
+        title: str = None,
+        panel_titles: list[list[str]] = (),
+        sharey: [bool, str] = "row",
+        panel_size: tuple = (4, 2.5),
+    ) -> tuple:
+        """draw the overall time series of a grid of panels in one figure
+
+        panels are rows of (file, region, stat_prop); every panel shows all models of the
+        file. A statistic data_<x> is shown together with the reference refdata_<x> if
+        the file has it (e.g. data_mean and refdata_mean). Colours, line styles, the date
+        axis and the legend are set up once for the whole grid; sharey is passed to
+        plt.subplots, panel_size is the (width, height) of a panel in inches. The labels
+        of the rows and columns are set on the first column and row, panel_titles (same
+        shape as panels) on every panel. Returns the figure, the axes (2D array) and the
+        figure legend.
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+
+        nrows, ncols = len(panels), max(len(_row) for _row in panels)
+        fig, axes = plt.subplots(
+            nrows,
+            ncols,
+            figsize=(1 + panel_size[0] * ncols, 1 + panel_size[1] * nrows),
+            sharex=True,
+            sharey=sharey,
+            squeeze=False,
+            layout="constrained",
+        )
+        # one colour per model for all panels
+        cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+        colours = {
+            _model: cycle[_idx % len(cycle)]
+            for _idx, _model in enumerate(json_data.models)
+        }
+        line_style = {"linewidth": 1.5}
+        ref_style = {"linewidth": 1.5, "ls": "dotted"}
+        # the axes share the x axis, so its locator and formatter are set only once
+        locator = AutoDateLocator()
+        axes[0, 0].xaxis.set_major_locator(locator)
+        axes[0, 0].xaxis.set_major_formatter(ConciseDateFormatter(locator))
+
+        legend = {}
+        for _row_idx, (_row, _axes_row) in enumerate(zip(panels, axes)):
+            for (_file, _region, _stat_prop), _ax in zip(_row, _axes_row):
+                var, obsnetwork, code, modelvar = (
+                    json_data.keys(_level, _file)[0]
+                    for _level in ("var", "obsnetwork", "code", "modelvar")
+                )
+                for _model in json_data.keys("model", _file):
+                    path = (var, obsnetwork, code, _model, modelvar, _region)
+                    if not json_data.has_leaf(*path, file=_file):
+                        continue
+                    ts_data = json_data.columns(*path, file=_file)
+                    if _stat_prop not in ts_data:
+                        continue
+                    (line,) = _ax.plot(
+                        ts_data.time,
+                        ts_data[_stat_prop],
+                        color=colours[_model],
+                        label=_model,
+                        **line_style,
+                    )
+                    legend.setdefault(_model, line)
+                    # add the reference data of data_<x> statistics
+                    ref_stat = f"ref{_stat_prop}"
+                    if _stat_prop.startswith("data_") and ref_stat in ts_data:
+                        (line,) = _ax.plot(
+                            ts_data.time,
+                            ts_data[ref_stat],
+                            color=colours[_model],
+                            label=f"ref {_model}",
+                            **ref_style,
+                        )
+                        legend.setdefault(f"ref {_model}", line)
+                _ax.grid(color="#DDDDDD", linestyle="dashed")
+            # panels missing in a shorter row stay empty; the panels above them get
+            # the date labels
+            for _column in range(len(_row), ncols):
+                _axes_row[_column].set_visible(False)
+                if _row_idx > 0:
+                    axes[_row_idx - 1, _column].xaxis.set_tick_params(labelbottom=True)
+
+        for _ax, _label in zip(axes[0], column_labels):
+            _ax.set_title(_label)
+        for _ax, _label in zip(axes[:, 0], row_labels):
+            _ax.set_ylabel(_label)
+        for _titles, _axes_row in zip(panel_titles, axes):
+            for _title, _ax in zip(_titles, _axes_row):
+                _ax.set_title(_title)
+        legend = fig.legend(
+            legend.values(),
+            legend.keys(),
+            loc="outside lower center",
+            ncols=min(len(legend), 6),
+        )
+        if title is not None:
+            fig.suptitle(title)
+        return fig, axes, legend
@@ -0,0 +1,271 @@
+"""
+per stage timing and memory instrumentation
+
+The stages of a run (reading a variable, resampling, the area weighted mean, drawing the
+coastlines, saving a figure, ...) are wrapped in the stage context manager:
+
+    with stage("savefig", model=model, var=var, frame=filename):
+        plt.savefig(filename)
+
+Profiling is off by default; then stage costs one attribute lookup. When it is on
+(PROFILER.enable(), --profile of the command line scripts), every stage records its
+wall time, the resident memory at start and end and the peak resident memory of the
+process, tagged with the given keywords. Render worker processes started while profiling
+is on record their stages as well; they are collected by the parent process, see
+Profiler.collect.
+
+OBS: this module is imported by the command line scripts for argument parsing and must
+only import the standard library.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# directory for the events of worker processes; set while profiling is on
+PROFILE_DIR_ENV = "PYAEROCOM_PLOTTING_PROFILE_DIR"
+
+
+def _rss_mb() -> float:
+    """current resident memory of the process in MB; the peak if it is not available"""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    """peak resident memory of the process in MB"""
+    try:
+        import resource
+    except ImportError:
+        # not available on windows
+        return 0.0
+    # ru_maxrss is in kB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Profiler:
+    """records the stages of a run"""
+
+    def __init__(self):
+        self._enabled = False
+        self._events = []
+        self._lock = threading.Lock()
+        # nesting depth of the stages per thread
+        self._local = threading.local()
+        # events of worker processes are appended to a file in this directory
+        self._worker_dir = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def events(self) -> list[dict]:
+        with self._lock:
+            return list(self._events)
+
+    def enable(self, worker_dir: str = None):
+        """start recording
+
+        if worker_dir is given, the events are also written to a file in worker_dir; used
+        in worker processes
+        """
+        self._enabled = True
+        self._worker_dir = worker_dir
+
+    def disable(self):
+        self._enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._events = []
+
+    def stage(self, name: str, **tags):
+        """context manager timing the stage name; tags (e.g. model, var) are recorded
+        with it"""
+        if not self._enabled:
+            return nullcontext()
+        return self._stage(name, tags)
+
+    @contextmanager
+    def _stage(self, name: str, tags: dict):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        rss_start = _rss_mb()
+        wall_start = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._local.depth = depth
+            event = {
+                "name": name,
+                "tags": {_key: str(_value) for _key, _value in tags.items()},
+                "start": wall_start,
+                "duration": duration,
+                "depth": depth,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "rss_start_mb": rss_start,
+                "rss_end_mb": _rss_mb(),
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+            with self._lock:
+                self._events.append(event)
+            if self._worker_dir is not None:
+                filename = os.path.join(self._worker_dir, f"{os.getpid()}.jsonl")
+                with open(filename, "a") as fh:
+                    fh.write(json.dumps(event) + "\n")
+
+    @contextmanager
+    def workers(self):
+        """let worker processes started in this context record their stages
+
+        the events of the workers are added to the events of this process at the end
+        """
+        if not self._enabled:
+            yield
+            return
+        from tempfile import TemporaryDirectory
+
+        with TemporaryDirectory(prefix="pyaerocom_plotting_profile_") as tmp_dir:
+            previous = os.environ.get(PROFILE_DIR_ENV)
+            os.environ[PROFILE_DIR_ENV] = tmp_dir
+            try:
+                yield
+            finally:
+                if previous is None:
+                    del os.environ[PROFILE_DIR_ENV]
+                else:
+                    os.environ[PROFILE_DIR_ENV] = previous
+                self.collect(tmp_dir)
+
+    def collect(self, worker_dir: str):
+        """add the events written by worker processes to worker_dir"""
+        events = []
+        for _file in sorted(os.listdir(worker_dir)):
+            with open(os.path.join(worker_dir, _file)) as fh:
+                events.extend(json.loads(_line) for _line in fh if _line.strip())
+        with self._lock:
+            self._events.extend(events)
+
+    def summary(self) -> list[dict]:
+        """statistics per stage name, ordered by total time
+
+        the total time of nested stages is part of the total time of the enclosing stage
+        """
+        stats = {}
+        for _event in self.events:
+            stat = stats.setdefault(
+                _event["name"],
+                {
+                    "name": _event["name"],
+                    "count": 0,
+                    "total_s": 0.0,
+                    "max_s": 0.0,
+                    "rss_delta_mb": 0.0,
+                    "peak_rss_mb": 0.0,
+                },
+            )
+            stat["count"] += 1
+            stat["total_s"] += _event["duration"]
+            stat["max_s"] = max(stat["max_s"], _event["duration"])
+            stat["rss_delta_mb"] = max(
+                stat["rss_delta_mb"], _event["rss_end_mb"] - _event["rss_start_mb"]
+            )
+            stat["peak_rss_mb"] = max(stat["peak_rss_mb"], _event["peak_rss_mb"])
+        for _stat in stats.values():
+            _stat["mean_s"] = _stat["total_s"] / _stat["count"]
+        return sorted(stats.values(), key=lambda _stat: -_stat["total_s"])
+
+    def print_summary(self):
+        print(
+            f"{'stage':<24}{'count':>7}{'total [s]':>11}{'mean [s]':>10}{'max [s]':>10}"
+            f"{'max rss delta [MB]':>20}{'peak rss [MB]':>15}"
+        )
+        for _stat in self.summary():
+            print(
+                f"{_stat['name']:<24}{_stat['count']:>7}{_stat['total_s']:>11.3f}"
+                f"{_stat['mean_s']:>10.3f}{_stat['max_s']:>10.3f}"
+                f"{_stat['rss_delta_mb']:>20.1f}{_stat['peak_rss_mb']:>15.1f}"
+            )
+
+    def write_json(self, filename: str):
+        """write the summary and all events to filename"""
+        with open(filename, "w") as fh:
+            json.dump({"summary": self.summary(), "events": self.events}, fh, indent=1)
+
+    def write_chrome_trace(self, filename: str):
+        """write the events to filename in the chrome trace event format
+
+        the file can be opened with chrome://tracing or https://ui.perfetto.dev
+        """
+        events = self.events
+        start = min((_event["start"] for _event in events), default=0.0)
+        trace = [
+            {
+                "name": _event["name"],
+                "cat": "pyaerocom_plotting",
+                "ph": "X",
+                "ts": (_event["start"] - start) * 1e6,
+                "dur": _event["duration"] * 1e6,
+                "pid": _event["pid"],
+                "tid": _event["tid"],
+                "args": {
+                    **_event["tags"],
+                    "rss_start_mb": round(_event["rss_start_mb"], 1),
+                    "rss_end_mb": round(_event["rss_end_mb"], 1),
+                    "peak_rss_mb": round(_event["peak_rss_mb"], 1),
+                },
+            }
+            for _event in events
+        ]
+        with open(filename, "w") as fh:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, fh)
+
+    def write(self, filename: str, format: str = "json"):
+        """write the profile to filename; format is json or chrome"""
+        if format == "chrome":
+            self.write_chrome_trace(filename)
+        else:
+            self.write_json(filename)
+
+
+PROFILER = Profiler()
+if os.environ.get(PROFILE_DIR_ENV):
+    # a worker process started by a profiled run
+    PROFILER.enable(worker_dir=os.environ[PROFILE_DIR_ENV])
+
+
+def stage(name: str, **tags):
+    """time the stage name with the global profiler; see Profiler.stage"""
+    return PROFILER.stage(name, **tags)
+
+
+@contextmanager
+def profiled(options: dict):
+    """profile a run of a command line script if options["profile"] is set
+
+    prints the summary at the end and writes the profile to options["profileoutput"]
+    (if given) in options["profileformat"]
+    """
+    if not options.get("profile"):
+        yield
+        return
+    PROFILER.enable()
+    try:
+        with stage("total"):
+            yield
+    finally:
+        PROFILER.disable()
+        PROFILER.print_summary()
+        if options.get("profileoutput"):
+            PROFILER.write(
+                options["profileoutput"], options.get("profileformat", "json")
+            )
+            print(f"profile written to {options['profileoutput']}")
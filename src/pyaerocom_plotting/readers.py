@@ -1,19 +1,378 @@
 """
 reader classes of pyaerocom plotting
 
-besides the current PyaModelData class there will be classes to read
-- colocated data (netcdf files)
-- aeroval json files
+- PyaModelData: gridded model data read by pyaerocom
+- PyaColocatedData: pyaerocom's colocated data files (netcdf)
+- AerovalJsonData: aeroval json files
 """
+import os
+import threading
 from collections.abc import Iterable
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
 
+import numpy as np
 import pyaerocom.io as pio
-import simplejson as json
 from pyaerocom.exceptions import DataSearchError, VarNotAvailableError
 from pyaerocom.griddeddata import GriddedData
 
-from pyaerocom_plotting.const import DEFAULT_TS_TYPE
+try:
+    from pyaerocom.helpers import cftime_to_datetime64
+except ImportError:
+    # moved in newer pyaerocom versions
+    from pyaerocom.units.datetime import cftime_to_datetime64
+
+from pyaerocom_plotting.aeroval_json import (
+    JSON_LEVELS,
+    iter_json_leaves,
+    read_json_file,
+)
+from pyaerocom_plotting.cache import WeightedMeanCache
+from pyaerocom_plotting.const import (
+    DEFAULT_MAX_OPEN_FILES,
+    DEFAULT_READ_WORKERS,
+    DEFAULT_REGIONS,
+    DEFAULT_SCATTER_BINS,
+    DEFAULT_SCATTER_KIND,
+    DEFAULT_TS_TYPE,
+    WEIGHTED_MEAN_TS_TYPE,
+)
+from pyaerocom_plotting.profiling import PROFILER, stage
+from pyaerocom_plotting.scatter import ScatterStats, scatter_range
+
+
+# functions returning the period a date belongs to for the ts_types
+# supported by the chunked reduction; they follow pyaerocom's resampling (pandas
+# frequencies, see TS_TYPE_TO_PANDAS_FREQ), e.g. weekly periods end on Mondays (W-MON)
+_TS_TYPE_PERIODS = {
+    "yearly": lambda date: (date.year,),
+    "monthly": lambda date: (date.year, date.month),
+    "weekly": lambda date: _week_end(date),
+    "daily": lambda date: (date.year, date.month, date.day),
+    "hourly": lambda date: (date.year, date.month, date.day, date.hour),
+    "minutely": lambda date: (date.year, date.month, date.day, date.hour, date.minute),
+}
+
+
+def _week_end(date) -> tuple:
+    """the Monday (year, month, day) ending the weekly period of a cftime date"""
+    monday = date + timedelta(days=-date.dayofwk % 7)
+    return (monday.year, monday.month, monday.day)
+
+
+def _max_time_chunk(data: GriddedData, max_memory: int = None) -> int:
+    """number of time steps a lazy data chunk may hold to stay below max_memory bytes
+
+    returns None if the data is not lazy or its chunks are small enough already
+    """
+    if max_memory is None or not data.cube.has_lazy_data():
+        return None
+    step_size = data.cube.dtype.itemsize * int(np.prod(data.shape[1:]))
+    max_steps = max(1, max_memory // step_size)
+    if max(data.cube.core_data().chunks[0]) <= max_steps:
+        return None
+    return max_steps
+
+
+def _period_starts(data: GriddedData, ts_type: str) -> list[int]:
+    """return the index of the first time step of each ts_type period of data"""
+    try:
+        period = _TS_TYPE_PERIODS[ts_type]
+    except KeyError:
+        raise ValueError(f"chunked reduction not supported for ts_type {ts_type}")
+
+    time = data.cube.coord("time")
+    starts = []
+    last = None
+    for _idx, _date in enumerate(time.units.num2date(time.points)):
+        if period(_date) != last:
+            starts.append(_idx)
+            last = period(_date)
+    return starts
+
+
+def _time_chunks(data: GriddedData, ts_type: str, max_memory: int) -> list[tuple]:
+    """split the time axis of data into (start, stop) index chunks
+
+    chunks contain whole ts_type periods only and are as large as possible without
+    exceeding max_memory bytes of input data; a chunk holds at least one period
+    """
+    time = data.cube.coord("time")
+    step_size = data.cube.dtype.itemsize * int(np.prod(data.shape[1:]))
+    max_steps = max(1, max_memory // step_size)
+
+    # start index of each period
+    starts = _period_starts(data, ts_type)
+    stops = starts[1:] + [len(time.points)]
+
+    chunks = []
+    chunk_start = 0
+    for _start, _stop in zip(starts, stops):
+        if _stop - chunk_start > max_steps and _start > chunk_start:
+            chunks.append((chunk_start, _start))
+            chunk_start = _start
+    chunks.append((chunk_start, len(time.points)))
+    return chunks
+
+
+def _weighted_mean(data: GriddedData, weights: np.ndarray = None) -> tuple:
+    """area weighted mean over latitude and longitude
+
+    returns a tuple of the time (numpy datetime64 array) and the mean (numpy masked array)
+    """
+    import iris.analysis
+
+    with stage("collapse", model=data.data_id, var=data.var_name):
+        if weights is None:
+            weights = data.area_weights
+        mean = data.cube.collapsed(
+            ["latitude", "longitude"], iris.analysis.MEAN, weights=weights
+        )
+    # the actual data is in mean.data as masked numpy array
+    time = cftime_to_datetime64(
+        mean.coord("time").points,
+        cfunit=str(mean.coord("time").units),
+        calendar=mean.coord("time").units.calendar,
+    )
+    return time, np.ma.asarray(mean.data)
+
+
+def _grid_key(data: GriddedData) -> tuple:
+    """key identifying the grid and time axis of data; data with the same key can be
+    stacked"""
+    time = data.cube.coord("time")
+    return (
+        data.shape,
+        str(time.units),
+        time.units.calendar,
+        time.points.tobytes(),
+        data.cube.coord("latitude").points.tobytes(),
+        data.cube.coord("longitude").points.tobytes(),
+    )
+
+
+def _region_mask(lat: np.ndarray, lon: np.ndarray, region: str) -> np.ndarray:
+    """boolean (latitude, longitude) mask of the grid cells whose centre is in region
+
+    region is one of pyaerocom's default regions, which are defined by latitude and
+    longitude ranges
+    """
+    from pyaerocom.region import Region, get_all_default_region_ids
+
+    if region not in get_all_default_region_ids():
+        raise ValueError(
+            f"region {region} not supported; use one of {get_all_default_region_ids()}"
+        )
+    region = Region(region)
+    lat_min, lat_max = region.lat_range
+    lon_min, lon_max = region.lon_range
+    lat_mask = (lat >= lat_min) & (lat <= lat_max)
+    # longitudes in [-180, 180)
+    lon = (lon + 180.0) % 360.0 - 180.0
+    if lon_max - lon_min >= 360.0:
+        lon_mask = np.ones(lon.shape, dtype=bool)
+    elif lon_min <= lon_max:
+        lon_mask = (lon >= lon_min) & (lon <= lon_max)
+    else:
+        # range crossing the date line
+        lon_mask = (lon >= lon_min) | (lon <= lon_max)
+    return lat_mask[:, np.newaxis] & lon_mask[np.newaxis, :]
+
+
+# normalised region weight matrices; [(grid, regions)] = (region, cell) array
+_REGION_WEIGHTS = {}
+_REGION_WEIGHTS_LOCK = threading.Lock()
+
+
+def _region_weights(data: GriddedData, regions: tuple) -> np.ndarray:
+    """normalised area weight matrix of shape (region, cell) for the grid of data
+
+    computed once per grid and regions and cached; each row sums up to 1
+    """
+    lat = data.cube.coord("latitude").points
+    lon = data.cube.coord("longitude").points
+    key = (lat.tobytes(), lon.tobytes(), tuple(regions))
+    with _REGION_WEIGHTS_LOCK:
+        if key in _REGION_WEIGHTS:
+            return _REGION_WEIGHTS[key]
+
+    with stage("region_weights", regions=len(regions)):
+        area_weights = np.asarray(data[0].area_weights, dtype=np.float64)
+        weights = np.stack(
+            [
+                np.where(_region_mask(lat, lon, _region), area_weights, 0.0).reshape(-1)
+                for _region in regions
+            ]
+        )
+    sums = weights.sum(axis=1, keepdims=True)
+    if (sums == 0).any():
+        empty = [_region for _region, _sum in zip(regions, sums[:, 0]) if _sum == 0]
+        raise ValueError(f"no grid cells in region(s) {empty}")
+    weights /= sums
+    with _REGION_WEIGHTS_LOCK:
+        _REGION_WEIGHTS[key] = weights
+    return weights
+
+
+def _masked_period_means(
+    data: np.ndarray, period_starts: list[int], weights: np.ndarray
+) -> np.ndarray:
+    """weighted means of the periods of (masked) data of shape (time, cell)
+
+    weights is a (weight, cell) matrix; returns an array of shape (weight, period)
+    the periods are averaged per grid cell first, then over the grid; masked and invalid
+    values are left out like in the iris reduction
+    """
+    data = np.ma.masked_invalid(data)
+    sums = np.add.reduceat(np.ma.filled(data, 0.0), period_starts, axis=0)
+    counts = np.add.reduceat(~np.ma.getmaskarray(data), period_starts, axis=0)
+    valid = counts > 0
+    period_means = np.where(valid, sums / np.maximum(counts, 1), 0.0)
+    # the weights of each row are renormalised to the valid cells
+    weight_sums = valid.astype(np.float64) @ weights.T
+    means = (period_means @ weights.T) / np.where(weight_sums == 0, 1.0, weight_sums)
+    return np.ma.masked_where(weight_sums == 0, means).T
+
+
+def _stacked_weighted_means(
+    datas: list[GriddedData],
+    ts_type: str,
+    max_memory: int = None,
+    weights: np.ndarray = None,
+) -> tuple:
+    """area weighted means of several variables sharing one grid and time axis
+
+    The grid, the weights and the ts_type periods of the variables are determined once.
+    weights is a normalised (weight, cell) matrix, e.g. one row per region (see
+    _region_weights); by default the global area weights. Each variable is reduced over
+    the grid with a single matrix product of its (time, cell) data and the weights,
+    followed by the means of the periods. Without masked values this is the same as
+    averaging the periods first, but it avoids resampling the full grid. Variables with
+    masked or invalid values are averaged over the periods per grid cell first. With
+    max_memory (in bytes) the data is processed in time chunks of whole periods.
+
+    returns a tuple of the time (numpy datetime64 array) and the means (numpy masked
+    array of shape (variable, weight, time))
+    """
+    first = datas[0]
+    starts = _period_starts(first, ts_type)
+    # the time of the periods as used by pyaerocom; resampling a single grid cell is cheap
+    time_coord = first[:, 0:1, 0:1].resample_time(ts_type).cube.coord("time")
+    time = cftime_to_datetime64(
+        time_coord.points,
+        cfunit=str(time_coord.units),
+        calendar=time_coord.units.calendar,
+    )
+    if len(time) != len(starts):
+        raise ValueError(f"periods of ts_type {ts_type} do not match the resampling")
+
+    if weights is None:
+        weights = np.asarray(first[0].area_weights, dtype=np.float64).reshape(1, -1)
+        weights = weights / weights.sum()
+    if max_memory is None:
+        chunks = [(0, first.shape[0])]
+    else:
+        chunks = _time_chunks(first, ts_type, max_memory)
+
+    means = np.ma.masked_all((len(datas), weights.shape[0], len(starts)))
+    for _start, _stop in chunks:
+        period_starts = [_idx - _start for _idx in starts if _start <= _idx < _stop]
+        periods = slice(starts.index(_start), starts.index(_start) + len(period_starts))
+        steps = np.diff(period_starts + [_stop - _start])
+        for _idx, _data in enumerate(datas):
+            tags = {"model": _data.data_id, "var": _data.var_name, "chunk": _start}
+            chunk = _data.cube.core_data()[_start:_stop]
+            if not isinstance(chunk, np.ndarray):
+                # lazy (dask) data; only this chunk is realised
+                with stage("load", **tags):
+                    chunk = chunk.compute()
+            with stage("reduce", **tags):
+                means[_idx, :, periods] = _reduce_chunk(
+                    chunk.reshape(chunk.shape[0], -1), period_starts, steps, weights
+                )
+    return time, means
+
+
+def _reduce_chunk(
+    chunk: np.ndarray, period_starts: list[int], steps: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """weighted means of the periods of chunk of shape (time, cell); see
+    _stacked_weighted_means"""
+    if not np.ma.is_masked(chunk):
+        data = np.ma.getdata(chunk)
+        if weights.shape[0] == 1:
+            cell_means = np.einsum("tc,wc->wt", data, weights)
+        else:
+            # one matrix product for all rows in the precision of the data;
+            # casting the data to float64 would cost more than the product
+            cell_means = (data @ weights.T.astype(data.dtype)).T
+        # invalid values propagate to the result
+        if np.isfinite(cell_means).all():
+            return (
+                np.add.reduceat(cell_means.astype(np.float64), period_starts, axis=1)
+                / steps
+            )
+    return _masked_period_means(chunk, period_starts, weights)
+
+
+def _read_var_task(
+    model: str,
+    var: str,
+    startyear: int,
+    endyear: int,
+    ts_type: str,
+    data_dir: str | Path = None,
+    reader: pio.ReadGridded = None,
+) -> tuple:
+    """read a single variable; used by PyaModelData.read_many
+
+    returns a tuple of the GriddedData (None on error) and the exception (None on success).
+    Without a reader (process pool) the reader is created here and the data is realised,
+    so that the file I/O happens in the worker process.
+    """
+    try:
+        realise = reader is None
+        with stage("read_var", model=model, var=var):
+            if reader is None:
+                reader = pio.ReadGridded(model, data_dir=data_dir)
+            data = reader.read_var(
+                var_name=var,
+                start=startyear,
+                stop=endyear,
+                ts_type=ts_type,
+            )
+            if realise:
+                # load the data in the worker process
+                data.cube.data
+        return data, None
+    except Exception as e:
+        # any error of pyaerocom or iris only fails this task
+        return None, e
+
+
+class _OpenFileLimiter:
+    """counting semaphore that acquires several files at once"""
+
+    def __init__(self, max_open_files: int):
+        self._max_open_files = max_open_files
+        self._open_files = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, files: int) -> int:
+        # a task needing more files than allowed still runs, but alone
+        files = max(1, min(files, self._max_open_files))
+        with self._condition:
+            while self._open_files + files > self._max_open_files:
+                self._condition.wait()
+            self._open_files += files
+        return files
+
+    def release(self, files: int):
+        with self._condition:
+            self._open_files -= files
+            self._condition.notify_all()
 
 
 class PyaModelData:
@@ -28,6 +387,14 @@ class PyaModelData:
         self._vars = []
         self._data = {}
         self._model_obj = {}
+        # area weighted means; [model][var][ts_type] = (time, mean)
+        self._weighted_means = {}
+        # memoized resampled data; [model][var][ts_type] = GriddedData
+        self._resampled = {}
+        # regional area weighted means; [model][var][ts_type][region] = (time, mean)
+        self._regional_means = {}
+        # read errors; [(model, var)] = exception; var is None if the model was not found
+        self._errors = {}
 
     def __getitem__(self, item):
         """x.__getitem__(y) <==> x[y]"""
@@ -44,6 +411,79 @@ class PyaModelData:
         else:
             pass
 
+    def _init_model(self, model: str, data_dir: str | Path = None) -> bool:
+        """create the pyaerocom reader for model; returns False if the model was not found"""
+        if model in self._model_obj:
+            return True
+        try:
+            self._model_obj[model] = pio.ReadGridded(model, data_dir=data_dir)
+        except DataSearchError as e:
+            self._errors[(model, None)] = e
+            print(f"No model match found for model {model}.")
+            return False
+
+        self._add_model(model)
+        return True
+
+    def _add_model(self, model: str):
+        if model not in self._data:
+            self._data[model] = {}
+        if model not in self._models:
+            self._models.append(model)
+
+    def _add_var(self, var: str):
+        # unique list of variables in the order they were read; the order must not
+        # depend on the (randomised) string hashing, see the plot fingerprints
+        if var not in self._vars:
+            self._vars.append(var)
+
+    def _read_var(
+        self,
+        model: str,
+        var: str,
+        startyear: int,
+        endyear: int,
+        ts_type: str = DEFAULT_TS_TYPE,
+        max_memory: int = None,
+    ) -> bool:
+        """read a single variable of an already initialised model
+
+        if max_memory (in bytes) is given, the lazy data is read with time chunks that do not
+        exceed max_memory, so that computing a part of the time series does not load larger
+        parts of the files
+        """
+        try:
+            with stage("read_var", model=model, var=var):
+                dummy = self._model_obj[model].read_var(
+                    var_name=var,
+                    start=startyear,
+                    stop=endyear,
+                    ts_type=ts_type,
+                )
+            time_chunk = _max_time_chunk(dummy, max_memory)
+            if time_chunk is not None:
+                # reading is lazy, so reading again with smaller chunks is cheap
+                from iris.fileformats.netcdf.loader import CHUNK_CONTROL
+
+                with CHUNK_CONTROL.set(time=time_chunk):
+                    dummy = self._model_obj[model].read_var(
+                        var_name=var,
+                        start=startyear,
+                        stop=endyear,
+                        ts_type=ts_type,
+                    )
+            # not entirely sure why this necessary
+            self._data[model][var] = dummy
+            self._add_var(var)
+            return True
+
+        except VarNotAvailableError as e:
+            self._errors[(model, var)] = e
+            print(
+                f"Error: variable {var} not available in files and can also not be computed. Skipping..."
+            )
+            return False
+
     def read(
         self,
         model: str,
@@ -54,32 +494,382 @@ class PyaModelData:
         data_dir: str | Path = None,
     ):
         if model is not None:
-            try:
-                self._model_obj[model] = pio.ReadGridded(model)
-            except DataSearchError:
-                print(f"No model match found for model {model}.")
+            if not self._init_model(model, data_dir=data_dir):
                 return
 
-            self._data[model] = {}
-            self._models.append(model)
             for _var in vars:
-                try:
-                    dummy = self._model_obj[model].read_var(
-                        var_name=_var,
-                        start=startyear,
-                        stop=endyear,
-                        ts_type=ts_type,
-                    )
-                    # not entirely sure why this necessary
-                    self._data[model][_var] = dummy
-                    self._vars.append(_var)
-                    # unique listy of variables
-                    self._vars = list(set(self._vars))
-
-                except VarNotAvailableError:
-                    print(
-                        "Error: variable {_var} not available in files and can also not be computed. Skipping..."
-                    )
+                self._read_var(model, _var, startyear, endyear, ts_type=ts_type)
+
+    def read_many(
+        self,
+        models: Iterable[str],
+        vars: Iterable[str],
+        startyear: int,
+        endyear: int,
+        ts_type: str = DEFAULT_TS_TYPE,
+        data_dir: str | Path = None,
+        workers: int = DEFAULT_READ_WORKERS,
+        max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+        executor: str = "thread",
+    ):
+        """read vars of several models concurrently
+
+        Every (model, var) is a task of a thread (default) or process pool. With threads the
+        data stays lazy as with read; with processes each worker also loads the data, so the
+        file I/O itself runs in parallel. At most max_open_files source files are read at
+        the same time.
+
+        Errors are not printed, but stored per (model, var) in errors; var is None if the
+        model itself was not found. Variables read before are not read again.
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"unknown executor {executor}")
+        models = [_model for _model in models if _model is not None]
+        vars = list(vars)
+        workers = max(1, int(workers))
+
+        # the readers scan the data directories; do that concurrently as well
+        new_models = [_model for _model in models if _model not in self._model_obj]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            readers = list(
+                pool.map(lambda _model: self._new_reader(_model, data_dir), new_models)
+            )
+        for _model, (_reader, _error) in zip(new_models, readers):
+            if _reader is None:
+                self._errors[(_model, None)] = _error
+                continue
+            self._model_obj[_model] = _reader
+            self._add_model(_model)
+
+        tasks = [
+            (_model, _var)
+            for _model in models
+            if _model in self._model_obj
+            for _var in vars
+            if _var not in self._data[_model]
+        ]
+        limiter = _OpenFileLimiter(max_open_files)
+        if executor == "process":
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context("spawn")
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        futures = []
+        with pool:
+            for _model, _var in tasks:
+                files = limiter.acquire(
+                    len(self.source_files(_model, _var, startyear, endyear, ts_type))
+                )
+                args = (_model, _var, startyear, endyear, ts_type, data_dir)
+                if executor == "thread":
+                    args = args + (self._model_obj[_model],)
+                future = pool.submit(_read_var_task, *args)
+                future.add_done_callback(lambda _f, _n=files: limiter.release(_n))
+                futures.append(future)
+
+        # store the results in task order, so the result does not depend on the timing
+        for (_model, _var), _future in zip(tasks, futures):
+            data, error = _future.result()
+            if data is None:
+                self._errors[(_model, _var)] = error
+                continue
+            self._data[_model][_var] = data
+            self._add_var(_var)
+
+    def add_reader(self, model: str, reader: pio.ReadGridded):
+        """use reader for model, e.g. a reader kept from an earlier scan of the data
+        directories"""
+        self._model_obj[model] = reader
+        self._add_model(model)
+
+    @staticmethod
+    def _new_reader(model: str, data_dir: str | Path = None) -> tuple:
+        """create a pyaerocom reader; returns a tuple of reader and exception"""
+        try:
+            return pio.ReadGridded(model, data_dir=data_dir), None
+        except DataSearchError as e:
+            return None, e
+
+    def source_files(
+        self,
+        model: str,
+        var: str,
+        startyear: int,
+        endyear: int,
+        ts_type: str = DEFAULT_TS_TYPE,
+    ) -> list[str]:
+        """return the files var of model is read from
+
+        returns all files of the model if the variable is not directly available in
+        the files (e.g. computed variables)
+        """
+        reader = self._model_obj[model]
+        try:
+            return [
+                str(_file)
+                for _file in reader.get_files(
+                    var, ts_type=ts_type, start=startyear, stop=endyear
+                )
+            ]
+        except (DataSearchError, VarNotAvailableError, ValueError):
+            return [str(_file) for _file in reader.files]
+
+    def find_source_files(
+        self,
+        models: Iterable[str],
+        vars: Iterable[str],
+        startyear: int,
+        endyear: int,
+        ts_type: str = DEFAULT_TS_TYPE,
+        data_dir: str | Path = None,
+    ) -> dict:
+        """return the files vars of models are read from; {(model, var): files}
+
+        the readers of models not seen before are created, i.e. their data directories
+        are scanned; read and read_many use them afterwards. Models that are not found
+        are left out (read_many reports them).
+        """
+        files = {}
+        for _model in models:
+            if _model is None:
+                continue
+            if _model not in self._model_obj:
+                reader = self._new_reader(_model, data_dir)[0]
+                if reader is None:
+                    continue
+                self.add_reader(_model, reader)
+            for _var in vars:
+                files[(_model, _var)] = self.source_files(
+                    _model, _var, startyear, endyear, ts_type
+                )
+        return files
+
+    def read_weighted_means(
+        self,
+        model: str,
+        vars: Iterable[str],
+        startyear: int,
+        endyear: int,
+        ts_type: str = DEFAULT_TS_TYPE,
+        data_dir: str | Path = None,
+        cache: WeightedMeanCache = None,
+        mean_ts_type: str = WEIGHTED_MEAN_TS_TYPE,
+        max_memory: int = None,
+    ):
+        """read the area weighted means of vars for model
+
+        variables found in the cache are not read from disk at all; for the others the
+        data is read, reduced (in time chunks if max_memory is given, see weighted_mean)
+        and the result stored in the cache
+        """
+        if model is None or not self._init_model(model, data_dir=data_dir):
+            return
+
+        # variables to reduce and their cache keys
+        keys = {}
+        for _var in vars:
+            if mean_ts_type in self._weighted_means.get(model, {}).get(_var, {}):
+                # computed or taken from the cache before
+                continue
+            key = None
+            if cache is not None:
+                key = cache.key(
+                    model,
+                    _var,
+                    ts_type,
+                    mean_ts_type,
+                    startyear,
+                    endyear,
+                    self.source_files(model, _var, startyear, endyear, ts_type),
+                )
+                cached = cache.get(key)
+                if cached is not None:
+                    self._weighted_means.setdefault(model, {}).setdefault(_var, {})[
+                        mean_ts_type
+                    ] = cached
+                    self._add_var(_var)
+                    continue
+
+            if _var not in self._data[model]:
+                if not self._read_var(
+                    model,
+                    _var,
+                    startyear,
+                    endyear,
+                    ts_type=ts_type,
+                    max_memory=max_memory,
+                ):
+                    continue
+            keys[_var] = key
+
+        # all variables on the same grid are reduced together
+        means = self.weighted_means(
+            model, list(keys), ts_type=mean_ts_type, max_memory=max_memory
+        )
+        if cache is not None:
+            for _var, (_time, _mean) in means.items():
+                cache.put(keys[_var], _time, _mean)
+
+    def weighted_mean(
+        self,
+        model: str,
+        var: str,
+        ts_type: str = WEIGHTED_MEAN_TS_TYPE,
+        max_memory: int = None,
+    ) -> tuple:
+        """area weighted mean of var for model resampled to ts_type
+
+        returns a tuple of the time (numpy datetime64 array) and the mean
+        (numpy masked array)
+
+        If max_memory (in bytes) is given, the data is reduced in time chunks whose input
+        data does not exceed max_memory. The chunks are aligned to the ts_type periods, so
+        the result is the same as for the unchunked reduction. Lazy (dask) data stays lazy
+        until a chunk is reduced.
+        """
+        try:
+            return self._weighted_means[model][var][ts_type]
+        except KeyError:
+            pass
+
+        data = self._data[model][var]
+        if max_memory is None or ts_type in self._resampled.get(model, {}).get(var, {}):
+            time, mean = _weighted_mean(self.resampled(model, var, ts_type))
+        else:
+            weights = None
+            times = []
+            means = []
+            for _start, _stop in _time_chunks(data, ts_type, max_memory):
+                chunk = data[_start:_stop].resample_time(ts_type)
+                if weights is None:
+                    # the weights of the grid; computed once and broadcast to the chunks
+                    weights = chunk[0].area_weights
+                time, mean = _weighted_mean(
+                    chunk, weights=np.broadcast_to(weights, chunk.shape)
+                )
+                times.append(time)
+                means.append(mean)
+            time = np.concatenate(times)
+            mean = np.ma.concatenate(means)
+
+        result = (time, mean)
+        self._weighted_means.setdefault(model, {}).setdefault(var, {})[ts_type] = result
+        return result
+
+    def weighted_means(
+        self,
+        model: str,
+        vars: Iterable[str] = None,
+        ts_type: str = WEIGHTED_MEAN_TS_TYPE,
+        max_memory: int = None,
+    ) -> dict:
+        """area weighted means of several variables (default: all) of model
+
+        returns {var: (time, mean)} like weighted_mean, which returns the memoized results
+        afterwards; variables without data are left out
+
+        The variables sharing a grid and time axis (e.g. the speciated AODs of a model) are
+        stacked and reduced together, see _stacked_weighted_means. Variables whose means
+        are known already or whose resampled data exists are taken from weighted_mean.
+        """
+        data = self._data.get(model, {})
+        known = self._weighted_means.get(model, {})
+        if vars is None:
+            vars = data.keys()
+        vars = [
+            _var
+            for _var in dict.fromkeys(vars)
+            if _var in data or ts_type in known.get(_var, {})
+        ]
+        groups = {}
+        for _var in vars:
+            if (
+                ts_type in self._weighted_means.get(model, {}).get(_var, {})
+                or ts_type in self._resampled.get(model, {}).get(_var, {})
+                or ts_type not in _TS_TYPE_PERIODS
+            ):
+                continue
+            groups.setdefault(_grid_key(data[_var]), []).append(_var)
+
+        for _vars in groups.values():
+            time, means = _stacked_weighted_means(
+                [data[_var] for _var in _vars], ts_type, max_memory
+            )
+            for _var, _mean in zip(_vars, means[:, 0]):
+                self._weighted_means.setdefault(model, {}).setdefault(_var, {})[
+                    ts_type
+                ] = (time, _mean)
+
+        return {
+            _var: self.weighted_mean(model, _var, ts_type, max_memory=max_memory)
+            for _var in vars
+        }
+
+    def regional_means(
+        self,
+        model: str,
+        vars: Iterable[str] = None,
+        regions: Iterable[str] = DEFAULT_REGIONS,
+        ts_type: str = WEIGHTED_MEAN_TS_TYPE,
+        max_memory: int = None,
+    ) -> dict:
+        """area weighted means of several variables (default: all) of model for regions
+
+        returns {region: {var: (time, mean)}}; the results are memoized
+
+        regions are pyaerocom's default (latitude / longitude box) regions. The normalised
+        weights of all regions are computed once per grid and cached (see
+        _region_weights), so all regions of a variable are reduced with one matrix
+        product; additional regions add little to the run time.
+        """
+        if ts_type not in _TS_TYPE_PERIODS:
+            raise ValueError(f"regional means not supported for ts_type {ts_type}")
+        data = self._data.get(model, {})
+        known = self._regional_means.setdefault(model, {})
+        if vars is None:
+            vars = data.keys()
+        vars = [_var for _var in dict.fromkeys(vars) if _var in data]
+        regions = tuple(dict.fromkeys(regions))
+
+        groups = {}
+        for _var in vars:
+            missing = tuple(
+                _region
+                for _region in regions
+                if _region not in known.get(_var, {}).get(ts_type, {})
+            )
+            if len(missing) > 0:
+                groups.setdefault((_grid_key(data[_var]), missing), []).append(_var)
+
+        for (_grid, _regions), _vars in groups.items():
+            weights = _region_weights(data[_vars[0]], _regions)
+            time, means = _stacked_weighted_means(
+                [data[_var] for _var in _vars], ts_type, max_memory, weights=weights
+            )
+            for _var, _means in zip(_vars, means):
+                memo = known.setdefault(_var, {}).setdefault(ts_type, {})
+                for _region, _mean in zip(_regions, _means):
+                    memo[_region] = (time, _mean)
+
+        return {
+            _region: {_var: known[_var][ts_type][_region] for _var in vars}
+            for _region in regions
+        }
+
+    def resampled(self, model: str, var: str, ts_type: str) -> GriddedData:
+        """data of var for model resampled to ts_type
+
+        the result is memoized, so all plots using e.g. monthly data share one resampling
+        """
+        try:
+            return self._resampled[model][var][ts_type]
+        except KeyError:
+            pass
+        with stage("resample_time", model=model, var=var, ts_type=ts_type):
+            data = self._data[model][var].resample_time(ts_type)
+        self._resampled.setdefault(model, {}).setdefault(var, {})[ts_type] = data
+        return data
 
     @property
     def data(self):
@@ -94,10 +884,10 @@ class PyaModelData:
         self._data[model][var] = val
 
     def add_model_data(self, model: str, var_name: str, data: GriddedData):
-        self._models.append(model)
-        self._vars.append(var_name)
-        if not model in self._data:
-            self._data[model] = {}
+        self._add_model(model)
+        # keeps the order of the variables, which sets the colours of the plots
+        if var_name not in self._vars:
+            self._vars.append(var_name)
         self._data[model][var_name] = data
 
     @property
@@ -108,6 +898,16 @@ class PyaModelData:
     def models(self, val: str):
         self._models.append(val)
 
+    @property
+    def readers(self) -> dict:
+        """the pyaerocom readers of the models; {model: ReadGridded}"""
+        return self._model_obj
+
+    @property
+    def errors(self) -> dict:
+        """read errors; [(model, var)] = exception; var is None if the model was not found"""
+        return self._errors
+
     @property
     def variables(self):
         return self._vars
@@ -117,28 +917,583 @@ class PyaModelData:
         self._vars.append(val)
 
 
+def _colocated_meta_from_filename(file: [str, Path]) -> dict:
+    """metadata encoded in the name of a pyaerocom colocated data file
+
+    <model_var>_<obs_var>_MOD-<model>_REF-<obs>_<start>_<stop>_<ts_type>_<filter>.nc
+    (see pyaerocom's ColocatedData.get_meta_from_filename); empty if the name does not
+    follow the convention
+    """
+    parts = Path(file).name.split(".nc")[0].split("_")
+    if len(parts) < 8 or not parts[2].startswith("MOD-"):
+        return {}
+    # model and obs names may contain underscores
+    names = "_".join(parts[2:-4])
+    model, sep, obs = names[len("MOD-") :].partition("_REF-")
+    if sep == "":
+        return {}
+    return {
+        "model_var": parts[0],
+        "obs_var": parts[1],
+        "model": model,
+        "obs": obs,
+        "start": parts[-4],
+        "stop": parts[-3],
+        "ts_type": parts[-2],
+        "filter_name": parts[-1],
+    }
+
+
+def _colocated_attr(value):
+    """convert an attribute as stored by pyaerocom's ColocatedData.to_netcdf"""
+    if isinstance(value, str) and value == "None":
+        return None
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def _strings(values: np.ndarray) -> np.ndarray:
+    """str array of the names in values (variable length or char array)"""
+    values = np.asarray(values)
+    if values.dtype.kind == "S" and values.ndim == 2:
+        # char array; one row per name
+        values = values.view(f"S{values.shape[1]}")[:, 0]
+    if values.dtype.kind == "S":
+        return np.char.decode(values, "utf-8")
+    return values.astype(str)
+
+
+def _index_or_slice(index: np.ndarray):
+    """a slice for consecutive indices, so that reading and indexing need no copy"""
+    if index.size > 0 and np.all(np.diff(index) == 1):
+        return slice(int(index[0]), int(index[-1]) + 1)
+    return index
+
+
+class ColocatedSelection:
+    """selected part of a colocated data file
+
+    values holds model and reference data of the selection in one array
+    (data_source, time, station); data and ref are views of it, not copies
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        time: np.ndarray,
+        stations: np.ndarray,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        meta: dict,
+    ):
+        self._values = values
+        self._time = time
+        self._stations = stations
+        self._latitude = latitude
+        self._longitude = longitude
+        self._meta = meta
+
+    def __len__(self) -> int:
+        return self._values[0].size
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def ref(self) -> np.ndarray:
+        """reference (observation) data (time, station); the first data source"""
+        return self._values[0]
+
+    @property
+    def data(self) -> np.ndarray:
+        """model data (time, station); the second data source"""
+        return self._values[1]
+
+    @property
+    def time(self) -> np.ndarray:
+        return self._time
+
+    @property
+    def stations(self) -> np.ndarray:
+        return self._stations
+
+    @property
+    def latitude(self) -> np.ndarray:
+        return self._latitude
+
+    @property
+    def longitude(self) -> np.ndarray:
+        return self._longitude
+
+    @property
+    def meta(self) -> dict:
+        return self._meta
+
+    @property
+    def model(self) -> str:
+        return self._meta.get("model")
+
+    @property
+    def obs(self) -> str:
+        return self._meta.get("obs")
+
+    @property
+    def var_name(self) -> str:
+        return self._meta.get("var_name")
+
+
+class ColocatedFile:
+    """a pyaerocom colocated data file (netcdf), opened lazily
+
+    Creating the object does not touch the file; the metadata in the file name is used
+    where possible. The header (coordinates and attributes, all small) is read once when
+    it is first needed. select reads only the requested hyperslab of the data; netCDF4
+    only reads and decompresses the chunks of the file it touches.
+    """
+
+    def __init__(self, file: [str, Path]):
+        self._file = str(file)
+        self._filename_meta = _colocated_meta_from_filename(file)
+        self._header = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"ColocatedFile({self._file!r})"
+
+    @property
+    def file(self) -> str:
+        return self._file
+
+    def _read_header(self) -> dict:
+        """read (once) coordinates and attributes of the file"""
+        with self._lock:
+            if self._header is not None:
+                return self._header
+            import netCDF4
+            from ast import literal_eval
+
+            with stage("read_colocated_header", file=self._file), netCDF4.Dataset(
+                self._file
+            ) as nc:
+                # the data variable has the dimensions (data_source, time, station_name)
+                var_name = next(
+                    _name
+                    for _name, _var in nc.variables.items()
+                    if _var.dimensions == ("data_source", "time", "station_name")
+                )
+                attrs = {}
+                for _attr in nc.variables[var_name].ncattrs():
+                    value = _colocated_attr(nc.variables[var_name].getncattr(_attr))
+                    if _attr.startswith("CONV!"):
+                        _attr, value = _attr[len("CONV!") :], literal_eval(value)
+                    attrs[_attr] = value
+                time = nc.variables["time"]
+                self._header = {
+                    "var_name": var_name,
+                    "attrs": attrs,
+                    "time": cftime_to_datetime64(
+                        time[:],
+                        cfunit=time.units,
+                        calendar=getattr(time, "calendar", "standard"),
+                    ),
+                    "stations": _strings(nc.variables["station_name"][:]),
+                    "latitude": np.asarray(nc.variables["latitude"][:]),
+                    "longitude": np.asarray(nc.variables["longitude"][:]),
+                    "data_source": _strings(nc.variables["data_source"][:]),
+                }
+            return self._header
+
+    @property
+    def meta(self) -> dict:
+        """var_name, model, obs, ts_type, model_var, obs_var, ... of the file
+
+        taken from the file name if it follows pyaerocom's convention, so that the file
+        is not opened
+        """
+        if len(self._filename_meta) > 0:
+            return {"var_name": self._filename_meta["obs_var"], **self._filename_meta}
+        header = self._read_header()
+        attrs = header["attrs"]
+        # [obs var, model var]
+        var_names = attrs.get("var_name") or [header["var_name"]] * 2
+        return {
+            "var_name": header["var_name"],
+            "model_var": var_names[-1],
+            "obs_var": var_names[0],
+            "model": attrs.get("model_name", header["data_source"][-1]),
+            "obs": attrs.get("obs_name", header["data_source"][0]),
+            "ts_type": attrs.get("ts_type"),
+            "filter_name": attrs.get("filter_name"),
+        }
+
+    @property
+    def attrs(self) -> dict:
+        return self._read_header()["attrs"]
+
+    @property
+    def time(self) -> np.ndarray:
+        return self._read_header()["time"]
+
+    @property
+    def stations(self) -> np.ndarray:
+        return self._read_header()["stations"]
+
+    @property
+    def latitude(self) -> np.ndarray:
+        return self._read_header()["latitude"]
+
+    @property
+    def longitude(self) -> np.ndarray:
+        return self._read_header()["longitude"]
+
+    def matches(
+        self, var: str = None, model: str = None, obs: str = None, ts_type: str = None
+    ) -> bool:
+        """check if the file belongs to the variable, model, obs network and ts_type"""
+        meta = self.meta
+        if var is not None and var not in (meta["model_var"], meta["obs_var"]):
+            return False
+        if model is not None and meta["model"] != model:
+            return False
+        if obs is not None and meta["obs"] != obs:
+            return False
+        return ts_type is None or meta["ts_type"] == ts_type
+
+    def select(
+        self, stations: list[str] = None, start=None, stop=None
+    ) -> ColocatedSelection:
+        """read model and reference data of the stations between start and stop
+
+        stations defaults to all stations, start and stop (inclusive; str or
+        datetime64) to the whole period. Only the selected part of the data is read.
+        """
+        import netCDF4
+
+        header = self._read_header()
+        time = header["time"]
+        # the time axis is sorted; the time window is a slice
+        first = 0 if start is None else np.searchsorted(time, np.datetime64(start))
+        last = (
+            time.size
+            if stop is None
+            else np.searchsorted(time, np.datetime64(stop), side="right")
+        )
+        time_index = slice(int(first), int(last))
+        if stations is None:
+            station_index = slice(None)
+        else:
+            wanted = np.isin(header["stations"], list(stations))
+            station_index = _index_or_slice(np.flatnonzero(wanted))
+
+        with stage("read_colocated", file=self._file), netCDF4.Dataset(
+            self._file
+        ) as nc:
+            var = nc.variables[header["var_name"]]
+            # plain arrays with NaN for missing values instead of masked arrays
+            var.set_auto_mask(False)
+            shape = (
+                var.shape[0],
+                time[time_index].size,
+                header["stations"][station_index].size,
+            )
+            if 0 in shape:
+                # nothing selected; netCDF4 does not return an empty block for an empty
+                # index
+                values = np.empty(shape, dtype=var.dtype)
+            else:
+                values = np.asarray(var[:, time_index, station_index])
+            fill_value = getattr(var, "_FillValue", None)
+        if values.dtype.kind == "f" and fill_value is not None:
+            if not np.isnan(fill_value):
+                values[values == fill_value] = np.nan
+        return ColocatedSelection(
+            values,
+            time[time_index],
+            header["stations"][station_index],
+            header["latitude"][station_index],
+            header["longitude"][station_index],
+            {**self.meta, "units": header["attrs"].get("var_units")},
+        )
+
+
 class PyaColocatedData:
-    """class for pyaerocom colocated data objects stored in netcdf files"""
+    """class for pyaerocom colocated data objects stored in netcdf files
+
+    Files are opened lazily (see ColocatedFile): opening a directory only lists it and
+    parses the file names; a file's header is read when its coordinates are needed and
+    its data only for a selection.
+    """
+
+    __version__ = "0.0.1"
+
+    def __init__(self):
+        # file name: ColocatedFile
+        self._files = {}
+        # density scatters; (var, model, obs, ts_type, bins, kind, log, range): ScatterStats
+        self._scatter = {}
+
+    def __getitem__(self, file: [str, Path]) -> ColocatedFile:
+        return self._files[str(file)]
+
+    def open(self, file: [str, Path]) -> ColocatedFile:
+        """add a colocated data file; the file itself is not read yet"""
+        if not Path(file).exists():
+            print(f"file not found {file}.")
+            raise FileNotFoundError(file)
+        colocated_file = self._files.setdefault(str(file), ColocatedFile(file))
+        return colocated_file
+
+    def open_dir(
+        self,
+        directory: [str, Path],
+        var: str = None,
+        model: str = None,
+        obs: str = None,
+        ts_type: str = None,
+        pattern: str = "*.nc",
+    ) -> list[ColocatedFile]:
+        """add the colocated data files in directory (and its sub directories)
+
+        only files of the given variable, model, obs network and ts_type are added. For
+        files named after pyaerocom's convention this only needs the file names; the
+        headers of other files are read to get their metadata.
+        """
+        files = []
+        for _file in sorted(Path(directory).rglob(pattern)):
+            colocated_file = self._files.get(str(_file), ColocatedFile(_file))
+            if not colocated_file.matches(
+                var=var, model=model, obs=obs, ts_type=ts_type
+            ):
+                continue
+            self._files[str(_file)] = colocated_file
+            files.append(colocated_file)
+        return files
+
+    def select(
+        self,
+        var: str = None,
+        model: str = None,
+        obs: str = None,
+        ts_type: str = None,
+        stations: list[str] = None,
+        start=None,
+        stop=None,
+    ) -> list[ColocatedSelection]:
+        """the selections (see ColocatedFile.select) of all files matching var, model,
+        obs and ts_type"""
+        return [
+            _file.select(stations=stations, start=start, stop=stop)
+            for _file in self._matching(var=var, model=model, obs=obs, ts_type=ts_type)
+        ]
+
+    def _matching(self, **meta) -> list[ColocatedFile]:
+        """the files matching meta (see ColocatedFile.matches)"""
+        return [_file for _file in self._files.values() if _file.matches(**meta)]
+
+    def group_files(
+        self, var: str, model: str, obs: str, ts_type: str = None
+    ) -> list[str]:
+        """the names of the files of var, model, obs and ts_type; only their names are
+        needed, so no file is read"""
+        return [
+            _file.file
+            for _file in self._matching(var=var, model=model, obs=obs, ts_type=ts_type)
+        ]
+
+    def scatter(
+        self,
+        var: str,
+        model: str,
+        obs: str,
+        ts_type: str = None,
+        bins: int = DEFAULT_SCATTER_BINS,
+        kind: str = DEFAULT_SCATTER_KIND,
+        log: bool = False,
+        range: tuple = None,
+    ) -> ScatterStats:
+        """density and statistics of the pairs of var, model, obs and ts_type
+
+        range (min, max) of the bins defaults to the range of the valid pairs. The files
+        are streamed: one file's data is read, binned and dropped before the next file is
+        read (twice without range, the first pass only finds the range), so the memory
+        does not depend on the number of files. The result is memoized, so all plots
+        using the same bins share it.
+
+        Raises ValueError if there are no valid pairs (e.g. only NaN, or no positive
+        pairs with log).
+        """
+        key = (
+            var,
+            model,
+            obs,
+            ts_type,
+            bins,
+            kind,
+            log,
+            None if range is None else tuple(range),
+        )
+        try:
+            return self._scatter[key]
+        except KeyError:
+            pass
+        files = self._matching(var=var, model=model, obs=obs, ts_type=ts_type)
+        # selection of the last file of the range pass; binned first, so that a single
+        # file is read only once
+        selections = [None] * len(files)
+
+        def pairs():
+            for _idx, _file in enumerate(files):
+                selection = _file.select()
+                if _idx == len(files) - 1:
+                    selections[_idx] = selection
+                yield selection.ref, selection.data
+
+        with stage("scatter", var=var, model=model, obs=obs):
+            if range is None:
+                range = scatter_range(pairs(), log=log)
+            scatter = ScatterStats(*range, bins=bins, kind=kind, log=log)
+            for _idx, _file in reversed(list(enumerate(files))):
+                selection = selections[_idx]
+                if selection is None:
+                    selection = _file.select()
+                selections[_idx] = None
+                scatter.add(selection.ref, selection.data)
+                del selection
+            if scatter.statistics["n"] == 0:
+                raise ValueError("no valid pairs of observation and model values")
+        self._scatter[key] = scatter
+        return scatter
+
+    @property
+    def groups(self) -> list[tuple]:
+        """the (var, model, obs, ts_type) combinations of the files"""
+        return list(
+            {
+                (
+                    _file.meta["var_name"],
+                    _file.meta["model"],
+                    _file.meta["obs"],
+                    _file.meta["ts_type"],
+                ): None
+                for _file in self._files.values()
+            }
+        )
+
+    @property
+    def files(self) -> list[str]:
+        return list(self._files)
+
+    @property
+    def vars(self) -> list[str]:
+        return list({_file.meta["var_name"]: None for _file in self._files.values()})
+
+    @property
+    def models(self) -> list[str]:
+        return list({_file.meta["model"]: None for _file in self._files.values()})
+
+    @property
+    def obsnetworks(self) -> list[str]:
+        return list({_file.meta["obs"]: None for _file in self._files.values()})
+
+
+class AerovalTimeSeries:
+    """columnar view of an aeroval time series leaf
 
-    pass
+    time is a numpy datetime64 array; every statistic (data_mean, refdata_mean, ...)
+    is a float array of the same length with NaN for missing values. The statistics are
+    kept as rows of one (statistics x time) table, so several of them are selected with
+    a single indexing operation (see select)
+    """
+
+    def __init__(self, leaf: dict):
+        # the leaf keys are timestamps in ms since epoch
+        self._time = np.array(list(leaf), dtype=np.int64).astype("datetime64[ms]")
+        rows = list(leaf.values())
+        # all statistics in the order of first appearance
+        stats = {}
+        for _row in rows:
+            stats.update(dict.fromkeys(_row))
+        self._stat_names = list(stats)
+        try:
+            table = np.array(
+                [[_row.get(_stat) for _stat in self._stat_names] for _row in rows],
+                dtype=float,
+            ).reshape(len(rows), len(self._stat_names))
+        except (TypeError, ValueError):
+            # non numeric entries; convert column by column
+            table = np.array(
+                [
+                    [_to_float(_row.get(_stat)) for _stat in self._stat_names]
+                    for _row in rows
+                ],
+                dtype=float,
+            ).reshape(len(rows), len(self._stat_names))
+        # one contiguous row per statistic; the columns are views of the rows
+        self._table = np.ascontiguousarray(table.T)
+        self._columns = {
+            _stat: self._table[_idx] for _idx, _stat in enumerate(self._stat_names)
+        }
+
+    def __getitem__(self, stat: str) -> np.ndarray:
+        return self._columns[stat]
+
+    def __contains__(self, stat: str) -> bool:
+        return stat in self._columns
+
+    def select(self, stats: list[str]) -> np.ndarray:
+        """(len(stats), len(self)) array of the statistics stats; NaN rows for
+        statistics not in the time series"""
+        index = {_stat: _idx for _idx, _stat in enumerate(self._stat_names)}
+        # the missing statistics point to a NaN row appended to the table
+        rows = [index.get(_stat, len(self._stat_names)) for _stat in stats]
+        if len(rows) > 0 and max(rows) == len(self._stat_names):
+            table = np.vstack([self._table, np.full((1, len(self)), np.nan)])
+            return table[rows]
+        return self._table[rows]
+
+    def __len__(self) -> int:
+        return self._time.size
+
+    @property
+    def time(self) -> np.ndarray:
+        return self._time
+
+    @property
+    def stats(self) -> list[str]:
+        return self._stat_names
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
 
 
 class AerovalJsonData:
-    """class for aerovals' json files"""
+    """class for aerovals' json files
 
-    __version__ = "0.0.1"
+    besides the data itself the class keeps an index of the file contents:
+    the ordered unique keys of each level (vars, obsnetworks, code, models, modelvars,
+    regions) and a path index mapping (var, obsnetwork, code, model, modelvar, region)
+    to its leaf (the time series dict) for each file
+    """
+
+    __version__ = "0.0.2"
 
     def __init__(
         self,
     ):
-        self._models = []
-        self._vars = []
-        self._modelvars = []
-        self._regions = []
         self._data = {}
-        self._files = []
-        self._obsnetworks = []
-        self._code = []  # e.g. "Column"
+        # ordered unique keys per level; dicts are used as ordered sets
+        self._keys = {_level: {} for _level in JSON_LEVELS}
+        self._files = {}
+        # [file][(var, obsnetwork, code, model, modelvar, region)] = leaf
+        self._index = {}
+        # cached columnar views of the leaves; same keys as _index
+        self._columns = {}
 
     def __getitem__(self, item):
         """x.__getitem__(y) <==> x[y]"""
@@ -154,35 +1509,133 @@ class AerovalJsonData:
     def read(
         self,
         file: [str, Path],
+        select: dict = None,
     ):
+        """read an aeroval json file
+
+        select restricts the data kept in memory to the given keys. It maps the levels of
+        the file (JSON_LEVELS: "var", "obsnetwork", "code", "model", "modelvar", "region")
+        to a key or a list of keys, e.g. {"model": ["SLSTR.SU.A"], "region": "ALL"}.
+        Levels not in select are not restricted. With a selection the file is parsed
+        incrementally if ijson is installed, so that unselected parts of the file are
+        never built in memory.
+        """
         if file is not None:
             self._data[file] = None
             try:
-                with open(file) as fh:
-                    self._data[file] = json.load(fh)
+                self._data[file] = read_json_file(file, select)
             except FileNotFoundError:
                 print(f"file not found {file}.")
                 raise FileNotFoundError
                 return
 
-            # probably fill out some helping vars
-            self.files.append(file)
-            for _var in self._data[file]:
-                self.vars.append(_var)
-                for _obsnetwork in self._data[file][_var]:
-                    self.obsnetworks.append(_obsnetwork)
-                    for _code in self._data[file][_var][_obsnetwork]:
-                        self.code.append(_code)
-                        for _model in self._data[file][_var][_obsnetwork][_code]:
-                            self.models.append(_model)
-                            for _modelvar in self._data[file][_var][_obsnetwork][_code][
-                                _model
-                            ]:
-                                self.modelvars.append(_modelvar)
-                                for _region in self._data[file][_var][_obsnetwork][
-                                    _code
-                                ][_model][_modelvar]:
-                                    self.regions.append(_region)
+            with stage("index_json", file=file):
+                self._index_file(file)
+
+    def read_many(
+        self,
+        files: Iterable[str | Path],
+        select: dict = None,
+        workers: int = DEFAULT_READ_WORKERS,
+    ):
+        """read several aeroval json files concurrently (see read for select)
+
+        parsing json is bound by the interpreter, so the files are parsed in a pool of
+        worker processes (at most one per cpu); only the parsed data is sent back. The
+        files are indexed in the given order, so the result does not depend on the timing.
+        """
+        files = list(files)
+        for _file in files:
+            if not Path(_file).exists():
+                print(f"file not found {_file}.")
+                raise FileNotFoundError(_file)
+        workers = max(1, min(int(workers), len(files), os.cpu_count() or 1))
+        if workers == 1:
+            for _file in files:
+                self.read(_file, select=select)
+            return
+        # the stages of the workers are collected if profiling is on
+        with PROFILER.workers(), ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn")
+        ) as pool:
+            results = list(pool.map(read_json_file, files, [select] * len(files)))
+        for _file, _data in zip(files, results):
+            self._data[_file] = _data
+            with stage("index_json", file=_file):
+                self._index_file(_file)
+
+    def _index_file(self, file: [str, Path]):
+        """add the keys and leaves of file to the indexes"""
+        self._files[file] = None
+        index = {}
+        for _path, _leaf in iter_json_leaves(self._data[file]):
+            for _level, _key in zip(JSON_LEVELS, _path):
+                self._keys[_level][_key] = None
+            index[_path] = _leaf
+        self._index[file] = index
+        self._columns[file] = {}
+
+    def leaf(
+        self,
+        var: str,
+        obsnetwork: str,
+        code: str,
+        model: str,
+        modelvar: str,
+        region: str,
+        file: [str, Path] = None,
+    ) -> dict:
+        """return the leaf (time series dict) of the given path
+
+        file defaults to the first file read; raises KeyError if the path does not exist
+        """
+        if file is None:
+            file = self.files[0]
+        return self._index[file][(var, obsnetwork, code, model, modelvar, region)]
+
+    def columns(
+        self,
+        var: str,
+        obsnetwork: str,
+        code: str,
+        model: str,
+        modelvar: str,
+        region: str,
+        file: [str, Path] = None,
+    ) -> AerovalTimeSeries:
+        """return the columnar view (AerovalTimeSeries) of the leaf of the given path
+
+        the view is built once per leaf and cached
+        """
+        if file is None:
+            file = self.files[0]
+        path = (var, obsnetwork, code, model, modelvar, region)
+        try:
+            return self._columns[file][path]
+        except KeyError:
+            pass
+        columns = AerovalTimeSeries(self._index[file][path])
+        self._columns[file][path] = columns
+        return columns
+
+    def has_leaf(self, *path, file: [str, Path] = None) -> bool:
+        """check if the path (var, obsnetwork, code, model, modelvar, region) exists"""
+        if file is None:
+            file = self.files[0]
+        return tuple(path) in self._index.get(file, {})
+
+    def keys(self, level: str, file: [str, Path] = None) -> list[str]:
+        """ordered unique keys of level (see JSON_LEVELS) in file; in all files if None"""
+        if file is None:
+            return list(self._keys[level])
+        position = JSON_LEVELS.index(level)
+        return list(dict.fromkeys(_path[position] for _path in self._index[file]))
+
+    def paths(self, file: [str, Path] = None) -> list[tuple]:
+        """all (var, obsnetwork, code, model, modelvar, region) paths of file"""
+        if file is None:
+            file = self.files[0]
+        return list(self._index[file])
 
     @property
     def data(self):
@@ -198,59 +1651,60 @@ class AerovalJsonData:
 
     def add_json_data(self, file: str, data: dict):
         self._data[file] = data
+        self._index_file(file)
 
     @property
     def models(self):
-        return self._models
+        return list(self._keys["model"])
 
     @models.setter
     def models(self, val: str):
-        self._models.append(val)
+        self._keys["model"][val] = None
 
     @property
     def files(self):
-        return self._files
+        return list(self._files)
 
     @files.setter
     def files(self, val: str):
-        self._files.append(val)
+        self._files[val] = None
 
     @property
     def vars(self):
-        return self._vars
+        return list(self._keys["var"])
 
     @vars.setter
     def vars(self, val: str):
-        self._vars.append(val)
+        self._keys["var"][val] = None
 
     @property
     def modelvars(self):
-        return self._modelvars
+        return list(self._keys["modelvar"])
 
     @modelvars.setter
     def modelvars(self, val: str):
-        self._modelvars.append(val)
+        self._keys["modelvar"][val] = None
 
     @property
     def regions(self):
-        return self._regions
+        return list(self._keys["region"])
 
     @regions.setter
     def regions(self, val: str):
-        self._regions.append(val)
+        self._keys["region"][val] = None
 
     @property
     def code(self):
-        return self._code
+        return list(self._keys["code"])
 
     @code.setter
     def code(self, val: str):
-        self._code.append(val)
+        self._keys["code"][val] = None
 
     @property
     def obsnetworks(self):
-        return self._obsnetworks
+        return list(self._keys["obsnetwork"])
 
     @obsnetworks.setter
     def obsnetworks(self, val: str):
-        self._obsnetworks.append(val)
+        self._keys["obsnetwork"][val] = None
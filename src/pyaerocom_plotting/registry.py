@@ -0,0 +1,333 @@
+"""
+registry of the supported plot types
+
+Each plot type declares the data it needs (source and aggregation) and the Plotting
+method that renders it. The Planner takes a list of plot type names, dedupes their
+requirements, prepares every intermediate once and renders the plot types.
+
+OBS: this module is imported for argument parsing and listing of the plot types and
+must not import heavy dependencies.
+"""
+from typing import NamedTuple
+
+from pyaerocom_plotting.const import (
+    DEFAULT_REGIONS,
+    WEIGHTED_MEAN_TS_TYPE,
+)
+from pyaerocom_plotting.profiling import stage
+
+
+class Requirement(NamedTuple):
+    """data needed by a plot type"""
+
+    # "model": PyaModelData, "colocated": PyaColocatedData, "json": AerovalJsonData
+    source: str
+    # None: the data as read, "resample": resampled to ts_type,
+    # "weighted_mean": area weighted mean in ts_type,
+    # "regional_mean": area weighted means of regions in ts_type,
+    # "scatter": binned pairs and statistics of colocated data
+    aggregation: str = None
+    ts_type: str = None
+
+
+class PlotType:
+    """a plot type: its name, its data requirements and the Plotting method rendering it"""
+
+    def __init__(
+        self,
+        name: str,
+        source: str,
+        requirements: tuple,
+        method: str,
+        options: dict = None,
+        output: str = None,
+        render_in_worker: bool = False,
+        description: str = "",
+    ):
+        self.name = name
+        self.source = source
+        self.requirements = tuple(requirements)
+        # name of the Plotting method; called with the data and the keyword arguments
+        # given by options ({keyword: key of the command line options})
+        self.method = method
+        self.options = {} if options is None else dict(options)
+        # plot types with the same output name (prefix of the plot files) are rendered
+        # one after the other, never at the same time
+        self.output = name if output is None else output
+        # True if the whole plot can be sent to a worker process; plot types with large
+        # data distribute their work over the worker processes themselves
+        self.render_in_worker = render_in_worker
+        self.description = description
+
+    def __repr__(self) -> str:
+        return f"PlotType({self.name!r})"
+
+    def render(self, plotting, data, options: dict) -> list[str]:
+        """render the plot type with plotting (Plotting object); returns the plot files"""
+        kwargs = {
+            _keyword: options[_key]
+            for _keyword, _key in self.options.items()
+            if _key in options
+        }
+        with stage(self.name):
+            return getattr(plotting, self.method)(data, **kwargs)
+
+
+PLOT_TYPES = {}
+
+
+def register(plot_type: PlotType) -> PlotType:
+    """add plot_type to the registry"""
+    PLOT_TYPES[plot_type.name] = plot_type
+    return plot_type
+
+
+def plot_names(source: str = None) -> list[str]:
+    """return the names of the registered plot types, optionally only for source"""
+    return [
+        _name
+        for _name, _plot_type in PLOT_TYPES.items()
+        if source is None or _plot_type.source == source
+    ]
+
+
+register(
+    PlotType(
+        "pixelmap",
+        "model",
+        (Requirement("model", "resample", "monthly"),),
+        "plot_pixel_map",
+        options={
+            "template": "template",
+            "animation": "animation",
+            "fps": "fps",
+            "tiles": "tiles",
+            "frames": "frames",
+        },
+        description="monthly pixelmap per model and variable; optionally animated and as map tiles",
+    )
+)
+register(
+    PlotType(
+        "monthly_weighted_mean",
+        "model",
+        (Requirement("model", "weighted_mean", WEIGHTED_MEAN_TS_TYPE),),
+        "plot_weighted_means",
+        description="time series of the area weighted monthly means per model",
+    )
+)
+register(
+    PlotType(
+        "monthly_weighted_mean_regional",
+        "model",
+        (Requirement("model", "regional_mean", WEIGHTED_MEAN_TS_TYPE),),
+        "plot_regional_weighted_means",
+        options={"regions": "regions"},
+        description="time series of the area weighted monthly means per model and region",
+    )
+)
+register(
+    PlotType(
+        "scatter_density",
+        "colocated",
+        (Requirement("colocated", "scatter"),),
+        "plot_colocated_scatter",
+        options={
+            "bins": "scatterbins",
+            "kind": "scatterkind",
+            "log": "scatterlog",
+            "range": "scatterrange",
+        },
+        description="density scatter (2D histogram or hexbin) of model vs. observations with bias, RMSE, R and FGE",
+    )
+)
+register(
+    PlotType(
+        "overall_ts",
+        "json",
+        (Requirement("json"),),
+        "plot_aeroval_overall_time_series",
+        output="overallts",
+        render_in_worker=True,
+        description="aeroval overall time series",
+    )
+)
+register(
+    PlotType(
+        "overall_ts_SU",
+        "json",
+        (Requirement("json"),),
+        "plot_aeroval_overall_time_series_SU_Paper",
+        options={"title": "plottitle"},
+        output="overallts",
+        render_in_worker=True,
+        description="aeroval overall time series; special version for the SU paper",
+    )
+)
+register(
+    PlotType(
+        "overall_ts_grid",
+        "json",
+        (Requirement("json"),),
+        "plot_aeroval_overall_time_series_grid",
+        options={"title": "plottitle", "regions": "regions"},
+        output="overallts_grid",
+        render_in_worker=True,
+        description="aeroval overall time series of several files and regions in one figure; one row per file, one column per region",
+    )
+)
+register(
+    PlotType(
+        "overall_ts_regions",
+        "json",
+        (Requirement("json"),),
+        "plot_aeroval_overall_time_series_regions",
+        options={"title": "plottitle", "regions": "regions", "split": "splitregions"},
+        output="overallts_regions",
+        render_in_worker=True,
+        description="aeroval overall time series of all regions of a file as small multiples with shared axes and legend; one figure or one file per region",
+    )
+)
+register(
+    PlotType(
+        "overall_ts_stats",
+        "json",
+        (Requirement("json"),),
+        "plot_aeroval_overall_time_series_stats",
+        options={
+            "stat_props": "statprops",
+            "title": "plottitle",
+            "regions": "regions",
+            "split": "splitstats",
+        },
+        output="overallts_stats",
+        render_in_worker=True,
+        description="several statistics (mean, bias, RMSE, R, NMB, ...) of the aeroval overall time series as stacked panels with a shared time axis; one figure or one file per statistic",
+    )
+)
+
+
+def _prepare_resample(model_data, requirement: Requirement, options: dict):
+    for _model in model_data.models:
+        for _var in model_data.variables:
+            model_data.resampled(_model, _var, requirement.ts_type)
+
+
+def _prepare_weighted_mean(model_data, requirement: Requirement, options: dict):
+    for _model in model_data.models:
+        # all variables of a model are reduced together
+        model_data.weighted_means(_model, model_data.variables, requirement.ts_type)
+
+
+def _prepare_regional_mean(model_data, requirement: Requirement, options: dict):
+    for _model in model_data.models:
+        # all variables and regions of a model are reduced together
+        model_data.regional_means(
+            _model,
+            model_data.variables,
+            regions=options.get("regions", DEFAULT_REGIONS),
+            ts_type=requirement.ts_type,
+        )
+
+
+# functions computing the intermediates of a requirement; the results are memoized
+# in the data object, so the plot types just take them from there
+PREPARE = {
+    ("model", "resample"): _prepare_resample,
+    ("model", "weighted_mean"): _prepare_weighted_mean,
+    ("model", "regional_mean"): _prepare_regional_mean,
+    # the scatters are computed by the plot, only for the groups whose files or options
+    # changed since the last run (see Plotting.plot_colocated_scatter)
+}
+
+
+def _render_plot_types(names: list[str], plotdir: str, options: dict, data) -> dict:
+    """render the plot types names one after the other in a new Plotting object
+
+    module level function so that it can be sent to a process pool; data is shared by
+    all tasks of a worker (see Plotting._render)
+    """
+    from pyaerocom_plotting.output import OutputSettings
+    from pyaerocom_plotting.plotting import Plotting
+
+    plotting = Plotting(plotdir=plotdir, output=OutputSettings.from_options(options))
+    return {_name: PLOT_TYPES[_name].render(plotting, data, options) for _name in names}
+
+
+class Planner:
+    """plan to render a list of plot types from shared data"""
+
+    def __init__(self, plot_types: list[str]):
+        self._plot_types = []
+        self._unknown = []
+        for _name in plot_types:
+            if _name not in PLOT_TYPES:
+                self._unknown.append(_name)
+            elif PLOT_TYPES[_name] not in self._plot_types:
+                self._plot_types.append(PLOT_TYPES[_name])
+
+    @property
+    def plot_types(self) -> list[PlotType]:
+        return self._plot_types
+
+    @property
+    def unknown(self) -> list[str]:
+        return self._unknown
+
+    @property
+    def requirements(self) -> list[Requirement]:
+        """the requirements of all plot types; each one only once"""
+        return list(
+            dict.fromkeys(
+                _requirement
+                for _plot_type in self._plot_types
+                for _requirement in _plot_type.requirements
+            )
+        )
+
+    def aggregations(self, source: str) -> set:
+        """return the aggregations needed from source"""
+        return {
+            _requirement.aggregation
+            for _requirement in self.requirements
+            if _requirement.source == source
+        }
+
+    def prepare(self, data, source: str, options: dict = None):
+        """compute all intermediates needed from data (of kind source) once"""
+        for _requirement in self.requirements:
+            prepare = PREPARE.get((_requirement.source, _requirement.aggregation))
+            if _requirement.source == source and prepare is not None:
+                with stage(f"prepare_{_requirement.aggregation}"):
+                    prepare(data, _requirement, {} if options is None else options)
+
+    def render(self, plotting, data, options: dict, source: str = None) -> dict:
+        """render all plot types (optionally only those of source) from data
+
+        plot types that can be rendered in a worker are distributed over the worker
+        processes of plotting, plot types writing the same output are kept together.
+        data is sent once to each worker process, not with every group. The others are
+        rendered by plotting itself. Returns {plot type name: files}.
+        """
+        for _name in self._unknown:
+            print(f"plottype {_name} unknown. Skipping...")
+        plot_types = [
+            _plot_type
+            for _plot_type in self._plot_types
+            if source is None or _plot_type.source == source
+        ]
+        groups = {}
+        for _plot_type in plot_types:
+            if _plot_type.render_in_worker:
+                groups.setdefault(_plot_type.output, []).append(_plot_type.name)
+
+        files = {}
+        if len(groups) > 0:
+            tasks = [(_names, plotting.plotdir, options) for _names in groups.values()]
+            for _files in plotting._render(_render_plot_types, tasks, shared=data):
+                files.update(_files)
+        for _plot_type in plot_types:
+            if not _plot_type.render_in_worker:
+                files[_plot_type.name] = _plot_type.render(plotting, data, options)
+        # in the order of the plot types
+        return {_plot_type.name: files[_plot_type.name] for _plot_type in plot_types}
@@ -0,0 +1,253 @@
+"""
+density scatter of colocated model and observation pairs
+
+ScatterStats bins the (observation, model) pairs into a 2D histogram or hexagonal bins
+and collects the sums needed for the standard statistics in the same vectorized pass
+over the data. The pairs are added in chunks (e.g. one selection per file) and never
+kept, so memory and the time to draw the plot do not depend on the number of pairs;
+only the bins are drawn.
+"""
+import numpy as np
+
+from pyaerocom_plotting.const import (
+    DEFAULT_SCATTER_BINS,
+    DEFAULT_SCATTER_KIND,
+    SCATTER_KINDS,
+)
+
+# vertices of a hexagon in units of the bin width and the row distance of the lattice
+_HEXAGON = np.array(
+    [
+        [0.5, -1 / 6],
+        [0.5, 1 / 6],
+        [0.0, 1 / 3],
+        [-0.5, 1 / 6],
+        [-0.5, -1 / 6],
+        [0.0, -1 / 3],
+    ]
+)
+
+
+def scatter_range(pairs: list, log: bool = False) -> tuple:
+    """common (min, max) of observation and model values of pairs [(obs, model), ...]
+
+    only finite pairs count; with log only positive pairs
+    """
+    vmin, vmax = np.inf, -np.inf
+    for _obs, _model in pairs:
+        valid = np.isfinite(_obs) & np.isfinite(_model)
+        if log:
+            valid &= (_obs > 0) & (_model > 0)
+        if not valid.any():
+            continue
+        for _values in (_obs[valid], _model[valid]):
+            vmin = min(vmin, _values.min())
+            vmax = max(vmax, _values.max())
+    if vmin > vmax:
+        raise ValueError("no valid pairs of observation and model values")
+    if vmin == vmax:
+        # a single value; widen the range so that there is something to bin
+        delta = 0.5 * abs(vmin) if vmin != 0 else 1.0
+        vmin, vmax = vmin - delta, vmax + delta
+        if log:
+            vmin = vmax / 4
+    return float(vmin), float(vmax)
+
+
+class ScatterStats:
+    """density of (observation, model) pairs in [vmin, vmax] and their statistics
+
+    kind is "hist" (bins x bins square bins) or "hexbin" (hexagonal bins, bins per row).
+    With log the bins are equally spaced in log10 and only positive pairs are used.
+    Pairs outside of the range are not binned but count for the statistics.
+    """
+
+    def __init__(
+        self,
+        vmin: float,
+        vmax: float,
+        bins: int = DEFAULT_SCATTER_BINS,
+        kind: str = DEFAULT_SCATTER_KIND,
+        log: bool = False,
+    ):
+        if kind not in SCATTER_KINDS:
+            raise ValueError(f"scatter kind {kind} not supported; use {SCATTER_KINDS}")
+        if bins < 1:
+            raise ValueError("the number of bins must be positive")
+        if log and vmin <= 0:
+            raise ValueError("the range of a log scatter plot must be positive")
+        if vmin >= vmax:
+            raise ValueError("the minimum of the range must be below the maximum")
+        self._vmin = float(vmin)
+        self._vmax = float(vmax)
+        self._bins = int(bins)
+        self._kind = kind
+        self._log = bool(log)
+        # range and bin sizes in the binned space (log10 for log)
+        self._lo, self._hi = self._transform(np.array([vmin, vmax]))
+        self._dx = (self._hi - self._lo) / self._bins
+        if kind == "hist":
+            self._shape = (self._bins, self._bins)
+        else:
+            # regular hexagons: the rows of the lattice are sqrt(3) bin widths apart;
+            # the second lattice is offset by half a bin width and half a row
+            self._dy = self._dx * np.sqrt(3)
+            nrows = int(np.ceil(self._bins / np.sqrt(3)))
+            self._shape = ((self._bins + 1, nrows + 1), (self._bins, nrows))
+        self._counts = np.zeros(self._ncells, dtype=np.int64)
+        # sums of the pairs, shifted by the means of the first chunk so that the
+        # variances do not suffer from cancellation
+        self._shift = None
+        self._sums = dict.fromkeys(
+            ("n", "obs", "model", "obs2", "model2", "cross", "fge", "obs_total"), 0.0
+        )
+
+    @property
+    def vmin(self) -> float:
+        return self._vmin
+
+    @property
+    def vmax(self) -> float:
+        return self._vmax
+
+    @property
+    def bins(self) -> int:
+        return self._bins
+
+    @property
+    def kind(self) -> str:
+        return self._kind
+
+    @property
+    def log(self) -> bool:
+        return self._log
+
+    @property
+    def _ncells(self) -> int:
+        if self._kind == "hist":
+            return self._shape[0] * self._shape[1]
+        return sum(_nx * _ny for _nx, _ny in self._shape)
+
+    def _transform(self, values: np.ndarray) -> np.ndarray:
+        return np.log10(values) if self._log else values
+
+    def _inverse(self, values: np.ndarray) -> np.ndarray:
+        return 10**values if self._log else values
+
+    def add(self, obs: np.ndarray, model: np.ndarray):
+        """add the pairs of the arrays obs and model (same shape); NaNs are ignored"""
+        obs = np.asarray(obs, dtype=float).ravel()
+        model = np.asarray(model, dtype=float).ravel()
+        valid = np.isfinite(obs) & np.isfinite(model)
+        if self._log:
+            valid &= (obs > 0) & (model > 0)
+        obs, model = obs[valid], model[valid]
+        if obs.size == 0:
+            return
+        self._add_statistics(obs, model)
+        x, y = self._transform(obs), self._transform(model)
+        inside = (x >= self._lo) & (x <= self._hi) & (y >= self._lo) & (y <= self._hi)
+        index = self._cell(x[inside], y[inside])
+        self._counts += np.bincount(index, minlength=self._counts.size)
+
+    def _add_statistics(self, obs: np.ndarray, model: np.ndarray):
+        if self._shift is None:
+            self._shift = (obs.mean(), model.mean())
+        x = obs - self._shift[0]
+        y = model - self._shift[1]
+        sums = self._sums
+        sums["n"] += obs.size
+        sums["obs"] += x.sum()
+        sums["model"] += y.sum()
+        sums["obs2"] += np.dot(x, x)
+        sums["model2"] += np.dot(y, y)
+        sums["cross"] += np.dot(x, y)
+        sums["obs_total"] += obs.sum()
+        # fractional gross error; pairs summing to 0 contribute nothing
+        total = obs + model
+        error = np.abs(model - obs)
+        sums["fge"] += np.divide(
+            error, np.abs(total), out=np.zeros_like(error), where=total != 0
+        ).sum()
+
+    def _cell(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """flat index of the cell of each pair (in the binned space)"""
+        ix = (x - self._lo) / self._dx
+        if self._kind == "hist":
+            nx, ny = self._shape
+            column = np.minimum(ix.astype(np.int64), nx - 1)
+            row = np.minimum(((y - self._lo) / self._dx).astype(np.int64), ny - 1)
+            return column * ny + row
+        iy = (y - self._lo) / self._dy
+        # nearest centre of the two lattices; distances in units of the bin width
+        i1, j1 = np.rint(ix), np.rint(iy)
+        i2, j2 = np.floor(ix), np.floor(iy)
+        d1 = (ix - i1) ** 2 + 3 * (iy - j1) ** 2
+        d2 = (ix - i2 - 0.5) ** 2 + 3 * (iy - j2 - 0.5) ** 2
+        (nx1, ny1), (nx2, ny2) = self._shape
+        i2 = np.minimum(i2.astype(np.int64), nx2 - 1)
+        j2 = np.minimum(j2.astype(np.int64), ny2 - 1)
+        return np.where(
+            d1 <= d2,
+            i1.astype(np.int64) * ny1 + j1.astype(np.int64),
+            nx1 * ny1 + i2 * ny2 + j2,
+        )
+
+    @property
+    def counts(self) -> np.ndarray:
+        """number of pairs per bin
+
+        hist: (bins, bins) with the observations along the first axis;
+        hexbin: per hexagon of both lattices (see hexagons)
+        """
+        if self._kind == "hist":
+            return self._counts.reshape(self._shape)
+        return self._counts
+
+    @property
+    def edges(self) -> np.ndarray:
+        """hist: bin edges (same for both axes)"""
+        return self._inverse(np.linspace(self._lo, self._hi, self._bins + 1))
+
+    def hexagons(self) -> tuple:
+        """hexbin: (vertices (cells, 6, 2), counts) of the hexagons containing pairs"""
+        cells = np.flatnonzero(self._counts)
+        (nx1, ny1), (nx2, ny2) = self._shape
+        lattice1 = cells < nx1 * ny1
+        second = cells - nx1 * ny1
+        i = np.where(lattice1, cells // ny1, second // ny2 + 0.5)
+        j = np.where(lattice1, cells % ny1, second % ny2 + 0.5)
+        centres = np.stack([i * self._dx, j * self._dy], axis=-1) + self._lo
+        vertices = centres[:, None, :] + _HEXAGON * [self._dx, self._dy]
+        return self._inverse(vertices), self._counts[cells]
+
+    @property
+    def statistics(self) -> dict:
+        """number of pairs (n), mean bias (model - obs), normalised mean bias (nmb),
+        root mean square error (rmse), Pearson correlation (r) and fractional gross
+        error (fge); NaN without pairs"""
+        sums = self._sums
+        n = sums["n"]
+        if n == 0:
+            return dict(n=0, bias=np.nan, nmb=np.nan, rmse=np.nan, r=np.nan, fge=np.nan)
+        mean_x, mean_y = sums["obs"] / n, sums["model"] / n
+        shift = self._shift[1] - self._shift[0]
+        # (model - obs) = (y - x) + shift
+        bias = mean_y - mean_x + shift
+        mse = (sums["model2"] - 2 * sums["cross"] + sums["obs2"]) / n + shift * (
+            2 * (mean_y - mean_x) + shift
+        )
+        var_x = sums["obs2"] / n - mean_x**2
+        var_y = sums["model2"] / n - mean_y**2
+        cov = sums["cross"] / n - mean_x * mean_y
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = cov / np.sqrt(var_x * var_y)
+            nmb = bias * n / sums["obs_total"]
+        return dict(
+            n=int(n),
+            bias=float(bias),
+            nmb=float(nmb),
+            rmse=float(np.sqrt(max(mse, 0.0))),
+            r=float(r),
+            fge=float(2 * sums["fge"] / n),
+        )
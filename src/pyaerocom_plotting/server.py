@@ -0,0 +1,443 @@
+"""
+plot server for pyaerocom plotting
+
+A long running process that keeps pyaerocom, iris, cartopy and matplotlib imported and
+the data objects of recent requests in memory. Plot requests are json objects posted
+to /plot:
+
+    {"plottype": ["overall_ts"], "file": "<aeroval json file>"}
+    {"plottype": ["overall_ts_grid"], "file": ["<aeroval json file>", ...]}
+    {"plottype": ["pixelmap"], "models": ["<model>"], "vars": ["od550aer"], "startyear": 2019}
+    {"plottype": ["scatter_density"], "colocated": ["<colocated data file or dir>"]}
+
+optional keys are outdir, title, endyear, template, animation, fps, tiles, frames,
+scatterkind, scatterbins, scatterlog, scatterrange, regions, splitregions, statprops,
+splitstats, dpi, format, compression, thumbnails and force. The server answers with
+{"files": [...], "time": <seconds>}, or with the image itself if the request contains
+"response": "image" and results in a single file.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from pyaerocom_plotting.const import (
+    DEFAULT_ANIMATION_FPS,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MAX_SIZE,
+    DEFAULT_DPI,
+    DEFAULT_MAX_OPEN_FILES,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_READ_WORKERS,
+    DEFAULT_REGIONS,
+    DEFAULT_SCATTER_BINS,
+    DEFAULT_SCATTER_KIND,
+    DEFAULT_STAT_PROPS,
+    DEFAULT_SERVER_CACHE_ITEMS,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+)
+
+CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".apng": "image/apng",
+    ".mp4": "video/mp4",
+    ".svg": "image/svg+xml",
+    ".pdf": "application/pdf",
+}
+
+
+def _mtime(path: str) -> int:
+    """mtime of path in ns; None if it does not exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+class DataCache:
+    """least recently used cache for data objects (PyaModelData, AerovalJsonData)"""
+
+    def __init__(self, max_items: int = DEFAULT_SERVER_CACHE_ITEMS):
+        self._max_items = max(1, int(max_items))
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: tuple, load):
+        """return the object cached for key; calls load() and caches the result if it is
+        not cached"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._hits += 1
+                return self._items[key]
+            self._misses += 1
+        value = load()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    @property
+    def keys(self) -> list[tuple]:
+        with self._lock:
+            return list(self._items)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+
+class _PlotRequestHandler(BaseHTTPRequestHandler):
+    """http handler of the plot server; self.server.plot_server is the PlotServer"""
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: dict):
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._send_json(200, self.server.plot_server.status())
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        plot_server = self.server.plot_server
+        if self.path == "/clear":
+            plot_server.cache.clear()
+            self._send_json(200, plot_server.status())
+            return
+        if self.path != "/plot":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            files = plot_server.plot(request)
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_json(400, {"error": f"invalid request: {e!r}"})
+            return
+        except Exception:
+            self._send_json(500, {"error": traceback.format_exc(limit=1).strip()})
+            return
+
+        if request.get("response") == "image":
+            if len(files) != 1:
+                self._send_json(
+                    400, {"error": f"request resulted in {len(files)} files, not 1"}
+                )
+                return
+            with open(files[0], "rb") as fh:
+                body = fh.read()
+            content_type = CONTENT_TYPES.get(
+                os.path.splitext(files[0])[1], "application/octet-stream"
+            )
+            self._send(200, body, content_type)
+            return
+        self._send_json(200, {"files": files, "time": time.perf_counter() - start})
+
+    def log_message(self, format, *args):
+        if self.server.plot_server.verbose:
+            super().log_message(format, *args)
+
+
+class PlotServer:
+    """http plot server keeping the libraries imported and recent data in memory"""
+
+    __version__ = "0.0.1"
+
+    def __init__(
+        self,
+        host: str = DEFAULT_SERVER_HOST,
+        port: int = DEFAULT_SERVER_PORT,
+        outdir: str = ".",
+        cache_items: int = DEFAULT_SERVER_CACHE_ITEMS,
+        options: dict = None,
+        verbose: bool = False,
+    ):
+        self._outdir = outdir
+        self._cache = DataCache(cache_items)
+        # pyaerocom readers of the models; {model: (reader, mtime of its data directory)}
+        self._readers = {}
+        # defaults for the options of the plot functions of the command line scripts
+        self._options = {
+            "workers": 1,
+            "readworkers": DEFAULT_READ_WORKERS,
+            "maxopenfiles": DEFAULT_MAX_OPEN_FILES,
+            "template": False,
+            "animation": [],
+            "fps": DEFAULT_ANIMATION_FPS,
+            "tiles": None,
+            "frames": True,
+            "scatterkind": DEFAULT_SCATTER_KIND,
+            "scatterbins": DEFAULT_SCATTER_BINS,
+            "scatterlog": False,
+            "scatterrange": None,
+            "cachedir": DEFAULT_CACHE_DIR,
+            "cachesize": DEFAULT_CACHE_MAX_SIZE,
+            "nocache": False,
+            "maxmemory": None,
+            "force": False,
+            "regions": DEFAULT_REGIONS,
+            "splitregions": False,
+            "statprops": DEFAULT_STAT_PROPS,
+            "splitstats": False,
+            "dpi": DEFAULT_DPI,
+            "format": DEFAULT_OUTPUT_FORMAT,
+            "compression": None,
+            "thumbnails": [],
+            "backgroundencode": False,
+        }
+        if options is not None:
+            self._options.update(options)
+        self.verbose = verbose
+        # matplotlib's pyplot is not thread safe; plot requests are handled one at a time
+        self._plot_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _PlotRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.plot_server = self
+
+    @property
+    def cache(self) -> DataCache:
+        return self._cache
+
+    @property
+    def address(self) -> tuple:
+        return self._httpd.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def warm_up():
+        """import the heavy libraries once, before the first request"""
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import cartopy.crs
+        import iris.quickplot
+        import matplotlib.pyplot
+        import pyaerocom
+
+    def status(self) -> dict:
+        return {
+            "version": self.__version__,
+            "cache": [list(_key) for _key in self._cache.keys],
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+        }
+
+    def _read_json(self, options: dict):
+        from pyaerocom_plotting.cli.pyaerocom_plot_json import _json_files, json_read
+
+        key = ("json",)
+        for _file in _json_files(options):
+            stat = os.stat(_file)
+            key += (os.path.abspath(_file), stat.st_mtime_ns, stat.st_size)
+        return self._cache.get(key, lambda: json_read(options))
+
+    def _model_data(self, options: dict):
+        """a new PyaModelData with the readers of the models in options
+
+        the readers, i.e. the scans of the data directories, are kept between requests. A
+        data directory is only scanned again if its mtime changed (files added, removed or
+        replaced); files rewritten in place are detected by their mtimes and sizes, see
+        plot_models and _read_models.
+        """
+        from pyaerocom_plotting.readers import PyaModelData
+
+        model_data = PyaModelData()
+        for _model in options["models"]:
+            reader, mtime = self._readers.get(_model, (None, None))
+            if mtime is not None and _mtime(reader.data_dir) == mtime:
+                model_data.add_reader(_model, reader)
+        # creates the readers of the other models
+        model_data.find_source_files(
+            options["models"], (), options["startyear"], options["endyear"]
+        )
+        for _model, _reader in model_data.readers.items():
+            if self._readers.get(_model, (None, None))[0] is not _reader:
+                self._readers[_model] = (_reader, _mtime(_reader.data_dir))
+        return model_data
+
+    def _read_models(self, options: dict, model_data):
+        """read the model data of options into model_data (a PyaModelData with the
+        readers of the models) or take it from the cache
+
+        the cache key contains a digest of the names, mtimes and sizes of the source
+        files, so that new or rewritten model files are read again. It does not contain
+        the plot types: the cached object keeps everything read and computed for earlier
+        requests (e.g. the resampled data and the weighted means), only what is missing
+        for this request is read.
+        """
+        from pyaerocom_plotting.cli.pyaerocom_plot import read_models
+        from pyaerocom_plotting.manifest import file_info
+
+        # the readers exist already, so the data directories are not scanned again
+        files = model_data.find_source_files(
+            options["models"],
+            options["vars"],
+            options["startyear"],
+            options["endyear"],
+        )
+        info = file_info(set(_file for _files in files.values() for _file in _files))
+        key = (
+            "models",
+            tuple(options["models"]),
+            tuple(options["vars"]),
+            options["startyear"],
+            options["endyear"],
+            hashlib.sha256(json.dumps(info).encode("utf-8")).hexdigest(),
+        )
+        model_data = self._cache.get(key, lambda: model_data)
+        return read_models(options, model_data=model_data)
+
+    def plot(self, request: dict) -> list[str]:
+        """handle a plot request; returns the plot files"""
+        from pyaerocom_plotting.cli.pyaerocom_plot import (
+            plot_colocated,
+            plot_models,
+            read_colocated,
+        )
+        from pyaerocom_plotting.cli.pyaerocom_plot_json import plot_json_file
+
+        options = dict(self._options)
+        options["outdir"] = request.get("outdir", self._outdir)
+        options["plottype"] = request["plottype"]
+        if isinstance(options["plottype"], str):
+            options["plottype"] = [options["plottype"]]
+        options["plottitle"] = request.get("title")
+        options["force"] = bool(request.get("force", options["force"]))
+        options["template"] = bool(request.get("template", options["template"]))
+        options["regions"] = list(request.get("regions", options["regions"]))
+        for _key in (
+            "animation",
+            "fps",
+            "tiles",
+            "frames",
+            "scatterkind",
+            "scatterbins",
+            "scatterlog",
+            "scatterrange",
+            "splitregions",
+            "statprops",
+            "splitstats",
+            "dpi",
+            "format",
+            "compression",
+            "thumbnails",
+        ):
+            options[_key] = request.get(_key, options[_key])
+        os.makedirs(options["outdir"], exist_ok=True)
+
+        with self._plot_lock:
+            if "file" in request:
+                # a file or a list of files
+                options["file"] = request["file"]
+                # all regions of the files unless given
+                options["regions"] = request.get("regions")
+                return plot_json_file(options, read=self._read_json)
+            if "models" in request:
+                options["models"] = list(request["models"])
+                options["vars"] = list(request["vars"])
+                options["startyear"] = int(request["startyear"])
+                options["endyear"] = int(
+                    request.get("endyear", options["startyear"] + 1)
+                )
+                return plot_models(
+                    options,
+                    read=self._read_models,
+                    model_data=self._model_data(options),
+                )
+            if "colocated" in request:
+                options["colocated"] = list(request["colocated"])
+                # not cached: the files are opened lazily and only the selected
+                # data is read, so the files may change between requests
+                return plot_colocated(read_colocated(options), options)
+        raise ValueError("request needs either a file, models or colocated data")
+
+    def serve_forever(self):
+        print(f"serving plots on {self.url}")
+        self._httpd.serve_forever()
+
+    def shutdown(self):
+        """stop serve_forever (from another thread) and close the socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class PlotClient:
+    """client for the plot server"""
+
+    def __init__(
+        self,
+        url: str = f"http://{DEFAULT_SERVER_HOST}:{DEFAULT_SERVER_PORT}",
+        timeout: float = None,
+    ):
+        self._url = url.rstrip("/")
+        self._timeout = timeout
+
+    def _post(self, path: str, data: dict) -> bytes:
+        request = Request(
+            f"{self._url}{path}",
+            data=json.dumps(data).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urlopen(request, timeout=self._timeout) as response:
+                return response.read()
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read())["error"]
+            except (ValueError, KeyError):
+                message = str(e)
+            raise RuntimeError(f"plot server error {e.code}: {message}") from None
+
+    def plot(self, **request) -> list[str]:
+        """request plots; returns the plot files"""
+        return json.loads(self._post("/plot", request))["files"]
+
+    def image(self, **request) -> bytes:
+        """request a single plot; returns the image data"""
+        request["response"] = "image"
+        return self._post("/plot", request)
+
+    def status(self) -> dict:
+        with urlopen(f"{self._url}/status", timeout=self._timeout) as response:
+            return json.loads(response.read())
+
+    def clear(self) -> dict:
+        """remove all data objects from the server's cache"""
+        return json.loads(self._post("/clear", {}))
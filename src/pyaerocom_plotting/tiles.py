@@ -0,0 +1,166 @@
+"""
+XYZ map tiles of the pixelmap frames
+
+TileWriter writes the tile pyramid (zoom levels 0 to maxzoom, 256x256 pixel tiles in
+web mercator, {z}/{x}/{y}.png as used by leaflet, openlayers, ...) of a frame straight
+from the frame's data while the frame is rendered; the plot files are not read again.
+The data is coloured with the colour map of the pixelmap and a colour scale fixed for
+the whole series, so that the tiles of all months are comparable. Grid cells without
+data and tiles without any data are transparent respectively not written.
+
+OBS: this module is imported by the command line scripts for argument parsing and must
+not import heavy dependencies at module level.
+"""
+import json
+import os
+
+from pyaerocom_plotting.profiling import stage
+
+TILE_SIZE = 256
+# tiles are written as png, or webp if the plot files are webp; both keep transparency
+TILE_FORMATS = {"png": "png", "webp": "webp"}
+
+
+def _cell_edges(points):
+    """cell edges of the 1D grid points, halfway between the points"""
+    import numpy as np
+
+    points = np.asarray(points, dtype=float)
+    if points.size == 1:
+        return np.array([points[0] - 0.5, points[0] + 0.5])
+    mid = (points[1:] + points[:-1]) / 2
+    return np.concatenate([[2 * points[0] - mid[0]], mid, [2 * points[-1] - mid[-1]]])
+
+
+def _cell_index(edges, values):
+    """index of the grid cell containing each value; -1 outside of the grid"""
+    import numpy as np
+
+    descending = edges[0] > edges[-1]
+    if descending:
+        edges = edges[::-1]
+    index = np.searchsorted(edges, values, side="right") - 1
+    ncells = edges.size - 1
+    index[(index < 0) | (index >= ncells)] = -1
+    if descending:
+        index[index >= 0] = ncells - 1 - index[index >= 0]
+    return index
+
+
+def tile_latitudes(zoom: int, y: int):
+    """latitudes of the pixel rows of tile row y at zoom"""
+    import numpy as np
+
+    rows = (y * TILE_SIZE + np.arange(TILE_SIZE) + 0.5) / (TILE_SIZE * 2**zoom)
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * rows))))
+
+
+def tile_longitudes(zoom: int):
+    """longitudes of the pixel columns of all tiles at zoom"""
+    import numpy as np
+
+    columns = (np.arange(TILE_SIZE * 2**zoom) + 0.5) / (TILE_SIZE * 2**zoom)
+    return columns * 360 - 180
+
+
+class TileWriter:
+    """writes the XYZ tiles of 2D iris cubes up to maxzoom"""
+
+    def __init__(
+        self,
+        maxzoom: int,
+        vmin: float,
+        vmax: float,
+        cmap: str = None,
+        format: str = "png",
+    ):
+        if maxzoom < 0:
+            raise ValueError("the maximum zoom level of the tiles must not be negative")
+        self._maxzoom = int(maxzoom)
+        self._vmin = float(vmin)
+        self._vmax = float(vmax)
+        # None: matplotlib's default colour map, which the pixelmaps use
+        self._cmap = cmap
+        self._format = TILE_FORMATS.get(format, "png")
+
+    @property
+    def maxzoom(self) -> int:
+        return self._maxzoom
+
+    @property
+    def format(self) -> str:
+        return self._format
+
+    def _colormap(self):
+        import matplotlib
+
+        return matplotlib.colormaps[self._cmap or matplotlib.rcParams["image.cmap"]]
+
+    def write(self, cube, tiledir: str) -> list[str]:
+        """write the tiles of cube (2D with latitude and longitude) to tiledir
+
+        returns the tile files
+        """
+        import numpy as np
+        from matplotlib.colors import Normalize
+        from PIL import Image
+
+        data = np.ma.masked_invalid(cube.data)
+        lat_edges = _cell_edges(cube.coord("latitude").points)
+        lon_edges = _cell_edges(cube.coord("longitude").points)
+        if data.shape != (lat_edges.size - 1, lon_edges.size - 1):
+            # latitude is expected as first dimension
+            data = data.T
+        # longitudes of the tiles (-180 to 180) in the convention of the grid
+        lon_start = min(lon_edges[0], lon_edges[-1])
+        colormap = self._colormap()
+        norm = Normalize(vmin=self._vmin, vmax=self._vmax)
+
+        files = []
+        os.makedirs(tiledir, exist_ok=True)
+        with stage("tiles", dir=tiledir):
+            for _zoom in range(self._maxzoom + 1):
+                lon_index = _cell_index(
+                    lon_edges, (tile_longitudes(_zoom) - lon_start) % 360 + lon_start
+                )
+                for _y in range(2**_zoom):
+                    lat_index = _cell_index(lat_edges, tile_latitudes(_zoom, _y))
+                    # pixels of the whole tile row by nearest grid cell lookup
+                    rows = data[np.maximum(lat_index, 0)][:, np.maximum(lon_index, 0)]
+                    rows = np.ma.masked_where(
+                        (lat_index[:, None] < 0) | (lon_index[None, :] < 0), rows
+                    )
+                    # masked cells get the transparent "bad" colour of the colour map
+                    rgba = colormap(norm(rows), bytes=True)
+                    has_data = ~np.ma.getmaskarray(rows)
+                    for _x in range(2**_zoom):
+                        columns = slice(_x * TILE_SIZE, (_x + 1) * TILE_SIZE)
+                        if not has_data[:, columns].any():
+                            continue
+                        filename = os.path.join(
+                            tiledir, str(_zoom), str(_x), f"{_y}.{self._format}"
+                        )
+                        os.makedirs(os.path.dirname(filename), exist_ok=True)
+                        Image.fromarray(rgba[:, columns], "RGBA").save(filename)
+                        files.append(filename)
+        return files
+
+    def write_metadata(self, filename: str, times: list[str], **info):
+        """write a json file describing the tiles of a series to filename
+
+        times are the names of the sub directories of the frames
+        """
+        metadata = {
+            "tiles": f"{{time}}/{{z}}/{{x}}/{{y}}.{self._format}",
+            "times": list(times),
+            "minzoom": 0,
+            "maxzoom": self._maxzoom,
+            "tilesize": TILE_SIZE,
+            "colormap": self._colormap().name,
+            "vmin": self._vmin,
+            "vmax": self._vmax,
+            **info,
+        }
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w") as fh:
+            json.dump(metadata, fh, indent=1)
@@ -0,0 +1,151 @@
+"""
+helpers to create small synthetic input data for the tests
+"""
+import numpy as np
+
+
+def make_cube(
+    var_name: str = "od550aer",
+    ndays: int = 60,
+    nlat: int = 18,
+    nlon: int = 36,
+    seed: int = 0,
+    startyear: int = 2019,
+):
+    """create a daily iris cube with random data starting on January 1st of startyear"""
+    import cf_units
+    import iris.coords
+    import iris.cube
+
+    rng = np.random.default_rng(seed)
+    data = rng.random((ndays, nlat, nlon)).astype("float32")
+    time = iris.coords.DimCoord(
+        np.arange(ndays, dtype=float),
+        standard_name="time",
+        units=cf_units.Unit(f"days since {startyear}-01-01", calendar="standard"),
+    )
+    lat = iris.coords.DimCoord(
+        np.linspace(-85.0, 85.0, nlat), standard_name="latitude", units="degrees"
+    )
+    lon = iris.coords.DimCoord(
+        np.linspace(-175.0, 175.0, nlon), standard_name="longitude", units="degrees"
+    )
+    lat.guess_bounds()
+    lon.guess_bounds()
+    return iris.cube.Cube(
+        data,
+        var_name=var_name,
+        units="1",
+        dim_coords_and_dims=[(time, 0), (lat, 1), (lon, 2)],
+    )
+
+
+def make_gridded_data(
+    var_name: str = "od550aer",
+    data_id: str = "SYNTHETIC",
+    ndays: int = 60,
+    nlat: int = 18,
+    nlon: int = 36,
+    seed: int = 0,
+):
+    """create a daily GriddedData object with random data starting 2019-01-01"""
+    from pyaerocom.griddeddata import GriddedData
+
+    return GriddedData(
+        make_cube(var_name=var_name, ndays=ndays, nlat=nlat, nlon=nlon, seed=seed),
+        var_name=var_name,
+        data_id=data_id,
+        ts_type="daily",
+        check_unit=False,
+        convert_unit_on_init=False,
+    )
+
+
+def write_model_dir(
+    data_dir: str,
+    data_id: str = "SYNTHETIC",
+    var_names: tuple = ("od550aer",),
+    years: tuple = (2019,),
+    nlat: int = 18,
+    nlon: int = 36,
+) -> list[str]:
+    """write daily model files in aerocom3 file naming convention to data_dir
+
+    returns the list of written files
+    """
+    import os
+
+    import iris
+
+    files = []
+    for _seed, _var in enumerate(var_names):
+        for _year in years:
+            filename = os.path.join(
+                data_dir, f"aerocom3_{data_id}_{_var}_Column_{_year}_daily.nc"
+            )
+            ndays = 366 if _year % 4 == 0 else 365
+            cube = make_cube(
+                var_name=_var,
+                ndays=ndays,
+                nlat=nlat,
+                nlon=nlon,
+                seed=_seed + _year,
+                startyear=_year,
+            )
+            iris.save(cube, filename)
+            files.append(filename)
+    return files
+
+
+def make_colocated_data(
+    var_name: str = "od550aer",
+    model: str = "SYNTHETIC",
+    obs: str = "AeronetSunV3Lev2.daily",
+    ntimes: int = 24,
+    nstations: int = 10,
+    ts_type: str = "monthly",
+    seed: int = 0,
+):
+    """create a pyaerocom ColocatedData object with random data starting 2019-01-01
+
+    about 10% of the observations are missing (NaN)
+    """
+    import pandas as pd
+    import xarray as xr
+    from pyaerocom import ColocatedData
+
+    rng = np.random.default_rng(seed)
+    freq = {"monthly": "MS", "daily": "D"}[ts_type]
+    ref = rng.random((ntimes, nstations))
+    ref[rng.random(ref.shape) < 0.1] = np.nan
+    data = ref * 0.8 + 0.1 * rng.random(ref.shape)
+    array = xr.DataArray(
+        np.stack([ref, data]),
+        dims=("data_source", "time", "station_name"),
+        coords={
+            "data_source": [obs, model],
+            "time": pd.date_range("2019-01-01", periods=ntimes, freq=freq),
+            "station_name": [f"STATION{_idx}" for _idx in range(nstations)],
+            "latitude": ("station_name", np.linspace(-60.0, 60.0, nstations)),
+            "longitude": ("station_name", np.linspace(-150.0, 150.0, nstations)),
+            "altitude": ("station_name", np.zeros(nstations)),
+        },
+        name=var_name,
+        attrs={
+            "data_source": [obs, model],
+            "var_name": [var_name, var_name],
+            "var_units": ["1", "1"],
+            "ts_type": ts_type,
+            "filter_name": "ALL-wMOUNTAINS",
+            "ts_type_src": ["daily", "daily"],
+            "model_name": model,
+            "obs_name": obs,
+        },
+    )
+    return ColocatedData(data=array)
+
+
+def write_colocated_file(data_dir: str, **kwargs) -> str:
+    """write a colocated data file (see make_colocated_data) in pyaerocom's file naming
+    convention to data_dir; returns the file name"""
+    return make_colocated_data(**kwargs).to_netcdf(data_dir)
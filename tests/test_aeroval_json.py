@@ -0,0 +1,224 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import simplejson as json
+
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import AerovalJsonData
+
+FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "testdata",
+    "ALL-Aeronet-od550aer-Column.json",
+)
+
+
+class TestAerovalJsonData(unittest.TestCase):
+    def test_read_selection(self):
+        with open(FILE) as fh:
+            full = json.load(fh)
+
+        json_data = AerovalJsonData()
+        json_data.read(FILE, select={"model": ["AATSR", "ATSR2"], "region": "ALL"})
+        data = json_data.data[FILE]["od550aer"]["Aeronet"]["Column"]
+        self.assertEqual(sorted(data), ["AATSR", "ATSR2"])
+        self.assertEqual(data["AATSR"], full["od550aer"]["Aeronet"]["Column"]["AATSR"])
+        self.assertEqual(sorted(json_data.models), ["AATSR", "ATSR2"])
+
+    def test_read_empty_selection(self):
+        json_data = AerovalJsonData()
+        json_data.read(FILE, select={"model": "NOT_A_MODEL"})
+        self.assertEqual(json_data.data[FILE], {})
+        self.assertEqual(json_data.models, [])
+
+    def test_index(self):
+        with open(FILE) as fh:
+            full = json.load(fh)
+
+        json_data = AerovalJsonData()
+        json_data.read(FILE)
+        self.assertEqual(json_data.files, [FILE])
+        self.assertEqual(json_data.vars, ["od550aer"])
+        self.assertEqual(json_data.obsnetworks, ["Aeronet"])
+        self.assertEqual(json_data.code, ["Column"])
+        self.assertEqual(json_data.models, list(full["od550aer"]["Aeronet"]["Column"]))
+        self.assertEqual(json_data.regions, ["ALL"])
+        self.assertEqual(len(json_data.paths()), len(json_data.models))
+
+        path = ("od550aer", "Aeronet", "Column", "AATSR", "od550aer", "ALL")
+        self.assertTrue(json_data.has_leaf(*path))
+        self.assertFalse(json_data.has_leaf(*path[:-1], "EUROPE"))
+        self.assertEqual(
+            json_data.leaf(*path),
+            full["od550aer"]["Aeronet"]["Column"]["AATSR"]["od550aer"]["ALL"],
+        )
+
+    def test_columns(self):
+        json_data = AerovalJsonData()
+        json_data.read(FILE)
+        path = ("od550aer", "Aeronet", "Column", "SLSTR.SU.A", "od550aer", "ALL")
+        leaf = json_data.leaf(*path)
+        columns = json_data.columns(*path)
+        # built once and cached
+        self.assertIs(json_data.columns(*path), columns)
+
+        self.assertEqual(len(columns), len(leaf))
+        self.assertEqual(columns.time.dtype, np.dtype("datetime64[ms]"))
+        self.assertEqual(columns.time[0], np.datetime64(int(next(iter(leaf))), "ms"))
+        for _stat in ("data_mean", "refdata_mean", "num_valid"):
+            self.assertIn(_stat, columns)
+            expected = np.array(
+                [np.nan if x[_stat] is None else x[_stat] for x in leaf.values()]
+            )
+            np.testing.assert_array_equal(columns[_stat], expected)
+
+        selection = columns.select(["rms", "not_a_stat", "data_mean"])
+        self.assertEqual(selection.shape, (3, len(leaf)))
+        np.testing.assert_array_equal(selection[0], columns["rms"])
+        np.testing.assert_array_equal(selection[2], columns["data_mean"])
+        self.assertTrue(np.isnan(selection[1]).all())
+
+    def test_overall_ts_plot(self):
+        json_data = AerovalJsonData()
+        json_data.read(FILE)
+        with TemporaryDirectory() as tmp_dir:
+            files = Plotting(plotdir=tmp_dir).plot_aeroval_overall_time_series(
+                json_data
+            )
+            self.assertEqual(len(files), 1)
+            self.assertTrue(os.path.exists(files[0]))
+
+    def test_overall_ts_grid(self):
+        with open(FILE) as fh:
+            full = json.load(fh)
+        column = full["od550aer"]["Aeronet"]["Column"]
+        with TemporaryDirectory() as tmp_dir:
+            # a second file of another variable with an additional region
+            other = {
+                _model: {
+                    "ang4487aer": {
+                        "ALL": _leaf["od550aer"]["ALL"],
+                        "EUROPE": _leaf["od550aer"]["ALL"],
+                    }
+                }
+                for _model, _leaf in column.items()
+            }
+            other_file = os.path.join(tmp_dir, "ALL-Aeronet-ang4487aer-Column.json")
+            with open(other_file, "w") as fh:
+                json.dump({"ang4487aer": {"Aeronet": {"Column": other}}}, fh)
+
+            json_data = AerovalJsonData()
+            json_data.read_many([FILE, other_file], workers=2)
+            self.assertEqual(json_data.files, [FILE, other_file])
+            self.assertEqual(json_data.vars, ["od550aer", "ang4487aer"])
+            self.assertEqual(json_data.keys("var", other_file), ["ang4487aer"])
+            self.assertEqual(json_data.keys("region", FILE), ["ALL"])
+            self.assertEqual(json_data.regions, ["ALL", "EUROPE"])
+
+            files = Plotting(plotdir=tmp_dir).plot_aeroval_overall_time_series_grid(
+                json_data, regions=["ALL", "EUROPE", "NOT_A_REGION"]
+            )
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files],
+                ["overallts_grid_data_mean_od550aer_ang4487aer_Aeronet.png"],
+            )
+            self.assertTrue(os.path.exists(files[0]))
+            # none of the regions in the files: nothing to plot
+            self.assertEqual(
+                Plotting(plotdir=tmp_dir).plot_aeroval_overall_time_series_grid(
+                    json_data, regions=["NOT_A_REGION"]
+                ),
+                [],
+            )
+
+            with self.assertRaises(FileNotFoundError):
+                AerovalJsonData().read_many([FILE, os.path.join(tmp_dir, "missing")])
+
+    def test_overall_ts_regions(self):
+        from PIL import Image
+
+        with open(FILE) as fh:
+            full = json.load(fh)
+        column = full["od550aer"]["Aeronet"]["Column"]
+        regions = ["ALL", "EUROPE", "ASIA", "AFRICA", "NAMERICA"]
+        with TemporaryDirectory() as tmp_dir:
+            # the same series for 5 regions: 2 rows of 3 panels
+            regional = {
+                _model: {
+                    "od550aer": {
+                        _region: _leaf["od550aer"]["ALL"] for _region in regions
+                    }
+                }
+                for _model, _leaf in column.items()
+            }
+            regional_file = os.path.join(tmp_dir, "ALL-Aeronet-od550aer-Column.json")
+            with open(regional_file, "w") as fh:
+                json.dump({"od550aer": {"Aeronet": {"Column": regional}}}, fh)
+            json_data = AerovalJsonData()
+            json_data.read(regional_file)
+
+            plotting = Plotting(plotdir=tmp_dir)
+            files = plotting.plot_aeroval_overall_time_series_regions(json_data)
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files],
+                ["overallts_od550aer_data_mean_Aeronet_Column_regions.png"],
+            )
+            with Image.open(files[0]) as image:
+                size = image.size
+
+            files = plotting.plot_aeroval_overall_time_series_regions(
+                json_data, regions=["EUROPE", "ALL", "NOT_A_REGION"], split=True
+            )
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files],
+                [
+                    "overallts_od550aer_data_mean_Aeronet_Column_EUROPE.png",
+                    "overallts_od550aer_data_mean_Aeronet_Column_ALL.png",
+                    "overallts_od550aer_data_mean_Aeronet_Column_legend.png",
+                ],
+            )
+            for _file in files:
+                with Image.open(_file) as image:
+                    self.assertLess(image.size[0], size[0])
+                    self.assertLess(image.size[1], size[1])
+
+    def test_overall_ts_stats(self):
+        from PIL import Image
+
+        json_data = AerovalJsonData()
+        json_data.read(FILE)
+        with TemporaryDirectory() as tmp_dir:
+            plotting = Plotting(plotdir=tmp_dir)
+            files = plotting.plot_aeroval_overall_time_series_stats(
+                json_data, stat_props=["data_mean", "mb", "not_a_stat", "R"]
+            )
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files],
+                ["overallts_stats_od550aer_Aeronet_Column_ALL.png"],
+            )
+            with Image.open(files[0]) as image:
+                size = image.size
+
+            files = plotting.plot_aeroval_overall_time_series_stats(
+                json_data, stat_props=["mb", "R"], split=True
+            )
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files],
+                [
+                    "overallts_stats_od550aer_mb_Aeronet_Column_ALL.png",
+                    "overallts_stats_od550aer_R_Aeronet_Column_ALL.png",
+                    "overallts_stats_od550aer_Aeronet_Column_ALL_legend.png",
+                ],
+            )
+            for _file in files:
+                with Image.open(_file) as image:
+                    self.assertLess(image.size[1], size[1])
+
+            self.assertEqual(
+                plotting.plot_aeroval_overall_time_series_stats(
+                    json_data, stat_props=["not_a_stat"]
+                ),
+                [],
+            )
@@ -0,0 +1,133 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from pyaerocom_plotting.animation import AnimationWriter, check_animation
+from pyaerocom_plotting.manifest import BuildManifest
+from pyaerocom_plotting.output import OutputSettings
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData
+from pyaerocom_plotting.tiles import TileWriter, tile_latitudes, tile_longitudes
+from synthetic import make_cube, make_gridded_data
+
+
+def make_frames(nframes: int = 3, size: tuple = (40, 30)) -> list:
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(0, 256, (size[1], size[0], 4), dtype=np.uint8)
+        for _ in range(nframes)
+    ]
+
+
+class TestAnimation(unittest.TestCase):
+    def test_animation_writer(self):
+        from PIL import Image
+
+        formats = ["gif", "apng"]
+        if shutil.which("ffmpeg") is not None:
+            formats.append("mp4")
+        with TemporaryDirectory() as tmp_dir:
+            for _format in formats:
+                filename = os.path.join(tmp_dir, f"animation.{_format}")
+                with AnimationWriter(filename, _format, fps=4) as writer:
+                    for _frame in make_frames():
+                        writer.add(_frame)
+                self.assertTrue(os.path.exists(filename))
+                if _format == "mp4":
+                    continue
+                with Image.open(filename) as image:
+                    self.assertEqual(image.n_frames, 3)
+                    self.assertEqual(image.size, (40, 30))
+
+            writer = AnimationWriter(os.path.join(tmp_dir, "sizes.gif"))
+            writer.add(make_frames(1)[0])
+            with self.assertRaises(ValueError):
+                writer.add(make_frames(1, size=(20, 30))[0])
+
+        with self.assertRaises(ValueError):
+            check_animation(["avi"])
+        with self.assertRaises(ValueError):
+            check_animation(["gif"], fps=0)
+
+    def test_tiles(self):
+        from matplotlib import colormaps
+        from matplotlib.colors import Normalize
+        from PIL import Image
+
+        cube = make_cube(ndays=1)[0]
+        data = cube.data
+        with TemporaryDirectory() as tmp_dir:
+            files = TileWriter(2, data.min(), data.max()).write(cube, tmp_dir)
+            # 1 + 4 + 16 tiles; the grid covers the globe
+            self.assertEqual(len(files), 21)
+            with Image.open(os.path.join(tmp_dir, "1", "1", "0.png")) as image:
+                tile = np.asarray(image)
+        # the pixel shows the colour of the grid cell it lies in
+        lat = tile_latitudes(1, 0)[100]
+        lon = tile_longitudes(1)[256 + 50]
+        lat_idx = np.abs(cube.coord("latitude").points - lat).argmin()
+        lon_idx = np.abs(cube.coord("longitude").points - lon).argmin()
+        colour = colormaps["viridis"](
+            Normalize(data.min(), data.max())(data[lat_idx, lon_idx]), bytes=True
+        )
+        np.testing.assert_array_equal(tile[100, 50], colour)
+
+    def test_pixel_map_streams(self):
+        from PIL import Image
+
+        def model_data(change_february: bool = False) -> PyaModelData:
+            data = make_gridded_data(ndays=59)
+            if change_february:
+                data.cube.data[40] += 1.0
+            model_data = PyaModelData()
+            model_data.add_model_data("SYNTHETIC", "od550aer", data)
+            return model_data
+
+        for template in (False, True):
+            with TemporaryDirectory() as tmp_dir:
+
+                def plot(data: PyaModelData) -> list[str]:
+                    return Plotting(
+                        plotdir=tmp_dir,
+                        workers=2,
+                        manifest=BuildManifest(tmp_dir),
+                        output=OutputSettings(dpi=50),
+                    ).plot_pixel_map(
+                        data,
+                        template=template,
+                        animation=["gif", "apng"],
+                        tiles=1,
+                        frames=False,
+                    )
+
+                files = plot(model_data())
+                self.assertEqual(
+                    [os.path.basename(_file) for _file in files],
+                    [
+                        "tiles.json",
+                        "pixelmap_SYNTHETIC_od550aer_monthly.gif",
+                        "pixelmap_SYNTHETIC_od550aer_monthly.apng",
+                    ],
+                )
+                # no plot files of the frames
+                self.assertFalse(
+                    any(_file.endswith(".png") for _file in os.listdir(tmp_dir))
+                )
+                for _file in files[1:]:
+                    with Image.open(_file) as image:
+                        self.assertEqual(image.n_frames, 2)
+                tiledir = os.path.dirname(files[0])
+                self.assertTrue(
+                    os.path.exists(os.path.join(tiledir, "201902", "1", "1", "1.png"))
+                )
+
+                # changed February data: the animations and the February tiles are
+                # rendered again
+                files.append(os.path.join(tiledir, "201902", "0", "0", "0.png"))
+                mtimes = [os.stat(_file).st_mtime_ns for _file in files[1:]]
+                plot(model_data(change_february=True))
+                for _file, _mtime in zip(files[1:], mtimes):
+                    self.assertNotEqual(os.stat(_file).st_mtime_ns, _mtime)
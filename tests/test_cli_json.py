@@ -0,0 +1,110 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from pyaerocom_plotting.cli import pyaerocom_plot_json
+from pyaerocom_plotting.cli.pyaerocom_plot_json import (
+    batch_files,
+    batch_outdirs,
+    batch_plot,
+)
+
+FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "testdata",
+    "ALL-Aeronet-od550aer-Column.json",
+)
+
+
+class TestBatchMode(unittest.TestCase):
+    def test_batch_plot(self):
+        with TemporaryDirectory() as tmp_dir:
+            in_dir = os.path.join(tmp_dir, "hm", "ts")
+            os.makedirs(in_dir)
+            for _name in (
+                "ALL-Aeronet-od550aer-Column",
+                "EUROPE-Aeronet-od550aer-Column",
+            ):
+                shutil.copy(FILE, os.path.join(in_dir, f"{_name}.json"))
+            with open(os.path.join(in_dir, "broken.json"), "w") as fh:
+                fh.write("{")
+
+            self.assertEqual(len(batch_files([in_dir])), 3)
+            self.assertEqual(
+                len(batch_files([os.path.join(in_dir, "*-Column.json")])), 2
+            )
+
+            options = {
+                "batch": [in_dir],
+                "outdir": os.path.join(tmp_dir, "out"),
+                "plottype": ["overall_ts"],
+                "plottitle": None,
+                "workers": 2,
+            }
+            # the broken file is reported, the others are plotted
+            self.assertEqual(batch_plot(options), 1)
+            for _name in (
+                "ALL-Aeronet-od550aer-Column",
+                "EUROPE-Aeronet-od550aer-Column",
+            ):
+                self.assertTrue(
+                    os.path.exists(
+                        os.path.join(
+                            tmp_dir,
+                            "out",
+                            _name,
+                            "overallts_od550aer_data_mean_Aeronet_Column.png",
+                        )
+                    )
+                )
+
+    def test_batch_exit_status(self):
+        with TemporaryDirectory() as tmp_dir:
+            for _failed, _status in ((0, 0), (1, 1), (256, 1)):
+                argv = ["pyaerocom_plot_json", "-p", "overall_ts", "-o", tmp_dir]
+                with mock.patch("sys.argv", argv + ["-b", tmp_dir]), mock.patch.object(
+                    pyaerocom_plot_json, "batch_plot", return_value=_failed
+                ):
+                    with self.assertRaises(SystemExit) as context:
+                        pyaerocom_plot_json.main()
+                self.assertEqual(context.exception.code, _status)
+
+    def test_batch_same_names(self):
+        with TemporaryDirectory() as tmp_dir:
+            for _exp in ("exp1", "exp2"):
+                os.makedirs(os.path.join(tmp_dir, _exp, "ts"))
+                shutil.copy(FILE, os.path.join(tmp_dir, _exp, "ts", "ALL.json"))
+            pattern = os.path.join(tmp_dir, "*", "ts", "*.json")
+            self.assertEqual(
+                batch_outdirs(batch_files([pattern])),
+                [os.path.join("exp1", "ts", "ALL"), os.path.join("exp2", "ts", "ALL")],
+            )
+
+            options = {
+                "batch": [pattern],
+                "outdir": os.path.join(tmp_dir, "out"),
+                "plottype": ["overall_ts"],
+                "plottitle": None,
+                "workers": 1,
+            }
+            self.assertEqual(batch_plot(options), 0)
+            for _exp in ("exp1", "exp2"):
+                self.assertTrue(
+                    os.path.exists(
+                        os.path.join(
+                            tmp_dir,
+                            "out",
+                            _exp,
+                            "ts",
+                            "ALL",
+                            "overallts_od550aer_data_mean_Aeronet_Column.png",
+                        )
+                    )
+                )
+
+            # files that differ in the extension only are not plotted
+            shutil.copy(FILE, os.path.join(tmp_dir, "exp1", "ts", "ALL.JSON"))
+            options["batch"] = [os.path.join(tmp_dir, "exp1", "ts", "ALL.*")]
+            self.assertEqual(batch_plot(options), 1)
@@ -0,0 +1,229 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy as np
+
+from pyaerocom_plotting.cli.pyaerocom_plot import plot_colocated, read_colocated
+from pyaerocom_plotting.readers import ColocatedFile, PyaColocatedData
+from pyaerocom_plotting.scatter import ScatterStats
+from synthetic import make_colocated_data, write_colocated_file
+
+
+class TestPyaColocatedData(unittest.TestCase):
+    def test_select(self):
+        with TemporaryDirectory() as tmp_dir:
+            file = write_colocated_file(tmp_dir)
+            expected = make_colocated_data().data
+            colocated = ColocatedFile(file)
+            self.assertEqual(colocated.meta["model"], "SYNTHETIC")
+            self.assertEqual(colocated.meta["obs"], "AeronetSunV3Lev2.daily")
+            self.assertEqual(colocated.stations.size, 10)
+
+            selection = colocated.select(
+                stations=["STATION2", "STATION3", "STATION7"],
+                start="2019-03-01",
+                stop="2019-05-01",
+            )
+            self.assertEqual(selection.values.shape, (2, 3, 3))
+            self.assertEqual(
+                list(selection.stations), ["STATION2", "STATION3", "STATION7"]
+            )
+            self.assertEqual(selection.time[0], np.datetime64("2019-03-01"))
+            np.testing.assert_array_equal(
+                selection.ref, expected.values[0, 2:5][:, [2, 3, 7]]
+            )
+            np.testing.assert_array_equal(
+                selection.data, expected.values[1, 2:5][:, [2, 3, 7]]
+            )
+            # data and ref are views of the selected block
+            self.assertTrue(np.shares_memory(selection.data, selection.values))
+            self.assertTrue(np.shares_memory(selection.ref, selection.values))
+            np.testing.assert_array_equal(
+                selection.latitude, expected.latitude.values[[2, 3, 7]]
+            )
+
+            # all stations and times
+            self.assertEqual(colocated.select().values.shape, (2, 24, 10))
+
+            # unknown stations and an empty time window select nothing
+            selection = colocated.select(stations=["NOT_A_STATION"])
+            self.assertEqual(selection.values.shape, (2, 24, 0))
+            self.assertEqual(selection.data.shape, (24, 0))
+            self.assertEqual(len(selection), 0)
+            selection = colocated.select(start="2030-01-01")
+            self.assertEqual(selection.values.shape, (2, 0, 10))
+            self.assertEqual(selection.ref.shape, (0, 10))
+
+    def test_open_dir(self):
+        with TemporaryDirectory() as tmp_dir:
+            for _model in ("MODEL1", "MODEL2"):
+                for _var in ("od550aer", "ang4487aer"):
+                    write_colocated_file(tmp_dir, model=_model, var_name=_var)
+            # a file not named after pyaerocom's convention
+            file = write_colocated_file(tmp_dir, model="MODEL3")
+            shutil.move(file, os.path.join(tmp_dir, "renamed.nc"))
+
+            colocated_data = PyaColocatedData()
+            files = colocated_data.open_dir(tmp_dir, var="od550aer", model="MODEL1")
+            self.assertEqual(len(files), 1)
+            # the file names were enough to select the files
+            self.assertIsNone(files[0]._header)
+
+            colocated_data.open_dir(tmp_dir, var="od550aer")
+            self.assertEqual(colocated_data.models, ["MODEL1", "MODEL2", "MODEL3"])
+            selections = colocated_data.select(model="MODEL3", stations=["STATION0"])
+            self.assertEqual(len(selections), 1)
+            self.assertEqual(selections[0].values.shape, (2, 24, 1))
+            # a station missing in some of the files
+            selections = colocated_data.select(stations=["STATION0", "NOT_A_STATION"])
+            self.assertEqual(
+                [_selection.values.shape for _selection in selections],
+                [(2, 24, 1)] * 3,
+            )
+            selections = colocated_data.select(stations=["NOT_A_STATION"])
+            self.assertEqual(
+                [_selection.data.shape for _selection in selections], [(24, 0)] * 3
+            )
+
+            with self.assertRaises(FileNotFoundError):
+                colocated_data.open(os.path.join(tmp_dir, "missing.nc"))
+
+    def test_scatter_stats(self):
+        rng = np.random.default_rng(0)
+        obs = rng.lognormal(-1.5, 0.7, 100000)
+        model = obs * rng.lognormal(0.1, 0.3, obs.size)
+        obs[::10] = np.nan
+        valid = np.isfinite(obs)
+        ref, data = obs[valid], model[valid]
+
+        scatter = ScatterStats(0.0, 1.0, bins=50)
+        # added in chunks
+        for _chunk in np.array_split(np.arange(obs.size), 3):
+            scatter.add(obs[_chunk], model[_chunk])
+        stats = scatter.statistics
+        self.assertEqual(stats["n"], ref.size)
+        self.assertAlmostEqual(stats["bias"], np.mean(data - ref))
+        self.assertAlmostEqual(stats["nmb"], np.sum(data - ref) / np.sum(ref))
+        self.assertAlmostEqual(stats["rmse"], np.sqrt(np.mean((data - ref) ** 2)))
+        self.assertAlmostEqual(stats["r"], np.corrcoef(ref, data)[0, 1])
+        self.assertAlmostEqual(
+            stats["fge"], 2 * np.mean(np.abs(data - ref) / (data + ref))
+        )
+        # the same bins as numpy
+        counts, _, _ = np.histogram2d(ref, data, bins=50, range=[[0, 1], [0, 1]])
+        np.testing.assert_array_equal(scatter.counts, counts)
+
+        # every pair lies in its hexagon
+        from matplotlib.path import Path as PolygonPath
+
+        scatter = ScatterStats(0.0, 1.0, bins=20, kind="hexbin")
+        scatter.add(ref, data)
+        vertices, counts = scatter.hexagons()
+        inside = (ref <= 1) & (data <= 1)
+        self.assertEqual(counts.sum(), inside.sum())
+        cells = list(np.flatnonzero(scatter._counts))
+        for _obs, _model in zip(ref[inside][:200], data[inside][:200]):
+            cell = scatter._cell(np.array([_obs]), np.array([_model]))[0]
+            self.assertTrue(
+                PolygonPath(vertices[cells.index(cell)]).contains_point((_obs, _model))
+            )
+
+        with self.assertRaises(ValueError):
+            ScatterStats(0.0, 1.0, log=True)
+
+    def test_scatter_plot(self):
+        with TemporaryDirectory() as tmp_dir:
+            data_dir = os.path.join(tmp_dir, "coldata")
+            os.makedirs(data_dir)
+            colocated_files = [
+                write_colocated_file(
+                    data_dir, model=_model, ntimes=365, ts_type="daily"
+                )
+                for _model in ("MODEL1", "MODEL2")
+            ]
+            for _kind, _log in (("hist", False), ("hexbin", True)):
+                options = {
+                    "colocated": [data_dir],
+                    "plottype": ["scatter_density"],
+                    "outdir": tmp_dir,
+                    "workers": 1,
+                    "force": False,
+                    "scatterkind": _kind,
+                    "scatterbins": 30,
+                    "scatterlog": _log,
+                    "scatterrange": None,
+                    "dpi": 50,
+                }
+                files = plot_colocated(read_colocated(options), options)
+                self.assertEqual(
+                    [os.path.basename(_file) for _file in files],
+                    [
+                        f"scatter_od550aer_{_model}_AeronetSunV3Lev2.daily_daily.png"
+                        for _model in ("MODEL1", "MODEL2")
+                    ],
+                )
+                for _file in files:
+                    self.assertTrue(os.path.exists(_file))
+            # unchanged files and options: nothing is read or rendered again
+            mtimes = [os.stat(_file).st_mtime_ns for _file in files]
+            with mock.patch.object(
+                ColocatedFile, "select", side_effect=AssertionError("file read")
+            ):
+                self.assertEqual(
+                    plot_colocated(read_colocated(options), options), files
+                )
+            self.assertEqual([os.stat(_file).st_mtime_ns for _file in files], mtimes)
+
+            # a changed file: only the plot of its group is rendered again
+            os.utime(colocated_files[0], ns=(0, 0))
+            plot_colocated(read_colocated(options), options)
+            new_mtimes = [os.stat(_file).st_mtime_ns for _file in files]
+            self.assertNotEqual(new_mtimes[0], mtimes[0])
+            self.assertEqual(new_mtimes[1], mtimes[1])
+
+    def test_scatter_skips_groups_without_pairs(self):
+        with TemporaryDirectory() as tmp_dir:
+            data_dir = os.path.join(tmp_dir, "coldata")
+            os.makedirs(data_dir)
+            write_colocated_file(data_dir, model="MODEL1")
+            # no valid pairs at all, and no positive pairs for the log scatter
+            empty = make_colocated_data(model="EMPTY")
+            empty.data.values[:] = np.nan
+            empty.to_netcdf(data_dir)
+            negative = make_colocated_data(model="NEGATIVE")
+            negative.data.values[:] = -1.0
+            negative.to_netcdf(data_dir)
+
+            colocated_data = PyaColocatedData()
+            colocated_data.open_dir(data_dir)
+            with self.assertRaises(ValueError):
+                colocated_data.scatter("od550aer", "EMPTY", "AeronetSunV3Lev2.daily")
+            with self.assertRaises(ValueError):
+                colocated_data.scatter(
+                    "od550aer", "EMPTY", "AeronetSunV3Lev2.daily", range=(0, 1)
+                )
+
+            for _log, _models in ((False, ["MODEL1", "NEGATIVE"]), (True, ["MODEL1"])):
+                options = {
+                    "colocated": [data_dir],
+                    "plottype": ["scatter_density"],
+                    "outdir": tmp_dir,
+                    "workers": 1,
+                    "force": True,
+                    "scatterkind": "hist",
+                    "scatterbins": 20,
+                    "scatterlog": _log,
+                    "scatterrange": None,
+                    "dpi": 50,
+                }
+                files = plot_colocated(read_colocated(options), options)
+                self.assertEqual(
+                    [os.path.basename(_file) for _file in files],
+                    [
+                        f"scatter_od550aer_{_model}_AeronetSunV3Lev2.daily_monthly.png"
+                        for _model in _models
+                    ],
+                )
@@ -0,0 +1,89 @@
+import pkgutil
+import subprocess
+import sys
+import unittest
+
+# budget for the cumulative import time of a command line script module
+IMPORT_TIME_BUDGET_US = 200_000
+# modules that must not be imported for argument parsing and listing of the plot types
+HEAVY_MODULES = (
+    "pyaerocom",
+    "iris",
+    "cartopy",
+    "matplotlib",
+    "numpy",
+    "simplejson",
+    "pyaerocom_plotting.plotting",
+    "pyaerocom_plotting.readers",
+)
+SCRIPTS = (
+    "pyaerocom_plotting.cli.pyaerocom_plot",
+    "pyaerocom_plotting.cli.pyaerocom_plot_json",
+)
+
+
+def import_times(args: list[str]) -> dict:
+    """run python -X importtime with args; returns {module: cumulative us}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for _line in result.stderr.splitlines():
+        if not _line.startswith("import time:") or "self [us]" in _line:
+            continue
+        _self, cumulative, module = _line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_script_import_budget(self):
+        for _script in SCRIPTS:
+            times = import_times(["-c", f"import {_script}"])
+            self.assertLess(times[_script], IMPORT_TIME_BUDGET_US, _script)
+            for _module in HEAVY_MODULES:
+                self.assertNotIn(_module, times, _script)
+
+    def test_list_is_light_weight(self):
+        for _script in SCRIPTS:
+            times = import_times(["-m", _script, "-l"])
+            for _module in HEAVY_MODULES:
+                self.assertNotIn(_module, times, _script)
+
+    def test_package_attributes(self):
+        times = import_times(
+            [
+                "-c",
+                "import pyaerocom_plotting; pyaerocom_plotting.const.DEFAULT_TS_TYPE",
+            ]
+        )
+        self.assertNotIn("pyaerocom_plotting.plotting", times)
+        self.assertNotIn("uuid", times)
+
+    def test_lazy_modules(self):
+        import pyaerocom_plotting
+
+        modules = sorted(
+            _module.name
+            for _module in pkgutil.iter_modules(pyaerocom_plotting.__path__)
+            if not _module.ispkg and _module.name != "const"
+        )
+        self.assertEqual(sorted(pyaerocom_plotting._LAZY_MODULES), modules)
+        # every module is an attribute of the package without importing it explicitly
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import pyaerocom_plotting; print([getattr(pyaerocom_plotting, _name).__name__ for _name in pyaerocom_plotting._LAZY_MODULES])",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(
+            result.stdout.strip(),
+            str([f"pyaerocom_plotting.{_name}" for _name in modules]),
+        )
@@ -0,0 +1,190 @@
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+
+from pyaerocom_plotting.cli.pyaerocom_plot import plot_models, read_models
+from pyaerocom_plotting.cli.pyaerocom_plot_json import plot_json_file
+from pyaerocom_plotting.manifest import BuildManifest
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData
+from synthetic import make_gridded_data, write_model_dir
+
+FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "testdata",
+    "ALL-Aeronet-od550aer-Column.json",
+)
+
+
+class TestBuildManifest(unittest.TestCase):
+    def model_data(self, change_february: bool = False) -> PyaModelData:
+        data = make_gridded_data(ndays=59)
+        if change_february:
+            # day 40 is in February
+            data.cube.data[40] += 1.0
+        model_data = PyaModelData()
+        model_data.add_model_data("SYNTHETIC", "od550aer", data)
+        return model_data
+
+    def mtimes(self, files: list[str]) -> list[int]:
+        return [os.stat(_file).st_mtime_ns for _file in files]
+
+    def test_pixel_map_renders_changed_months_only(self):
+        for template in (False, True):
+            with TemporaryDirectory() as tmp_dir:
+                files = Plotting(
+                    plotdir=tmp_dir, manifest=BuildManifest(tmp_dir)
+                ).plot_pixel_map(self.model_data(), template=template)
+                self.assertEqual(len(files), 2)
+                mtimes = self.mtimes(files)
+
+                # unchanged data: nothing is rendered
+                Plotting(
+                    plotdir=tmp_dir, manifest=BuildManifest(tmp_dir)
+                ).plot_pixel_map(self.model_data(), template=template)
+                self.assertEqual(self.mtimes(files), mtimes)
+
+                # changed February data: only February is rendered
+                # (in template mode the colour scale of the series changes, too)
+                Plotting(
+                    plotdir=tmp_dir, manifest=BuildManifest(tmp_dir)
+                ).plot_pixel_map(
+                    self.model_data(change_february=True), template=template
+                )
+                new_mtimes = self.mtimes(files)
+                if template:
+                    self.assertNotEqual(new_mtimes[1], mtimes[1])
+                else:
+                    self.assertEqual(new_mtimes[0], mtimes[0])
+                    self.assertNotEqual(new_mtimes[1], mtimes[1])
+
+                # a deleted file is rendered again
+                os.remove(files[0])
+                Plotting(
+                    plotdir=tmp_dir, manifest=BuildManifest(tmp_dir)
+                ).plot_pixel_map(
+                    self.model_data(change_february=True), template=template
+                )
+                self.assertTrue(os.path.exists(files[0]))
+
+    def test_weighted_means_skip_across_runs(self):
+        # the variables are read from files; the plot is skipped in a second run with
+        # another string hash seed
+        script = """
+import sys
+from pyaerocom_plotting.manifest import BuildManifest
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData
+
+data_dir, plot_dir = sys.argv[1:]
+model_data = PyaModelData()
+model_data.read(
+    "SYNTHETIC", ["od550so4", "od550bc", "od550dust", "od550ss"], 2019, 2020,
+    data_dir=data_dir,
+)
+print(model_data.variables)
+Plotting(plotdir=plot_dir, manifest=BuildManifest(plot_dir)).plot_weighted_means(
+    model_data
+)
+"""
+        variables = ["od550so4", "od550bc", "od550dust", "od550ss"]
+        with TemporaryDirectory() as tmp_dir:
+            write_model_dir(tmp_dir, var_names=tuple(variables))
+            outputs = [
+                subprocess.run(
+                    [sys.executable, "-c", script, tmp_dir, tmp_dir],
+                    env={**os.environ, "PYTHONHASHSEED": _seed},
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    cwd=tmp_dir,
+                ).stdout
+                for _seed in ("1", "2")
+            ]
+        self.assertIn(str(variables), outputs[0])
+        self.assertIn(str(variables), outputs[1])
+        self.assertIn("saving file", outputs[0])
+        self.assertNotIn("saving file", outputs[1])
+        self.assertIn("skipping unchanged file", outputs[1])
+
+    def test_models_skip_unchanged_sources(self):
+        import pyaerocom
+
+        reads = []
+
+        def read(options, model_data):
+            reads.append(options["plottype"])
+            return read_models(options, model_data=model_data)
+
+        with TemporaryDirectory() as tmp_dir:
+            # pyaerocom finds the model in <search dir>/SYNTHETIC/renamed
+            model_dir = os.path.join(tmp_dir, "models", "SYNTHETIC", "renamed")
+            os.makedirs(model_dir)
+            sources = write_model_dir(model_dir, var_names=("od550so4", "od550bc"))
+            pyaerocom.const.add_data_search_dir(os.path.join(tmp_dir, "models"))
+            options = {
+                "models": ["SYNTHETIC"],
+                "vars": ["od550so4", "od550bc"],
+                "startyear": 2019,
+                "endyear": 2020,
+                "outdir": tmp_dir,
+                "plottype": ["monthly_weighted_mean", "pixelmap"],
+                "force": False,
+                "workers": 1,
+                "readworkers": 2,
+                "maxopenfiles": 8,
+                "nocache": True,
+                "maxmemory": None,
+                "dpi": 20,
+            }
+            files = plot_models(options, read=read)
+            self.assertEqual(len(files), 25)
+            self.assertEqual(reads, [["monthly_weighted_mean", "pixelmap"]])
+            mtimes = self.mtimes(files)
+
+            # unchanged source files: nothing is read
+            self.assertEqual(plot_models(options, read=read), files)
+            self.assertEqual(len(reads), 1)
+            self.assertEqual(self.mtimes(files), mtimes)
+
+            # another option of a plot type
+            plot_models(dict(options, template=True), read=read)
+            self.assertEqual(reads[1], ["pixelmap"])
+
+            # a changed source file: the data is read, but only the plots whose data
+            # changed are rendered again
+            os.utime(sources[0], ns=(0, 0))
+            plot_models(dict(options, template=True), read=read)
+            self.assertEqual(reads[2], ["monthly_weighted_mean", "pixelmap"])
+            self.assertEqual(self.mtimes(files[:1]), mtimes[:1])
+
+    def test_json_skips_unchanged_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            json_file = os.path.join(tmp_dir, "ALL-Aeronet-od550aer-Column.json")
+            shutil.copy(FILE, json_file)
+            options = {
+                "file": json_file,
+                "outdir": tmp_dir,
+                "plottype": ["overall_ts"],
+                "plottitle": None,
+                "force": False,
+            }
+            files = plot_json_file(options)
+            self.assertEqual(len(files), 1)
+            mtime = os.stat(files[0]).st_mtime_ns
+
+            self.assertEqual(plot_json_file(options), files)
+            self.assertEqual(os.stat(files[0]).st_mtime_ns, mtime)
+
+            # forced and changed input files are rendered again
+            options["force"] = True
+            plot_json_file(options)
+            self.assertNotEqual(os.stat(files[0]).st_mtime_ns, mtime)
+            mtime = os.stat(files[0]).st_mtime_ns
+            options["force"] = False
+            os.utime(json_file, ns=(0, 0))
+            plot_json_file(options)
+            self.assertNotEqual(os.stat(files[0]).st_mtime_ns, mtime)
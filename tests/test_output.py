@@ -0,0 +1,153 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from pyaerocom_plotting.output import ImageWriter, OutputSettings
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData
+from synthetic import make_gridded_data
+
+
+def make_figure():
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(4, 3))
+    ax = fig.add_subplot(1, 1, 1)
+    ax.pcolormesh(np.random.default_rng(0).random((18, 36)))
+    ax.set_title("synthetic")
+    return fig
+
+
+class TestOutput(unittest.TestCase):
+    def test_png_matches_savefig(self):
+        import matplotlib.pyplot as plt
+        from PIL import Image
+
+        fig = make_figure()
+        with TemporaryDirectory() as tmp_dir:
+            fig.savefig(os.path.join(tmp_dir, "savefig.png"), dpi=100)
+            for _compression in (1, 9):
+                filename = os.path.join(tmp_dir, f"writer{_compression}.png")
+                with ImageWriter(
+                    OutputSettings(dpi=100, compression=_compression)
+                ) as writer:
+                    writer.save(fig, filename)
+                np.testing.assert_array_equal(
+                    np.asarray(Image.open(filename)),
+                    np.asarray(Image.open(os.path.join(tmp_dir, "savefig.png"))),
+                )
+        plt.close(fig)
+
+    def test_formats_and_thumbnails(self):
+        import matplotlib.pyplot as plt
+        from PIL import Image
+
+        fig = make_figure()
+        with TemporaryDirectory() as tmp_dir:
+            for _format in ("webp", "jpeg", "svg"):
+                settings = OutputSettings(
+                    dpi=100, format=_format, thumbnails=[50, 20], background=True
+                )
+                with ImageWriter(settings) as writer:
+                    files = writer.save(
+                        fig, os.path.join(tmp_dir, f"plot.{settings.extension}")
+                    )
+                self.assertEqual(
+                    [os.path.basename(_file) for _file in files],
+                    [
+                        f"plot.{settings.extension}",
+                        f"plot_thumb20.{settings.extension.replace('svg', 'png')}",
+                        f"plot_thumb50.{settings.extension.replace('svg', 'png')}",
+                    ],
+                )
+                for _file in files:
+                    self.assertTrue(os.path.exists(_file))
+                with Image.open(files[2]) as image:
+                    self.assertEqual(image.size, (50, 38))
+        plt.close(fig)
+
+    def test_save_parts(self):
+        import matplotlib.pyplot as plt
+        from PIL import Image
+
+        fig, axes = plt.subplots(1, 2, figsize=(6, 3), layout="constrained")
+        for _ax, _title in zip(axes, ("left", "right")):
+            _ax.plot([0, 1], [1, 0])
+            _ax.set_title(_title)
+        with TemporaryDirectory() as tmp_dir:
+            with ImageWriter(OutputSettings(dpi=100)) as writer:
+                full = writer.draw(fig)
+                files = writer.save_parts(
+                    fig,
+                    {
+                        os.path.join(tmp_dir, "left.png"): axes[0],
+                        os.path.join(tmp_dir, "right.png"): axes[1],
+                    },
+                    pad=0,
+                )
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files], ["left.png", "right.png"]
+            )
+            images = [np.asarray(Image.open(_file)) for _file in files]
+            # the parts are cut from the render of the whole figure
+            for _image in images:
+                self.assertLess(_image.shape[1], full.shape[1] * 0.6)
+                self.assertLessEqual(_image.shape[0], full.shape[0])
+            # the figure is rendered at the dpi of the settings (100, as the figure)
+            fig.canvas.draw()
+            extent = axes[1].get_tightbbox()
+            x0, y0 = int(extent.x0), int(full.shape[0] - extent.y1)
+            height, width = images[1].shape[:2]
+            np.testing.assert_array_equal(
+                images[1], full[y0 : y0 + height, x0 : x0 + width]
+            )
+
+            settings = OutputSettings(dpi=100, format="svg", thumbnails=[40])
+            with ImageWriter(settings) as writer:
+                files = writer.save_parts(
+                    fig, {os.path.join(tmp_dir, "left.svg"): axes[0]}
+                )
+            self.assertEqual(
+                [os.path.basename(_file) for _file in files],
+                ["left.svg", "left_thumb40.png"],
+            )
+            for _file in files:
+                self.assertTrue(os.path.exists(_file))
+        plt.close(fig)
+
+    def test_settings(self):
+        self.assertEqual(OutputSettings().compression, 6)
+        self.assertEqual(OutputSettings(format="jpeg").extension, "jpg")
+        self.assertIsNone(OutputSettings(format="pdf").compression)
+        self.assertNotEqual(
+            OutputSettings().fingerprint(), OutputSettings(compression=1).fingerprint()
+        )
+        with self.assertRaises(ValueError):
+            OutputSettings(compression=10)
+        with self.assertRaises(ValueError):
+            OutputSettings(format="gif")
+        settings = OutputSettings.from_options(
+            {"dpi": 72, "format": "webp", "thumbnails": [64]}
+        )
+        self.assertEqual(
+            settings.fingerprint(),
+            {"dpi": 72, "format": "webp", "compression": 80, "thumbnails": [64]},
+        )
+
+    def test_pixel_map(self):
+        model_data = PyaModelData()
+        model_data.add_model_data("SYNTHETIC", "od550aer", make_gridded_data(ndays=59))
+        settings = OutputSettings(
+            dpi=50, format="webp", compression=50, thumbnails=[32], background=True
+        )
+        with TemporaryDirectory() as tmp_dir:
+            files = Plotting(plotdir=tmp_dir, output=settings).plot_pixel_map(
+                model_data
+            )
+            self.assertEqual(len(files), 2)
+            for _file in files:
+                self.assertTrue(_file.endswith(".webp"))
+                self.assertTrue(os.path.exists(_file))
+                self.assertTrue(os.path.exists(settings.thumbnail_filename(_file, 32)))
@@ -0,0 +1,49 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData
+from synthetic import make_gridded_data
+
+
+class TestPixelMap(unittest.TestCase):
+    def model_data(self) -> PyaModelData:
+        model_data = PyaModelData()
+        model_data.add_model_data("SYNTHETIC", "od550aer", make_gridded_data(ndays=59))
+        return model_data
+
+    def test_parallel_output_identical_to_serial(self):
+        with TemporaryDirectory() as serial_dir, TemporaryDirectory() as parallel_dir:
+            serial_files = Plotting(plotdir=serial_dir).plot_pixel_map(
+                self.model_data()
+            )
+            parallel_files = Plotting(plotdir=parallel_dir, workers=2).plot_pixel_map(
+                self.model_data()
+            )
+            self.assertEqual(len(serial_files), 2)
+            self.assertEqual(
+                [os.path.basename(x) for x in serial_files],
+                [os.path.basename(x) for x in parallel_files],
+            )
+            for _serial, _parallel in zip(serial_files, parallel_files):
+                with open(_serial, "rb") as fh:
+                    serial_bytes = fh.read()
+                with open(_parallel, "rb") as fh:
+                    self.assertEqual(serial_bytes, fh.read())
+
+    def test_template_mode(self):
+        with TemporaryDirectory() as serial_dir, TemporaryDirectory() as parallel_dir:
+            serial_files = Plotting(plotdir=serial_dir).plot_pixel_map(
+                self.model_data(), template=True
+            )
+            parallel_files = Plotting(plotdir=parallel_dir, workers=2).plot_pixel_map(
+                self.model_data(), template=True
+            )
+            self.assertEqual(len(serial_files), 2)
+            for _serial, _parallel in zip(serial_files, parallel_files):
+                self.assertTrue(os.path.exists(_serial))
+                with open(_serial, "rb") as fh:
+                    serial_bytes = fh.read()
+                with open(_parallel, "rb") as fh:
+                    self.assertEqual(serial_bytes, fh.read())
@@ -0,0 +1,88 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from pyaerocom_plotting.cli.pyaerocom_plot_json import plot_json_file
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.profiling import PROFILER, Profiler, profiled
+from pyaerocom_plotting.readers import PyaModelData
+from synthetic import make_gridded_data
+
+FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "testdata",
+    "ALL-Aeronet-od550aer-Column.json",
+)
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        PROFILER.disable()
+        PROFILER.clear()
+
+    def test_disabled(self):
+        profiler = Profiler()
+        with profiler.stage("read", model="A"):
+            pass
+        self.assertEqual(profiler.events, [])
+
+    def test_stages(self):
+        profiler = Profiler()
+        profiler.enable()
+        with profiler.stage("plot", model="A"):
+            for _frame in range(3):
+                with profiler.stage("savefig", frame=_frame):
+                    pass
+        events = profiler.events
+        self.assertEqual(
+            [_event["name"] for _event in events], ["savefig"] * 3 + ["plot"]
+        )
+        self.assertEqual(events[0]["tags"], {"frame": "0"})
+        self.assertEqual(events[0]["depth"], 1)
+        self.assertEqual(events[-1]["depth"], 0)
+        summary = {_stat["name"]: _stat for _stat in profiler.summary()}
+        self.assertEqual(summary["savefig"]["count"], 3)
+        self.assertGreaterEqual(
+            summary["plot"]["total_s"], summary["savefig"]["total_s"]
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            profiler.write(os.path.join(tmp_dir, "profile.json"))
+            with open(os.path.join(tmp_dir, "profile.json")) as fh:
+                self.assertEqual(len(json.load(fh)["events"]), 4)
+            profiler.write(os.path.join(tmp_dir, "trace.json"), format="chrome")
+            with open(os.path.join(tmp_dir, "trace.json")) as fh:
+                trace = json.load(fh)["traceEvents"]
+            self.assertEqual(trace[-1]["ph"], "X")
+            self.assertEqual(trace[-1]["args"]["model"], "A")
+
+    def test_render_workers(self):
+        model_data = PyaModelData()
+        model_data.add_model_data("SYNTHETIC", "od550aer", make_gridded_data(ndays=59))
+        PROFILER.enable()
+        with TemporaryDirectory() as tmp_dir:
+            Plotting(plotdir=tmp_dir, workers=2).plot_pixel_map(model_data)
+        savefig = [_event for _event in PROFILER.events if _event["name"] == "savefig"]
+        # the frames were saved by the worker processes
+        self.assertEqual(len(savefig), 2)
+        self.assertNotIn(os.getpid(), {_event["pid"] for _event in savefig})
+
+    def test_profiled_run(self):
+        with TemporaryDirectory() as tmp_dir:
+            options = {
+                "file": FILE,
+                "outdir": tmp_dir,
+                "plottype": ["overall_ts"],
+                "plottitle": None,
+                "profile": True,
+                "profileoutput": os.path.join(tmp_dir, "trace.json"),
+                "profileformat": "chrome",
+            }
+            with profiled(options):
+                plot_json_file(options)
+            self.assertFalse(PROFILER.enabled)
+            with open(options["profileoutput"]) as fh:
+                names = {_event["name"] for _event in json.load(fh)["traceEvents"]}
+        for _name in ("total", "read_json", "overall_ts", "savefig"):
+            self.assertIn(_name, names)
@@ -0,0 +1,72 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy as np
+
+from pyaerocom_plotting.readers import PyaModelData
+from synthetic import write_model_dir
+
+VARS = ("od550so4", "od550bc")
+
+
+class TestPyaModelData(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = TemporaryDirectory()
+        self.data_dir = self._tmpdir.name
+        write_model_dir(self.data_dir, data_id="SYNTHETIC", var_names=VARS)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_read_many(self):
+        serial = PyaModelData()
+        serial.read("SYNTHETIC", VARS, 2019, 2020, data_dir=self.data_dir)
+
+        for _executor in ("thread", "process"):
+            model_data = PyaModelData()
+            model_data.read_many(
+                ["SYNTHETIC"],
+                VARS + ("od550dust",),
+                2019,
+                2020,
+                data_dir=self.data_dir,
+                workers=2,
+                max_open_files=1,
+                executor=_executor,
+            )
+            self.assertEqual(model_data.models, ["SYNTHETIC"])
+            self.assertEqual(sorted(model_data.variables), sorted(VARS))
+            # the missing variable is reported, not printed
+            self.assertEqual(list(model_data.errors), [("SYNTHETIC", "od550dust")])
+            for _var in VARS:
+                np.testing.assert_array_equal(
+                    model_data["SYNTHETIC", _var].cube.data,
+                    serial["SYNTHETIC", _var].cube.data,
+                )
+
+    def test_read_many_unexpected_error(self):
+        import pyaerocom.io as pio
+
+        read_var = pio.ReadGridded.read_var
+
+        def failing_read_var(reader, var_name, **kwargs):
+            if var_name == "od550bc":
+                raise RuntimeError("broken file")
+            return read_var(reader, var_name=var_name, **kwargs)
+
+        model_data = PyaModelData()
+        with mock.patch.object(pio.ReadGridded, "read_var", failing_read_var):
+            model_data.read_many(
+                ["SYNTHETIC"], VARS, 2019, 2020, data_dir=self.data_dir, workers=2
+            )
+        # the other variable is read; the error is kept
+        self.assertEqual(model_data.variables, ["od550so4"])
+        self.assertIsInstance(model_data.errors[("SYNTHETIC", "od550bc")], RuntimeError)
+
+    def test_read_many_unknown_model(self):
+        model_data = PyaModelData()
+        model_data.read_many(["NOT_A_MODEL"], VARS, 2019, 2020)
+        self.assertEqual(model_data.models, [])
+        self.assertEqual(list(model_data.errors), [("NOT_A_MODEL", None)])
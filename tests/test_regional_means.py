@@ -0,0 +1,92 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from pyaerocom_plotting import readers
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData, _region_mask
+from synthetic import write_model_dir
+
+MODEL = "SYNTHETIC"
+VARS = ("od550so4", "od550bc")
+REGIONS = ("ALL", "EUROPE", "ASIA", "NAMERICA")
+
+
+class TestRegionalMeans(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = TemporaryDirectory()
+        self.data_dir = os.path.join(self._tmpdir.name, "data")
+        os.makedirs(self.data_dir)
+        write_model_dir(self.data_dir, data_id=MODEL, var_names=VARS)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def read(self) -> PyaModelData:
+        model_data = PyaModelData()
+        model_data.read(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+        return model_data
+
+    def test_matches_brute_force(self):
+        model_data = self.read()
+        means = model_data.regional_means(MODEL, VARS, regions=REGIONS)
+        self.assertEqual(list(means), list(REGIONS))
+        for _var in VARS:
+            monthly = model_data.resampled(MODEL, _var, "monthly")
+            lat = monthly.cube.coord("latitude").points
+            lon = monthly.cube.coord("longitude").points
+            values = np.asarray(monthly.cube.data).reshape(monthly.shape[0], -1)
+            for _region in REGIONS:
+                weights = np.where(
+                    _region_mask(lat, lon, _region), monthly[0].area_weights, 0.0
+                ).reshape(-1)
+                time, mean = means[_region][_var]
+                self.assertEqual(mean.size, 12)
+                np.testing.assert_allclose(
+                    mean, np.average(values, axis=1, weights=weights), rtol=1e-5
+                )
+
+    def test_all_matches_global_mean(self):
+        model_data = self.read()
+        means = model_data.regional_means(MODEL, VARS, regions=["ALL"])
+        for _var in VARS:
+            time, mean = model_data.weighted_mean(MODEL, _var)
+            np.testing.assert_array_equal(time, means["ALL"][_var][0])
+            np.testing.assert_allclose(mean, means["ALL"][_var][1], rtol=1e-5)
+
+    def test_weights_and_means_are_cached(self):
+        model_data = self.read()
+        means = model_data.regional_means(MODEL, VARS, regions=REGIONS)
+        weights = readers._region_weights(model_data.data[MODEL][VARS[0]], REGIONS)
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+        self.assertIs(
+            readers._region_weights(model_data.data[MODEL][VARS[1]], REGIONS), weights
+        )
+        again = model_data.regional_means(MODEL, VARS, regions=REGIONS[1:])
+        for _region in REGIONS[1:]:
+            for _var in VARS:
+                self.assertIs(again[_region][_var], means[_region][_var])
+
+    def test_unknown_region(self):
+        with self.assertRaises(ValueError):
+            self.read().regional_means(MODEL, VARS, regions=["ATLANTIS"])
+
+    def test_plot(self):
+        files = Plotting(plotdir=self._tmpdir.name).plot_regional_weighted_means(
+            self.read(), regions=["ALL", "EUROPE"]
+        )
+        self.assertEqual(len(files), 2)
+        for _file in files:
+            self.assertTrue(os.path.exists(_file))
+
+    def test_plot_without_sulphate(self):
+        model_data = PyaModelData()
+        model_data.read(MODEL, ["od550bc"], 2019, 2020, data_dir=self.data_dir)
+        plotting = Plotting(plotdir=self._tmpdir.name)
+        files = plotting.plot_regional_weighted_means(model_data, regions=["ALL"])
+        files += plotting.plot_weighted_means(model_data)
+        self.assertEqual(len(files), 2)
+        for _file in files:
+            self.assertTrue(os.path.exists(_file))
@@ -0,0 +1,99 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from pyaerocom_plotting import const
+from pyaerocom_plotting.cli.pyaerocom_plot_json import json_read, render_json
+from pyaerocom_plotting.readers import AerovalJsonData
+from pyaerocom_plotting.registry import Planner, Requirement, plot_names
+
+FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "testdata",
+    "ALL-Aeronet-od550aer-Column.json",
+)
+
+
+class TestRegistry(unittest.TestCase):
+    def test_plot_names(self):
+        self.assertEqual(
+            const.PLOT_NAMES,
+            [
+                "pixelmap",
+                "monthly_weighted_mean",
+                "monthly_weighted_mean_regional",
+                "scatter_density",
+            ],
+        )
+        self.assertEqual(
+            const.PLOT_NAMES_JSON,
+            [
+                "overall_ts",
+                "overall_ts_SU",
+                "overall_ts_grid",
+                "overall_ts_regions",
+                "overall_ts_stats",
+            ],
+        )
+        self.assertEqual(plot_names(), const.PLOT_NAMES + const.PLOT_NAMES_JSON)
+
+    def test_requirements(self):
+        plan = Planner(
+            ["pixelmap", "monthly_weighted_mean", "pixelmap", "overall_ts", "unknown"]
+        )
+        self.assertEqual(
+            [_plot_type.name for _plot_type in plan.plot_types],
+            ["pixelmap", "monthly_weighted_mean", "overall_ts"],
+        )
+        self.assertEqual(plan.unknown, ["unknown"])
+        self.assertEqual(
+            plan.requirements,
+            [
+                Requirement("model", "resample", "monthly"),
+                Requirement("model", "weighted_mean", const.WEIGHTED_MEAN_TS_TYPE),
+                Requirement("json"),
+            ],
+        )
+        self.assertEqual(plan.aggregations("model"), {"resample", "weighted_mean"})
+        self.assertEqual(plan.aggregations("json"), {None})
+
+    def test_render_json(self):
+        with TemporaryDirectory() as tmp_dir:
+            options = {
+                "file": FILE,
+                "outdir": tmp_dir,
+                "plottype": ["overall_ts", "unknown", "overall_ts_SU"],
+                "plottitle": "title",
+                "workers": 2,
+            }
+            files = render_json(json_read(options), options)
+            self.assertEqual(list(files), ["overall_ts", "overall_ts_SU"])
+            for _files in files.values():
+                self.assertEqual(len(_files), 1)
+                self.assertTrue(os.path.exists(_files[0]))
+
+    def test_render_json_shares_data(self):
+        with TemporaryDirectory() as tmp_dir:
+            options = {
+                "file": FILE,
+                "outdir": tmp_dir,
+                "plottype": ["overall_ts", "overall_ts_regions", "overall_ts_stats"],
+                "plottitle": None,
+                "workers": 2,
+            }
+            json_data = json_read(options)
+            # three output groups on two workers: the data is pickled once, not per group
+            pickled = []
+
+            def getstate(data):
+                pickled.append(data)
+                return data.__dict__
+
+            with mock.patch.object(AerovalJsonData, "__getstate__", getstate):
+                files = render_json(json_data, options)
+            self.assertEqual(pickled, [json_data])
+            self.assertEqual(list(files), options["plottype"])
+            for _files in files.values():
+                self.assertGreater(len(_files), 0)
+                self.assertTrue(all(os.path.exists(_file) for _file in _files))
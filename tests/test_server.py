@@ -0,0 +1,130 @@
+import os
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from pyaerocom_plotting.server import DataCache, PlotClient, PlotServer
+from synthetic import write_model_dir
+
+FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "testdata",
+    "ALL-Aeronet-od550aer-Column.json",
+)
+
+
+class TestPlotServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        # port 0: let the OS pick a free port
+        self.server = PlotServer(
+            port=0, outdir=self.tmp_dir.name, options={"nocache": True}
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = PlotClient(self.server.url, timeout=120)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.tmp_dir.cleanup()
+
+    def test_json_plots(self):
+        files = self.client.plot(plottype="overall_ts", file=FILE)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(os.path.exists(files[0]))
+        self.assertEqual(os.path.dirname(files[0]), self.tmp_dir.name)
+
+        # a second plot type of the same file uses the data in memory
+        self.client.plot(plottype=["overall_ts_SU"], file=FILE, force=True)
+        status = self.client.status()
+        self.assertEqual(status["misses"], 1)
+        self.assertEqual(status["hits"], 1)
+
+        image = self.client.image(plottype="overall_ts", file=FILE)
+        self.assertEqual(image[:8], b"\x89PNG\r\n\x1a\n")
+        with open(files[0], "rb") as fh:
+            self.assertEqual(image, fh.read())
+
+        self.assertEqual(self.client.clear()["cache"], [])
+
+    def test_model_plots_read_changed_files(self):
+        import pyaerocom
+
+        # pyaerocom finds the model in <search dir>/SYNTHETIC/renamed
+        model_dir = os.path.join(self.tmp_dir.name, "models", "SYNTHETIC", "renamed")
+        os.makedirs(model_dir)
+        write_model_dir(model_dir, var_names=("od550so4",))
+        pyaerocom.const.add_data_search_dir(os.path.join(self.tmp_dir.name, "models"))
+        request = dict(
+            plottype="monthly_weighted_mean",
+            models=["SYNTHETIC"],
+            vars=["od550so4"],
+            startyear=2019,
+            endyear=2020,
+            force=True,
+        )
+        self.client.plot(**request)
+        self.client.plot(**request)
+        status = self.client.status()
+        self.assertEqual((status["misses"], status["hits"]), (1, 1))
+
+        # a rewritten model file is read again
+        files = write_model_dir(model_dir, var_names=("od550so4",))
+        os.utime(files[0], ns=(0, 0))
+        self.client.plot(**request)
+        self.assertEqual(self.client.status()["misses"], 2)
+
+    def test_model_plots_share_data(self):
+        import pyaerocom
+
+        from pyaerocom_plotting import readers
+
+        model_dir = os.path.join(self.tmp_dir.name, "models", "SYNTHETIC", "renamed")
+        os.makedirs(model_dir)
+        write_model_dir(model_dir, var_names=("od550so4",))
+        pyaerocom.const.add_data_search_dir(os.path.join(self.tmp_dir.name, "models"))
+        request = dict(
+            models=["SYNTHETIC"], vars=["od550so4"], startyear=2019, endyear=2020
+        )
+        reader_class = readers.pio.ReadGridded
+        with mock.patch.object(
+            reader_class,
+            "read_var",
+            autospec=True,
+            side_effect=reader_class.read_var,
+        ) as read, mock.patch.object(
+            readers.PyaModelData,
+            "_new_reader",
+            wraps=readers.PyaModelData._new_reader,
+        ) as scan:
+            self.client.plot(plottype="pixelmap", **request)
+            self.assertEqual((read.call_count, scan.call_count), (1, 1))
+            # another plot type of the same data: neither scanned nor read again
+            self.client.plot(plottype="monthly_weighted_mean", **request)
+            self.assertEqual((read.call_count, scan.call_count), (1, 1))
+            status = self.client.status()
+            self.assertEqual((status["misses"], status["hits"]), (1, 1))
+
+            # a new file in the data directory: the directory is scanned again
+            write_model_dir(model_dir, var_names=("od550bc",))
+            self.client.plot(plottype="pixelmap", **request)
+            self.assertEqual(scan.call_count, 2)
+
+    def test_invalid_request(self):
+        with self.assertRaises(RuntimeError):
+            self.client.plot(plottype="overall_ts")
+        with self.assertRaises(RuntimeError):
+            self.client.plot(file=FILE)
+
+
+class TestDataCache(unittest.TestCase):
+    def test_lru(self):
+        cache = DataCache(max_items=2)
+        cache.get(("a",), lambda: 1)
+        cache.get(("b",), lambda: 2)
+        # touch a, so that b is the least recently used entry
+        self.assertEqual(cache.get(("a",), lambda: None), 1)
+        cache.get(("c",), lambda: 3)
+        self.assertEqual(cache.keys, [("a",), ("c",)])
@@ -0,0 +1,151 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from pyaerocom_plotting.cache import WeightedMeanCache
+from pyaerocom_plotting.plotting import Plotting
+from pyaerocom_plotting.readers import PyaModelData
+from synthetic import write_model_dir
+
+MODEL = "SYNTHETIC"
+VARS = ("od550so4", "od550bc")
+
+
+class TestWeightedMeans(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = TemporaryDirectory()
+        self.data_dir = os.path.join(self._tmpdir.name, "data")
+        self.cache_dir = os.path.join(self._tmpdir.name, "cache")
+        os.makedirs(self.data_dir)
+        self.files = write_model_dir(self.data_dir, data_id=MODEL, var_names=VARS)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def read(self, cache: WeightedMeanCache = None) -> PyaModelData:
+        model_data = PyaModelData()
+        model_data.read_weighted_means(
+            MODEL, VARS, 2019, 2020, data_dir=self.data_dir, cache=cache
+        )
+        return model_data
+
+    def test_cache_skips_read(self):
+        cache = WeightedMeanCache(self.cache_dir)
+        first = self.read(cache=cache)
+        self.assertEqual(sorted(first.data[MODEL]), sorted(VARS))
+        self.assertEqual(len(os.listdir(self.cache_dir)), len(VARS))
+
+        second = self.read(cache=cache)
+        # everything came from the cache; nothing was read
+        self.assertEqual(second.data[MODEL], {})
+        for _var in VARS:
+            time, mean = first.weighted_mean(MODEL, _var)
+            cached_time, cached_mean = second.weighted_mean(MODEL, _var)
+            self.assertEqual(mean.size, 12)
+            np.testing.assert_array_equal(time, cached_time)
+            np.testing.assert_allclose(mean, cached_mean)
+
+        # a changed source file invalidates the entry of that variable only
+        stat = os.stat(self.files[0])
+        os.utime(self.files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        third = self.read(cache=cache)
+        self.assertEqual(list(third.data[MODEL]), [VARS[0]])
+
+    def test_no_cache_matches_cache(self):
+        uncached = self.read()
+        cached = self.read(cache=WeightedMeanCache(self.cache_dir))
+        for _var in VARS:
+            np.testing.assert_allclose(
+                uncached.weighted_mean(MODEL, _var)[1],
+                cached.weighted_mean(MODEL, _var)[1],
+            )
+
+    def test_chunked_matches_eager(self):
+        eager = self.read()
+        chunked = PyaModelData()
+        # a memory ceiling below the size of one month forces one chunk per month
+        chunked.read_weighted_means(
+            MODEL, VARS, 2019, 2020, data_dir=self.data_dir, max_memory=1
+        )
+        for _var in VARS:
+            time, mean = eager.weighted_mean(MODEL, _var)
+            chunked_time, chunked_mean = chunked.weighted_mean(MODEL, _var)
+            np.testing.assert_array_equal(time, chunked_time)
+            np.testing.assert_allclose(mean, chunked_mean, rtol=1e-6)
+
+    def test_chunked_weekly(self):
+        eager = PyaModelData()
+        eager.read(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+        for _max_memory in (None, 1):
+            chunked = PyaModelData()
+            chunked.read(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+            means = chunked.weighted_means(
+                MODEL, VARS, ts_type="weekly", max_memory=_max_memory
+            )
+            single = PyaModelData()
+            single.read(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+            for _var in VARS:
+                time, mean = eager.weighted_mean(MODEL, _var, ts_type="weekly")
+                self.assertEqual(mean.size, 53)
+                np.testing.assert_array_equal(time, means[_var][0])
+                np.testing.assert_allclose(mean, means[_var][1], rtol=1e-6)
+                # the chunked per variable path splits the weeks in the same way
+                single_time, single_mean = single.weighted_mean(
+                    MODEL, _var, ts_type="weekly", max_memory=_max_memory
+                )
+                np.testing.assert_array_equal(time, single_time)
+                np.testing.assert_allclose(mean, single_mean, rtol=1e-6)
+
+    def test_shared_data(self):
+        model_data = PyaModelData()
+        model_data.read(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+        monthly = model_data.resampled(MODEL, VARS[0], "monthly")
+        self.assertIs(model_data.resampled(MODEL, VARS[0], "monthly"), monthly)
+        # the weighted means reuse the data that is already read
+        model_data.read_weighted_means(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+        self.assertIs(model_data.resampled(MODEL, VARS[0], "monthly"), monthly)
+        self.assertEqual(model_data.weighted_mean(MODEL, VARS[0])[1].size, 12)
+
+    def read_masked(self) -> PyaModelData:
+        model_data = PyaModelData()
+        model_data.read(MODEL, VARS, 2019, 2020, data_dir=self.data_dir)
+        # masked values take the per grid cell path of the stacked reduction
+        data = model_data.data[MODEL][VARS[1]]
+        data.cube.data = np.ma.masked_greater(data.cube.data, 0.9)
+        return model_data
+
+    def test_stacked_matches_per_variable(self):
+        per_variable = self.read_masked()
+        for _max_memory in (None, 1):
+            stacked = self.read_masked()
+            means = stacked.weighted_means(MODEL, VARS, max_memory=_max_memory)
+            self.assertEqual(list(means), list(VARS))
+            for _var in VARS:
+                time, mean = per_variable.weighted_mean(MODEL, _var)
+                np.testing.assert_array_equal(time, means[_var][0])
+                np.testing.assert_allclose(mean, means[_var][1], rtol=1e-6)
+                # memoized for the plots
+                self.assertIs(stacked.weighted_mean(MODEL, _var), means[_var])
+
+    def test_eviction(self):
+        cache = WeightedMeanCache(self.cache_dir, max_size=1)
+        time = np.arange(12).astype("datetime64[M]")
+        cache.put("a", time, np.ones(12))
+        cache.put("b", time, np.ones(12))
+        # each entry is larger than max_size, so nothing is kept
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+        cache = WeightedMeanCache(self.cache_dir)
+        cache.put("a", time, np.ma.masked_less(np.arange(12.0), 1.0))
+        cached_time, cached_mean = cache.get("a")
+        np.testing.assert_array_equal(cached_time, time)
+        self.assertTrue(cached_mean.mask[0])
+        self.assertIsNone(cache.get("b"))
+
+    def test_plot(self):
+        model_data = self.read(cache=WeightedMeanCache(self.cache_dir))
+        files = Plotting(plotdir=self._tmpdir.name).plot_weighted_means(model_data)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(os.path.exists(files[0]))